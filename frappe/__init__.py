@@ -7,6 +7,7 @@ globals attached to frappe module
 from __future__ import unicode_literals, print_function
 
 from six import iteritems, binary_type, text_type, string_types
+from collections import OrderedDict
 from werkzeug.local import Local, release_local
 import os, sys, importlib, inspect, json
 from past.builtins import cmp
@@ -121,7 +122,7 @@ def init(site, sites_path=None, new_site=False):
 	local.error_log = []
 	local.message_log = []
 	local.debug_log = []
-	local.realtime_log = []
+	local.realtime_log = OrderedDict()
 	local.flags = _dict({
 		"ran_schedulers": [],
 		"currently_saving": [],
@@ -249,6 +250,11 @@ class init_site:
 
 def destroy():
 	"""Closes connection and releases werkzeug local."""
+	if getattr(local, "realtime_throttled", None) or getattr(local, "realtime_stats", None):
+		# events held back by throttling, that would otherwise wait for a commit
+		from frappe.realtime import flush_throttled_events
+		flush_throttled_events()
+
 	if db:
 		db.close()
 
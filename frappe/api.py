@@ -7,9 +7,11 @@ import frappe
 import frappe.handler
 import frappe.client
 from frappe.utils.response import build_response
+from frappe.utils import cint, cstr
 from frappe import _
+from six import string_types
 from six.moves.urllib.parse import urlparse, urlencode
-import base64
+import base64, hashlib, hmac
 
 def handle():
 	"""
@@ -33,6 +35,15 @@ def handle():
 		`DELETE` will delete
 
 	`/api/resource/{doctype}/{name}?run_method={method}` will run a whitelisted controller method
+
+	`/api/resource/{doctype}` with a list of documents in `data` will write them in bulk
+		`POST` will insert, or upsert if `key` (fieldnames identifying a document) is set
+		`PUT` will update documents identified by `name` or `key`
+		`DELETE` will delete documents (names, or documents identified by `name` or `key`)
+		examples:
+		- `?key=["email_id"]`
+		- `?chunk_size=100` documents committed together
+		- `?atomic=1` to roll back all documents if any one fails
 	"""
 
 	validate_oauth()
@@ -114,13 +125,28 @@ def handle():
 
 				if frappe.local.request.method=="POST":
 					data = json.loads(frappe.local.form_dict.data)
-					data.update({
-						"doctype": doctype
-					})
+					if isinstance(data, list):
+						frappe.local.response.update({
+							"data": bulk_write(doctype, "POST", data, **get_bulk_write_options())
+						})
+					else:
+						data.update({
+							"doctype": doctype
+						})
+						frappe.local.response.update({
+							"data": frappe.get_doc(data).insert().as_dict()
+						})
+						frappe.db.commit()
+
+				if frappe.local.request.method in ("PUT", "DELETE"):
+					data = json.loads(frappe.local.form_dict.data or "null")
+					if not isinstance(data, list):
+						raise frappe.DoesNotExistError
+
 					frappe.local.response.update({
-						"data": frappe.get_doc(data).insert().as_dict()
+						"data": bulk_write(doctype, frappe.local.request.method, data,
+							**get_bulk_write_options())
 					})
-					frappe.db.commit()
 			else:
 				raise frappe.DoesNotExistError
 
@@ -129,6 +155,138 @@ def handle():
 
 	return build_response("json")
 
+def get_bulk_write_options():
+	form_dict = frappe.local.form_dict
+	return {
+		"key": form_dict.get("key"),
+		"chunk_size": form_dict.get("chunk_size"),
+		"atomic": cint(form_dict.get("atomic"))
+	}
+
+def bulk_write(doctype, method, docs, key=None, chunk_size=None, atomic=False):
+	"""Insert (`POST`), upsert (`POST` with `key`), update (`PUT`) or delete (`DELETE`) documents
+	of `doctype` in one request and return the result of each, `{"name": name}` or
+	`{"error": message, "exc_type": exception}`.
+
+	Documents are committed `chunk_size` (default 100) at a time. A document that fails is rolled
+	back alone and the rest are written, unless `atomic` is set, in which case the request fails
+	and nothing is written. If the failure rolls back the whole transaction (as any failed query
+	does on Postgres), the uncommitted documents before it are returned as failed too. `atomic` cannot undo documents whose controller commits (or runs DDL,
+	which commits), the documents written before such a document stay written.
+
+	:param docs: list of documents (dicts), or names for `DELETE`.
+	:param key: fieldnames (list or comma separated) identifying existing documents, instead of `name`."""
+	limit = cint(frappe.conf.get("max_bulk_write_size")) or 1000
+	if len(docs) > limit:
+		frappe.throw(_("Only {0} documents can be written in one request").format(limit))
+
+	if isinstance(key, string_types):
+		key = json.loads(key) if key.startswith("[") else key.split(",")
+
+	chunk_size = cint(chunk_size) or 100
+	out = []
+	uncommitted = UncommittedResults()
+
+	for i, doc in enumerate(docs):
+		message_count = len(frappe.local.message_log)
+		uncommitted.watch()
+		frappe.db.savepoint("bulk_write")
+
+		try:
+			result = {"name": write_doc(doctype, method, doc, key)}
+			uncommitted.watch()
+			uncommitted.results.append(result)
+			out.append(result)
+		except Exception as e:
+			if atomic:
+				frappe.db.rollback()
+				raise
+
+			try:
+				frappe.db.rollback(save_point="bulk_write")
+			except Exception:
+				# the savepoint is gone if the transaction was committed or rolled back by the
+				# document, uncommitted results before it are marked as failed on rollback
+				frappe.db.rollback()
+
+			out.append({"error": cstr(e), "exc_type": e.__class__.__name__})
+
+			# messages of the failed document are sent with its result
+			del frappe.local.message_log[message_count:]
+			frappe.local.response.pop("exc_type", None)
+
+		if (i + 1) % chunk_size == 0 and not atomic:
+			frappe.db.commit()
+
+	frappe.db.commit()
+	return out
+
+class UncommittedResults(object):
+	"""Results of a bulk write since the last commit, marked as failed if the transaction is
+	rolled back (as a rollback observer, which are cleared on commit)"""
+	def __init__(self):
+		self.results = []
+
+	def watch(self):
+		if self not in frappe.local.rollback_observers:
+			# committed (or already rolled back) since it was added
+			self.results = []
+			frappe.local.rollback_observers.append(self)
+
+	def on_rollback(self):
+		for result in self.results:
+			result.clear()
+			result.update({"error": _("Rolled back because of a document that failed"),
+				"exc_type": "TransactionRollback"})
+
+		self.results = []
+
+def write_doc(doctype, method, doc, key=None):
+	"""Write one document of a bulk request and return its name"""
+	if method == "DELETE":
+		name = doc if isinstance(doc, string_types) else get_name_for_write(doctype, doc, key)
+		if not name:
+			raise frappe.DoesNotExistError(_("{0} not found").format(doctype))
+
+		frappe.delete_doc(doctype, name, ignore_missing=False)
+		return name
+
+	doc = dict(doc)
+	for fieldname in ("flags", "doctype"):
+		doc.pop(fieldname, None)
+
+	name = get_name_for_write(doctype, doc, key) if (method == "PUT" or key) else None
+
+	if name:
+		# Not checking permissions here because it's checked in doc.save
+		existing = frappe.get_doc(doctype, name)
+		existing.update(doc)
+		return existing.save().name
+
+	elif method == "PUT":
+		raise frappe.DoesNotExistError(_("{0} not found").format(doctype))
+
+	doc["doctype"] = doctype
+	return frappe.get_doc(doc).insert().name
+
+def get_name_for_write(doctype, doc, key=None):
+	if not key:
+		return doc.get("name")
+
+	from frappe.model import default_fields
+
+	meta = frappe.get_meta(doctype)
+	filters = {}
+	for fieldname in key:
+		if not (fieldname in default_fields or meta.has_field(fieldname)):
+			frappe.throw(_("Key {0} is not a field of {1}").format(fieldname, doctype))
+
+		# values are compared as they are, lists are not filter operators
+		value = doc.get(fieldname)
+		filters[fieldname] = ("=", json.dumps(value) if isinstance(value, (list, dict)) else value)
+
+	return frappe.db.get_value(doctype, filters)
+
 def validate_oauth():
 	from frappe.oauth import get_url_delimiter
 	form_dict = frappe.local.form_dict
@@ -171,13 +329,62 @@ def validate_auth_via_api_keys():
 		raise e
 
 def validate_api_key_secret(api_key, api_secret):
-	user = frappe.db.get_value(
-		doctype="User",
-		filters={"api_key": api_key},
-		fieldname=['name']
-	)
 	form_dict = frappe.local.form_dict
-	user_secret = frappe.utils.password.get_decrypted_password ("User", user, fieldname='api_secret')
-	if api_secret == user_secret:
+
+	# verified key and secret pairs are cached, to skip reading and decrypting the secret
+	user = get_cached_api_key_user(api_key, api_secret)
+	if not user:
+		user = frappe.db.get_value(
+			doctype="User",
+			filters={"api_key": api_key},
+			fieldname=['name']
+		)
+		user_secret = frappe.utils.password.get_decrypted_password ("User", user, fieldname='api_secret')
+		if api_secret == user_secret:
+			cache_api_key_user(api_key, api_secret, user)
+		else:
+			user = None
+
+	if user:
 		frappe.set_user(user)
 		frappe.local.form_dict = form_dict
+
+def get_cached_api_key_user(api_key, api_secret):
+	cached = frappe.cache().get_value(get_api_key_cache_key(api_key))
+	if cached and hmac.compare_digest(cached["secret_hash"],
+		get_api_secret_hash(api_secret, cached["salt"])):
+		return cached["user"]
+
+def cache_api_key_user(api_key, api_secret, user):
+	"""Cache the user of `api_key` with a salted hash of the verified secret, for
+	`api_key_cache_ttl` seconds (site config, default 300)"""
+	salt = frappe.generate_hash(length=16)
+	frappe.cache().set_value(get_api_key_cache_key(api_key), {
+		"user": user,
+		"salt": salt,
+		"secret_hash": get_api_secret_hash(api_secret, salt)
+	}, expires_in_sec=cint(frappe.conf.get("api_key_cache_ttl")) or 300)
+
+def clear_api_key_cache(api_key):
+	"""Called when the secret of `api_key` is changed or its user is disabled or deleted.
+
+	The cache is cleared again after commit (`clear_api_key_cache_after_commit`), as a concurrent
+	request can cache the old secret until the change is committed"""
+	if api_key:
+		frappe.cache().delete_value(get_api_key_cache_key(api_key))
+
+		if frappe.flags.api_keys_to_clear is None:
+			frappe.flags.api_keys_to_clear = set()
+		frappe.flags.api_keys_to_clear.add(api_key)
+
+def clear_api_key_cache_after_commit():
+	if frappe.flags.api_keys_to_clear:
+		frappe.cache().delete_value([get_api_key_cache_key(api_key)
+			for api_key in frappe.flags.api_keys_to_clear])
+		frappe.flags.api_keys_to_clear = None
+
+def get_api_key_cache_key(api_key):
+	return "api_key_auth:{0}".format(api_key)
+
+def get_api_secret_hash(api_secret, salt):
+	return hashlib.sha256(frappe.safe_encode(salt + api_secret)).hexdigest()
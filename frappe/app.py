@@ -51,6 +51,10 @@ def application(request):
 
 		init_request(request)
 
+		if frappe.local.conf.batch_cache_writes:
+			# send cache writes of the request in one round trip at the end
+			frappe.cache().start_batch()
+
 		frappe.recorder.record()
 
 		if frappe.local.form_dict.cmd:
@@ -93,6 +97,9 @@ def application(request):
 
 		frappe.recorder.dump()
 
+		if getattr(frappe.local, "cache_batch", None):
+			frappe.cache().flush_batch()
+
 		frappe.destroy()
 
 	return response
@@ -287,9 +287,9 @@ def get_next_date(dt, mcount, day=None):
 #called through hooks
 def make_auto_repeat_entry():
 	enqueued_method = 'frappe.automation.doctype.auto_repeat.auto_repeat.create_repeated_entries'
-	jobs = get_jobs()
+	jobs = get_jobs(site=frappe.local.site)
 
-	if not jobs or enqueued_method not in jobs[frappe.local.site]:
+	if enqueued_method not in jobs[frappe.local.site]:
 		date = getdate(today())
 		data = get_auto_repeat_entries(date)
 		frappe.enqueue(enqueued_method, data=data)
@@ -3,12 +3,16 @@
 
 from __future__ import unicode_literals
 
-from six import iteritems, text_type
+from six import iteritems, text_type, string_types
 
 """
 bootstrap client session
 """
 
+import copy
+import hashlib
+import json
+
 import frappe
 import frappe.defaults
 import frappe.desk.desk_page
@@ -20,10 +24,150 @@ from frappe.social.doctype.energy_point_settings.energy_point_settings import is
 from frappe.social.doctype.energy_point_log.energy_point_log import get_energy_points
 from frappe.social.doctype.post.post import frequently_visited_links
 
+boot_segments = ("site", "roles", "user")
+
+# segments shared by users, that the desk keeps in the browser between page loads
+shared_boot_segments = ("site", "roles")
+
 def get_bootinfo():
 	"""build and return boot info"""
+	return merge_boot_segments(get_boot_segments())
+
+def get_boot_segments():
+	"""Return boot info split into site-wide, role-set-wide and per-user segments.
+
+	Each segment is cached separately with its own invalidation and carries
+	a content `hash`, so that clients can skip segments they already have."""
 	frappe.set_user_lang(frappe.session.user)
+	segments = frappe._dict()
+	segments.site = get_cached_segment("bootinfo_site", None, build_site_bootinfo)
+	segments.roles = get_cached_segment("bootinfo_roles", get_roles_key(), build_roles_bootinfo)
+	segments.user = get_cached_segment("bootinfo", frappe.session.user,
+		lambda: build_user_bootinfo([segments.site, segments.roles]))
+
+	return segments
+
+def merge_boot_segments(segments):
 	bootinfo = frappe._dict()
+	for name in boot_segments:
+		bootinfo.update(segments[name].data)
+
+	bootinfo.boot_hashes = {name: segments[name].hash for name in boot_segments}
+	return bootinfo
+
+def omit_unchanged_segments(bootinfo, segments, hashes=None):
+	"""Remove values of the shared segments that the client already holds, by hash.
+
+	Removed keys are listed per segment in `omitted_keys`, for the client to restore them.
+	Keys of the shared segments that are sent are listed in `segment_keys`, for the client to store them.
+	Values overridden by a later segment or by `sessions.get` are neither removed nor stored"""
+	hashes = hashes or {}
+	bootinfo.omitted_keys = {}
+	bootinfo.segment_keys = {}
+
+	for name in shared_boot_segments:
+		keys = [key for key, value in iteritems(segments[name].data)
+			if key in bootinfo and bootinfo[key] == value]
+
+		if hashes.get(name) == segments[name].hash:
+			bootinfo.omitted_keys[name] = keys
+			for key in keys:
+				del bootinfo[key]
+		else:
+			bootinfo.segment_keys[name] = keys
+
+@frappe.whitelist()
+def get_changed_boot_segments(hashes=None):
+	"""Return only the boot segments whose hash differs from the ones held by the client.
+
+	:param hashes: dict of segment name to hash, as received in `boot_hashes`"""
+	if isinstance(hashes, string_types):
+		hashes = json.loads(hashes)
+	hashes = hashes or {}
+
+	segments = get_boot_segments()
+	out = {}
+	for name in boot_segments:
+		segment = segments[name]
+		if hashes.get(name) == segment.hash:
+			out[name] = {"hash": segment.hash}
+		else:
+			out[name] = {"hash": segment.hash, "data": segment.data}
+
+	return out
+
+def get_cached_segment(key, name, build):
+	use_cache = not frappe.conf.disable_session_cache
+	cache = frappe.cache()
+
+	segment = None
+	if use_cache:
+		segment = cache.hget(key, name) if name else cache.get_value(key)
+
+	if segment:
+		segment.from_cache = 1
+	else:
+		data = build()
+		segment = frappe._dict(data=data, hash=get_segment_hash(data))
+		if use_cache:
+			if name:
+				cache.hset(key, name, segment)
+			else:
+				cache.set_value(key, segment)
+
+	return segment
+
+def get_segment_hash(data):
+	return hashlib.sha1(frappe.safe_encode(frappe.as_json(data))).hexdigest()
+
+def get_roles_key():
+	"""key for the role-set segment, shared by all users with the same roles"""
+	return hashlib.sha1(frappe.safe_encode("\n".join(sorted(frappe.get_roles())))).hexdigest()
+
+def build_site_bootinfo():
+	"""boot info that is the same for every user of the site"""
+	bootinfo = frappe._dict()
+	bootinfo.sitename = frappe.local.site
+	bootinfo.letter_heads = get_letter_heads()
+	bootinfo.active_domains = frappe.get_active_domains()
+	bootinfo.all_domains = [d.get("name") for d in frappe.get_all("Domain")]
+	bootinfo.module_app = frappe.local.module_app
+	bootinfo.single_types = [d.name for d in frappe.get_all('DocType', {'issingle': 1})]
+	bootinfo.nested_set_doctypes = [d.parent for d in frappe.get_all('DocField', {'fieldname': 'lft'}, ['parent'])]
+	bootinfo.versions = {k: v['version'] for k, v in get_versions().items()}
+	bootinfo.error_report_email = frappe.conf.error_report_email
+	bootinfo.calendars = sorted(frappe.get_hooks("calendars"))
+	bootinfo.treeviews = frappe.get_hooks("treeviews") or []
+	bootinfo.gsuite_enabled = get_gsuite_status()
+	bootinfo.success_action = get_success_action()
+	bootinfo.energy_points_enabled = is_energy_point_enabled()
+
+	return bootinfo
+
+def clear_site_bootinfo(doc=None, method=None):
+	"""Called on change of the documents held by the site segment (letter heads, success
+	actions and settings), so that it is built again"""
+	frappe.cache().delete_value("bootinfo_site")
+
+def build_roles_bootinfo():
+	"""boot info that is the same for every user with the same set of roles"""
+	bootinfo = frappe._dict()
+	bootinfo.page_info = get_allowed_pages()
+
+	return bootinfo
+
+def build_user_bootinfo(shared_segments):
+	"""boot info for the session user, built over the shared segments so that
+	`boot_session` hooks see the full boot info"""
+	from frappe.desk.notifications import get_notification_info_for_boot
+
+	shared = frappe._dict()
+	for segment in shared_segments:
+		shared.update(segment.data)
+
+	# `boot_session` hooks may change values in place, which must not reach the cached shared segments
+	bootinfo = copy.deepcopy(shared)
+
 	hooks = frappe.get_hooks()
 	doclist = []
 
@@ -31,8 +175,8 @@ def get_bootinfo():
 	get_user(bootinfo)
 
 	# system info
-	bootinfo.sitename = frappe.local.site
 	bootinfo.sysdefaults = frappe.defaults.get_defaults()
+	load_conf_settings(bootinfo)
 	bootinfo.server_date = frappe.utils.nowdate()
 
 	if frappe.session['user'] != 'Guest':
@@ -42,18 +186,10 @@ def get_bootinfo():
 	bootinfo.modules = {}
 	bootinfo.module_list = []
 	load_desktop_icons(bootinfo)
-	bootinfo.letter_heads = get_letter_heads()
-	bootinfo.active_domains = frappe.get_active_domains()
-	bootinfo.all_domains = [d.get("name") for d in frappe.get_all("Domain")]
 
-	bootinfo.module_app = frappe.local.module_app
-	bootinfo.single_types = [d.name for d in frappe.get_all('DocType', {'issingle': 1})]
-	bootinfo.nested_set_doctypes = [d.parent for d in frappe.get_all('DocField', {'fieldname': 'lft'}, ['parent'])]
 	add_home_page(bootinfo, doclist)
-	bootinfo.page_info = get_allowed_pages()
 	load_translations(bootinfo)
 	add_timezone_info(bootinfo)
-	load_conf_settings(bootinfo)
 	load_print(bootinfo, doclist)
 	doclist.extend(get_meta_bundle("Page"))
 	bootinfo.home_folder = frappe.db.get_value("File", {"is_home_folder": 1})
@@ -70,20 +206,16 @@ def get_bootinfo():
 
 	if bootinfo.lang:
 		bootinfo.lang = text_type(bootinfo.lang)
-	bootinfo.versions = {k: v['version'] for k, v in get_versions().items()}
 
-	bootinfo.error_report_email = frappe.conf.error_report_email
-	bootinfo.calendars = sorted(frappe.get_hooks("calendars"))
-	bootinfo.treeviews = frappe.get_hooks("treeviews") or []
 	bootinfo.lang_dict = get_lang_dict()
-	bootinfo.gsuite_enabled = get_gsuite_status()
-	bootinfo.success_action = get_success_action()
 	bootinfo.update(get_email_accounts(user=frappe.session.user))
-	bootinfo.energy_points_enabled = is_energy_point_enabled()
 	bootinfo.points = get_energy_points(frappe.session.user)
 	bootinfo.frequently_visited_links = frequently_visited_links()
+	bootinfo.notification_info = get_notification_info_for_boot()
 
-	return bootinfo
+	# keep only what is not already held (unchanged) by a shared segment
+	return frappe._dict({key: value for key, value in iteritems(bootinfo)
+		if not (key in shared and shared[key] == value)})
 
 def get_letter_heads():
 	letter_heads = {}
@@ -13,7 +13,8 @@ common_default_keys = ["__default", "__global"]
 global_cache_keys = ("app_hooks", "installed_apps",
 		"app_modules", "module_app", "notification_config", 'system_settings',
 		'scheduler_events', 'time_zone', 'webhooks', 'active_domains',
-		'active_modules', 'assignment_rule')
+		'active_modules', 'assignment_rule', 'bootinfo_site', 'bootinfo_roles',
+		'report_source_doctypes')
 
 user_cache_keys = ("bootinfo", "user_recent", "roles", "user_doc", "lang",
 		"defaults", "user_permissions", "home_page", "linked_with",
@@ -66,7 +67,7 @@ def clear_doctype_cache(doctype=None):
 	if getattr(frappe.local, 'meta_cache') and (doctype in frappe.local.meta_cache):
 		del frappe.local.meta_cache[doctype]
 
-	for key in ('is_table', 'doctype_modules'):
+	for key in ('is_table', 'doctype_modules', 'bootinfo_site'):
 		cache.delete_value(key)
 
 	def clear_single(dt):
@@ -93,6 +94,10 @@ def clear_doctype_cache(doctype=None):
 	# Clear all document's cache. To clear documents of a specific DocType document_cache should be restructured
 	clear_document_cache()
 
+def clear_role_bootinfo():
+	'''Clear the boot info shared by users of a role set (allowed pages and reports)'''
+	frappe.cache().delete_value('bootinfo_roles')
+
 def get_doctype_map(doctype, name, filters, order_by=None):
 	cache = frappe.cache()
 	cache_key = frappe.scrub(doctype) + '_map'
@@ -19,7 +19,7 @@ Requests via FrappeClient are also handled here.
 
 @frappe.whitelist()
 def get_list(doctype, fields=None, filters=None, order_by=None,
-	limit_start=None, limit_page_length=20, parent=None):
+	limit_start=None, limit_page_length=20, parent=None, cursor=None):
 	'''Returns a list of records by filters, fields, ordering and limit
 
 	:param doctype: DocType of the data to be queried
@@ -27,10 +27,18 @@ def get_list(doctype, fields=None, filters=None, order_by=None,
 	:param filters: filter list by this dict
 	:param order_by: Order by this fieldname
 	:param limit_start: Start at this index
-	:param limit_page_length: Number of records to be returned (default 20)'''
+	:param limit_page_length: Number of records to be returned (default 20)
+	:param cursor: Page after this cursor, `""` for the first page. The cursor of the next page
+		is set as `next_cursor` in the response'''
 	if frappe.is_table(doctype):
 		check_parent_permission(parent, doctype)
 
+	if cursor is not None:
+		from frappe.model.db_query import get_list_with_cursor
+		data, frappe.response["next_cursor"] = get_list_with_cursor(doctype, fields=fields,
+			filters=filters, order_by=order_by, limit_page_length=limit_page_length, cursor=cursor)
+		return data
+
 	return frappe.get_list(doctype, fields=fields, filters=filters, order_by=order_by,
 		limit_start=limit_start, limit_page_length=limit_page_length, ignore_permissions=False)
 
@@ -99,7 +99,7 @@ def _new_site(db_name, site, mariadb_root_username=None, mariadb_root_password=N
 @pass_context
 def restore(context, sql_file_path, mariadb_root_username=None, mariadb_root_password=None, db_name=None, verbose=None, install_app=None, admin_password=None, force=None, with_public_files=None, with_private_files=None):
 	"Restore site database from an sql file"
-	from frappe.installer import extract_sql_gzip, extract_tar_files
+	from frappe.installer import extract_sql_gzip, extract_files_backup
 	# Extract the gzip file if user has passed *.sql.gz file instead of *.sql file
 
 	if not os.path.exists(sql_file_path):
@@ -120,12 +120,10 @@ def restore(context, sql_file_path, mariadb_root_username=None, mariadb_root_pas
 
 	# Extract public and/or private files to the restored site, if user has given the path
 	if with_public_files:
-		public = extract_tar_files(site, with_public_files, 'public')
-		os.remove(public)
+		extract_files_backup(site, with_public_files, 'public')
 
 	if with_private_files:
-		private = extract_tar_files(site, with_private_files, 'private')
-		os.remove(private)
+		extract_files_backup(site, with_private_files, 'private')
 
 @click.command('reinstall')
 @click.option('--admin-password', help='Administrator Password for reinstalled site')
@@ -303,16 +301,24 @@ def use(site, sites_path='.'):
 
 @click.command('backup')
 @click.option('--with-files', default=False, is_flag=True, help="Take backup with files")
+@click.option('--include', help="Comma separated tables to back up, e.g. \"tabUser,tabRole\"")
+@click.option('--exclude', help="Comma separated tables not to back up")
+@click.option('--jobs', type=int, help="Number of tables to dump in parallel")
+@click.option('--incremental', default=False, is_flag=True, help="Back up only files added or changed since the last backup")
 @pass_context
 def backup(context, with_files=False, backup_path_db=None, backup_path_files=None,
-	backup_path_private_files=None, quiet=False):
+	backup_path_private_files=None, quiet=False, include=None, exclude=None, jobs=None, incremental=False):
 	"Backup"
 	from frappe.utils.backups import scheduled_backup
 	verbose = context.verbose
+	include_tables = [t.strip() for t in include.split(',')] if include else None
+	exclude_tables = [t.strip() for t in exclude.split(',')] if exclude else None
 	for site in context.sites:
 		frappe.init(site=site)
 		frappe.connect()
-		odb = scheduled_backup(ignore_files=not with_files, backup_path_db=backup_path_db, backup_path_files=backup_path_files, backup_path_private_files=backup_path_private_files, force=True)
+		odb = scheduled_backup(ignore_files=not with_files, backup_path_db=backup_path_db, backup_path_files=backup_path_files, backup_path_private_files=backup_path_private_files, force=True,
+			include_tables=include_tables, exclude_tables=exclude_tables, jobs=jobs,
+			incremental_files=incremental)
 		if verbose:
 			from frappe.utils import now
 			print("database backup taken -", odb.backup_path_db, "- on", now())
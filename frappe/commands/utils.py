@@ -26,6 +26,9 @@ def build(app=None, make_copy=False, restore = False, verbose=False):
 	no_compress = frappe.local.conf.developer_mode or False
 	frappe.build.bundle(no_compress, app=app, make_copy=make_copy, restore = restore, verbose=verbose)
 
+	import frappe.translate
+	frappe.translate.build_catalogs()
+
 @click.command('watch')
 def watch():
 	"Watch and concatenate JS and CSS files as and when they change"
@@ -112,6 +115,20 @@ def reset_perms(context):
 		finally:
 			frappe.destroy()
 
+@click.command('show-schema-changes')
+@click.option('--doctype', multiple=True, help='Only for these DocTypes')
+@pass_context
+def show_schema_changes(context, doctype=None):
+	"Print the ALTER TABLE statements (with estimated cost) that would bring tables in sync with their DocTypes"
+	for site in context.sites:
+		try:
+			frappe.init(site=site)
+			frappe.connect()
+			for d in doctype or frappe.db.sql_list("select name from `tabDocType` where issingle=0"):
+				frappe.db.updatedb(d, dry_run=True)
+		finally:
+			frappe.destroy()
+
 @click.command('execute')
 @click.argument('method')
 @click.option('--args')
@@ -653,6 +670,26 @@ def rebuild_global_search(context, static_pages=False):
 		finally:
 			frappe.destroy()
 
+@click.command('rebuild-link-search-index')
+@click.option('--doctype', help='DocType to rebuild, default is all doctypes in link_search_doctypes')
+@pass_context
+def rebuild_link_search_index(context, doctype=None):
+	"""Build the prefix index used by Link field search"""
+	from frappe.utils.link_search import get_link_search_doctypes, rebuild_for_doctype
+
+	for site in context.sites:
+		try:
+			frappe.init(site=site)
+			frappe.connect()
+
+			doctypes = [doctype] if doctype else sorted(get_link_search_doctypes())
+			for i, d in enumerate(doctypes):
+				rebuild_for_doctype(d)
+				update_progress_bar('Rebuilding Link Search Index', i, len(doctypes))
+
+		finally:
+			frappe.destroy()
+
 @click.command('auto-deploy')
 @click.argument('app')
 @click.option('--migrate', is_flag=True, default=False, help='Migrate after pulling')
@@ -728,10 +765,12 @@ commands = [
 	serve,
 	set_config,
 	show_config,
+	show_schema_changes,
 	watch,
 	_bulk_rename,
 	add_to_email_queue,
 	setup_global_help,
 	setup_help,
-	rebuild_global_search
+	rebuild_global_search,
+	rebuild_link_search_index
 ]
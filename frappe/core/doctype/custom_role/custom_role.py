@@ -5,12 +5,19 @@
 from __future__ import unicode_literals
 import frappe
 from frappe.model.document import Document
+from frappe.cache_manager import clear_role_bootinfo
 
 class CustomRole(Document):
 	def validate(self):
 		if self.report and not self.ref_doctype:
 			self.ref_doctype = frappe.db.get_value('Report', self.report, 'ref_doctype')
 
+	def on_update(self):
+		clear_role_bootinfo()
+
+	def on_trash(self):
+		clear_role_bootinfo()
+
 def get_custom_allowed_roles(field, name):
 	allowed_roles = []
 	custom_role = frappe.db.get_value('Custom Role', {field: name}, 'name')
@@ -15,8 +15,8 @@ from frappe import _
 from frappe.utils.csvutils import getlink
 from frappe.utils.dateutils import parse_date
 
-from frappe.utils import cint, cstr, flt, getdate, get_datetime, get_url, get_absolute_url
-from six import text_type, string_types
+from frappe.utils import cint, cstr, flt, getdate, get_datetime, get_url, get_absolute_url, now
+from six import text_type, string_types, iteritems
 
 
 @frappe.whitelist()
@@ -34,8 +34,12 @@ def get_data_keys():
 @frappe.whitelist()
 def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False, no_email=True, overwrite=None,
 	update_only = None, ignore_links=False, pre_process=None, via_console=False, from_data_import="No",
-	skip_errors = True, data_import_doc=None, validate_template=False, user=None):
-	"""upload data"""
+	skip_errors = True, data_import_doc=None, validate_template=False, user=None, bulk_insert=None):
+	"""upload data
+
+	:param bulk_insert: insert new documents in batches without running `Document.insert`
+		(controller methods and document hooks), if the doctype permits it, see `can_bulk_insert`.
+		Defaults to the `data_import_bulk_insert` site config."""
 
 	# for translations
 	if user:
@@ -132,7 +136,7 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 		if doctypes:
 			doc = {}
 			attachments = []
-			last_error_row_idx = None
+			last_error_row_idx = row_idx + 1
 			for idx in range(start_idx, len(rows)):
 				last_error_row_idx = idx	# pylint: disable=W0612
 				if (not doc) or main_doc_empty(rows[idx]):
@@ -209,7 +213,10 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 					return False
 		return True
 
-	def validate_naming(doc):
+	def get_naming_field():
+		"""fieldname that must be set in each row to name the document, if any"""
+		from frappe.model.base_document import get_controller
+
 		autoname = frappe.get_meta(doctype).autoname
 		if autoname:
 			if autoname[0:5] == 'field':
@@ -217,15 +224,17 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 			elif autoname == 'naming_series:':
 				autoname = 'naming_series'
 			else:
-				return True
+				return None
+
+			if not hasattr(get_controller(doctype), "autoname"):
+				return autoname
 
-			if (autoname not in doc) or (not doc[autoname]):
-				from frappe.model.base_document import get_controller
-				if not hasattr(get_controller(doctype), "autoname"):
-					frappe.throw(_("{0} is a mandatory field".format(autoname)))
+	def validate_naming(doc):
+		if naming_field and not doc.get(naming_field):
+			frappe.throw(_("{0} is a mandatory field".format(naming_field)))
 		return True
 
-	users = frappe.db.sql_list("select name from tabUser")
+	users = set(frappe.db.sql_list("select name from tabUser"))
 	def prepare_for_insert(doc):
 		# don't block data import if user is not set
 		# migrating from another system
@@ -307,7 +316,7 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 	column_idx_to_fieldtype = {}
 
 	if skip_errors:
-		data_rows_with_error = header
+		data_rows_with_error = list(header)
 
 	if submit_after_import and not cint(frappe.db.get_value("DocType",
 			doctype, "is_submittable")):
@@ -357,12 +366,97 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 		else:
 			return getlink(doctype, name)
 
-	# publish realtime task update
+	# publish realtime task update, only when the percentage changes
+	last_progress = []
 	def publish_progress(achieved, reload=False):
 		if data_import_doc:
-			frappe.publish_realtime("data_import_progress", {"progress": str(int(100.0*achieved/total)),
+			progress = str(int(100.0*achieved/total))
+			if not reload and last_progress and last_progress[-1] == progress:
+				return
+
+			last_progress.append(progress)
+			frappe.publish_realtime("data_import_progress", {"progress": progress,
 				"data_import": data_import_doc.name, "reload": reload}, user=frappe.session.user)
 
+	def log_error(row_idx, row, e, last_error_row_idx):
+		# build error message
+		if frappe.local.message_log:
+			err_msg = "\n".join(['<p class="border-bottom small">{}</p>'.format(json.loads(msg).get('message')) for msg in frappe.local.message_log])
+		else:
+			err_msg = '<p class="border-bottom small">{}</p>'.format(cstr(e))
+
+		error_trace = frappe.get_traceback()
+		if error_trace:
+			error_log_doc = frappe.log_error(error_trace)
+			error_link = get_absolute_url("Error Log", error_log_doc.name)
+		else:
+			error_link = None
+
+		log(**{
+			"row": row_idx + 1,
+			"title": 'Error for row %s' % (len(row)>1 and frappe.safe_decode(row[1]) or ""),
+			"message": err_msg,
+			"indicator": "red",
+			"link":error_link
+		})
+
+		# data with error to create a new file
+		# include the errored data in the last row as last_error_row_idx will not be updated for the last row
+		if skip_errors:
+			if last_error_row_idx == len(rows)-1:
+				last_error_row_idx = len(rows)
+			data_rows_with_error.extend(rows[row_idx:last_error_row_idx])
+
+	def insert_pending_docs():
+		"""insert the documents collected for a batch in one statement, or one by one
+		if that fails so that errors are logged against their rows. Returns False on errors"""
+		failed = set()
+		# a failed statement aborts the transaction in Postgres, roll back to before it
+		frappe.db.savepoint("data_import_batch")
+		try:
+			bulk_insert_docs(doctype, [d[0] for d in pending_docs])
+		except Exception:
+			frappe.db.rollback(save_point="data_import_batch")
+			frappe.local.message_log = []
+			for doc, row_idx, row, last_error_row_idx in pending_docs:
+				frappe.db.savepoint("data_import_row")
+				try:
+					doc.db_insert()
+				except Exception as e:
+					frappe.db.rollback(save_point="data_import_row")
+					failed.add(row_idx)
+					log_error(row_idx, row, e, last_error_row_idx)
+				finally:
+					frappe.local.message_log = []
+
+		for doc, row_idx, row, last_error_row_idx in pending_docs:
+			if row_idx in failed:
+				continue
+
+			frappe.db.savepoint("data_import_row")
+			try:
+				run_after_insert_hooks(doc)
+			except Exception as e:
+				# undo the document along with the changes of its hooks
+				frappe.db.rollback(save_point="data_import_row")
+				frappe.db.sql("delete from `tab{0}` where name=%s".format(doctype), doc.name)
+				failed.add(row_idx)
+				log_error(row_idx, row, e, last_error_row_idx)
+			else:
+				log(**{"row": row_idx + 1, "title":'Inserted row for "%s"' % (as_link(doc.doctype, doc.name)),
+					"message": "Document successfully saved", "link": get_absolute_url(doc.doctype, doc.name), "indicator": "green"})
+
+		del pending_docs[:]
+		return not failed
+
+	naming_field = get_naming_field()
+
+	if bulk_insert is None:
+		bulk_insert = frappe.conf.data_import_bulk_insert
+	bulk_insert = (bulk_insert and not (overwrite or update_only or parentfield or submit_after_import)
+		and can_bulk_insert(doctype))
+	pending_docs = []
+
 
 	error_flag = rollback_flag = False
 
@@ -371,6 +465,9 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 	for batch_start in range(0, total, batch_size):
 		batch = data[batch_start:batch_start + batch_size]
 
+		# resolve link values of the batch in one query per linked doctype
+		cache_link_values(batch, column_idx_to_fieldname)
+
 		for i, row in enumerate(batch):
 			# bypass empty rows
 			if main_doc_empty(row):
@@ -378,8 +475,9 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 
 			row_idx = i + start_row
 			doc = None
+			last_error_row_idx = row_idx + 1
 
-			publish_progress(i)
+			publish_progress(batch_start + i)
 
 			try:
 				doc, attachments, last_error_row_idx = get_doc(row_idx)
@@ -387,6 +485,14 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 				if pre_process:
 					pre_process(doc)
 
+				if bulk_insert and not attachments:
+					doc = frappe.get_doc(doc)
+					prepare_for_insert(doc)
+					doc.flags.ignore_links = ignore_links
+					prepare_for_bulk_insert(doc)
+					pending_docs.append((doc, row_idx, row, last_error_row_idx))
+					continue
+
 				original = None
 				if parentfield:
 					parent = frappe.get_doc(parenttype, doc["parent"])
@@ -434,39 +540,17 @@ def upload(rows = None, submit_after_import=None, ignore_encoding_errors=False,
 
 			except Exception as e:
 				error_flag = True
-
-				# build error message
-				if frappe.local.message_log:
-					err_msg = "\n".join(['<p class="border-bottom small">{}</p>'.format(json.loads(msg).get('message')) for msg in frappe.local.message_log])
-				else:
-					err_msg = '<p class="border-bottom small">{}</p>'.format(cstr(e))
-
-				error_trace = frappe.get_traceback()
-				if error_trace:
-					error_log_doc = frappe.log_error(error_trace)
-					error_link = get_absolute_url("Error Log", error_log_doc.name)
-				else:
-					error_link = None
-
-				log(**{
-					"row": row_idx + 1,
-					"title": 'Error for row %s' % (len(row)>1 and frappe.safe_decode(row[1]) or ""),
-					"message": err_msg,
-					"indicator": "red",
-					"link":error_link
-				})
-
-				# data with error to create a new file
-				# include the errored data in the last row as last_error_row_idx will not be updated for the last row
-				if skip_errors:
-					if last_error_row_idx == len(rows)-1:
-						last_error_row_idx = len(rows)
-					data_rows_with_error += rows[row_idx:last_error_row_idx]
-				else:
+				log_error(row_idx, row, e, last_error_row_idx)
+				if not skip_errors:
 					rollback_flag = True
 			finally:
 				frappe.local.message_log = []
 
+		if pending_docs and not insert_pending_docs():
+			error_flag = True
+			if not skip_errors:
+				rollback_flag = True
+
 		start_row += batch_size
 		if rollback_flag:
 			frappe.db.rollback()
@@ -539,3 +623,115 @@ def delete_child_rows(rows, doctype):
 	for p in list(set([r[1] for r in rows])):
 		if p:
 			frappe.db.sql("""delete from `tab{0}` where parent=%s""".format(doctype), p)
+
+def cache_link_values(rows, column_idx_to_fieldname):
+	"""Check the Link values in `rows` with one query per linked doctype and keep the
+	existing ones in `frappe.db.value_cache`, so that validating the links of each
+	document does not need a query per link"""
+	values = {}
+	for (dt, parentfield), columns in iteritems(column_idx_to_fieldname):
+		meta = frappe.get_meta(dt)
+		for column_idx, fieldname in iteritems(columns):
+			df = meta.get_field(fieldname) if fieldname else None
+			if not (df and df.fieldtype == "Link" and df.options):
+				continue
+
+			names = values.setdefault(df.options, set())
+			for row in rows:
+				if len(row) > column_idx and row[column_idx]:
+					names.add(cstr(row[column_idx]))
+
+	for link_doctype, names in iteritems(values):
+		if not names or frappe.get_meta(link_doctype).issingle:
+			continue
+
+		names = list(names)
+		existing = {}
+		for start in range(0, len(names), 1000):
+			chunk = names[start:start + 1000]
+			for name in frappe.db.sql_list("""select name from `tab{0}` where name in ({1})""".format(
+				link_doctype, ", ".join(["%s"] * len(chunk))), chunk):
+				# names are case insensitive in the database
+				existing[cstr(name).lower()] = name
+
+		for name in names:
+			if name.lower() in existing:
+				# in the shape of `get_values`, read by `get_value(link_doctype, name, "name", cache=True)`
+				frappe.db.value_cache[(link_doctype, name, 'name')] = [(existing[name.lower()],)]
+
+def can_bulk_insert(doctype):
+	"""Returns True if new documents of `doctype` can be inserted without `Document.insert`,
+	i.e. the doctype has no child tables, controller methods, document hooks or notifications.
+	Hooks of all doctypes (`*`) are allowed if they run after insert, see `run_after_insert_hooks`"""
+	from frappe.model.base_document import get_controller
+
+	meta = frappe.get_meta(doctype)
+	if meta.issingle or meta.istable or meta.is_submittable or meta.get_table_fields():
+		return False
+
+	controller = get_controller(doctype)
+	for method in ("autoname", "before_insert", "before_validate", "validate", "before_save",
+		"after_insert", "on_update", "on_change", "db_insert"):
+		if is_overridden(controller, method):
+			return False
+
+	doc_events = frappe.get_doc_hooks()
+	if doctype in doc_events or any(method in doc_events.get("*", {})
+		for method in ("before_insert", "before_validate", "validate", "before_save")):
+		return False
+
+	if (frappe.get_all("Notification", filters={"document_type": doctype}, limit=1)
+		or frappe.get_all("Webhook", filters={"webhook_doctype": doctype}, limit=1)):
+		return False
+
+	return True
+
+def is_overridden(controller, method):
+	"""Returns True if `method` is defined by `controller` (or a base class) rather than by `Document`"""
+	from frappe.model.document import Document
+
+	for cls in controller.__mro__:
+		if cls is Document:
+			return False
+		if method in cls.__dict__:
+			return True
+
+	return False
+
+def prepare_for_bulk_insert(doc):
+	"""Check permissions, set defaults, name and timestamps and run the standard validations
+	of `Document.insert`, without controller methods and hooks"""
+	doc.set("__islocal", True)
+	doc.check_permission("create")
+	doc._set_defaults()
+	doc.modified = doc.creation = now()
+	doc.modified_by = frappe.session.user
+	if not doc.owner:
+		doc.owner = doc.modified_by
+	doc.set_docstatus()
+	doc._validate_links()
+	doc.set_new_name()
+	doc.validate_higher_perm_levels()
+	doc.set_title_field()
+	doc._validate()
+
+def run_after_insert_hooks(doc):
+	"""Run the hooks of all doctypes (`*`) that `Document.insert` runs after the document is
+	written (e.g. assignment rules, energy points, cache invalidation). The controller of a
+	bulk inserted doctype has none of these methods, see `can_bulk_insert`"""
+	for method in ("after_insert", "on_update", "on_change"):
+		doc.run_method(method)
+
+def bulk_insert_docs(doctype, docs):
+	"""Insert `docs` (prepared by `prepare_for_bulk_insert`) with one INSERT statement"""
+	if not docs:
+		return
+
+	values = [doc.get_valid_dict(convert_dates_to_str=True) for doc in docs]
+	columns = list(values[0])
+
+	frappe.db.sql("""INSERT INTO `tab{doctype}` ({columns}) VALUES {values}""".format(
+		doctype = doctype,
+		columns = ", ".join(["`"+c+"`" for c in columns]),
+		values = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(values))
+	), [d.get(c) for d in values for c in columns])
@@ -97,4 +97,40 @@ class TestDataImport(unittest.TestCase):
 		content = read_xlsx_file_from_attached_file(fcontent=frappe.response.filecontent)
 		content.append(["", "_test", "Private", "05-11-2017 13:51:48", "Event", "0", "0", "", "1", "", "", 0, 0, 0, 0, 0, 0, 0, "blue"])
 		importer.upload(content)
-		self.assertTrue(frappe.db.get_value("Event", {"subject": "_test"}, "name"))
\ No newline at end of file
+		self.assertTrue(frappe.db.get_value("Event", {"subject": "_test"}, "name"))
+
+	def test_cached_link_values(self):
+		frappe.db.value_cache = {}
+		importer.cache_link_values([["System Manager"], ["_Test Missing Role"]], {("ToDo", None): {0: "role"}})
+
+		self.assertEqual(frappe.db.get_value("Role", "System Manager", "name", cache=True), "System Manager")
+		self.assertFalse(("Role", "_Test Missing Role", "name") in frappe.db.value_cache)
+
+	def test_bulk_insert(self):
+		for gender in ("_Test Bulk Gender 1", "_Test Bulk Gender 2"):
+			if frappe.db.exists("Gender", gender):
+				frappe.delete_doc("Gender", gender)
+
+		self.assertTrue(importer.can_bulk_insert("Gender"))
+		self.assertFalse(importer.can_bulk_insert("Event"))
+
+		exporter.export_data("Gender", all_doctypes=True, template=True)
+		content = read_csv_content(frappe.response.result)
+		content.append(["", "", "_Test Bulk Gender 1"])
+		content.append(["", "", "_Test Bulk Gender 2"])
+		# duplicate, must be logged against its own row
+		content.append(["", "", "_Test Bulk Gender 2"])
+
+		log = importer.upload(content, bulk_insert=True)
+		self.assertTrue(log["error"])
+		self.assertEqual(len([m for m in log["messages"] if m["indicator"] == "green"]), 2)
+		self.assertTrue(frappe.db.exists("Gender", "_Test Bulk Gender 1"))
+		self.assertTrue(frappe.db.exists("Gender", "_Test Bulk Gender 2"))
+
+	def test_bulk_insert_permission(self):
+		frappe.set_user("Guest")
+		try:
+			doc = frappe.get_doc({"doctype": "Gender", "gender": "_Test Bulk Gender 3"})
+			self.assertRaises(frappe.PermissionError, importer.prepare_for_bulk_insert, doc)
+		finally:
+			frappe.set_user("Administrator")
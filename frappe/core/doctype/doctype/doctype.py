@@ -255,19 +255,21 @@ class DocType(Document):
 				frappe.throw(_("Series {0} already used in {1}").format(prefix, used_in[0][0]))
 
 	def on_update(self):
-		"""Update database schema, make controller templates if `custom` is not set and clear cache."""
+		"""Update database schema, make controller templates if `custom` is not set and clear cache.
+
+		While syncing, the schema update is deferred if `frappe.flags.deferred_schema_updates` is
+		set (see `frappe.model.sync`), so that tables of all changed DocTypes are updated together."""
 		self.delete_duplicate_custom_fields()
-		try:
-			frappe.db.updatedb(self.name, self)
-		except Exception as e:
-			print("\n\nThere was an issue while migrating the DocType: {}\n".format(self.name))
-			raise e
+
+		defer_schema_update = frappe.flags.deferred_schema_updates is not None and not self.custom
+		if defer_schema_update:
+			frappe.flags.deferred_schema_updates.append(self)
+		else:
+			self.update_table()
 
 		self.change_modified_of_parent()
 		make_module_and_roles(self)
 
-		self.update_fields_to_fetch()
-
 		from frappe import conf
 		allow_doctype_export = frappe.flags.allow_doctype_export or (not frappe.flags.in_test and conf.get('developer_mode'))
 		if not self.custom and not frappe.flags.in_import and allow_doctype_export:
@@ -277,24 +279,38 @@ class DocType(Document):
 			if self.has_web_view:
 				self.set_base_class_for_controller()
 
-		# update index
-		if not self.custom:
-			self.run_module_method("on_doctype_update")
-			if self.flags.in_insert:
-				self.run_module_method("after_doctype_insert")
-
 		delete_notification_count_for(doctype=self.name)
 		frappe.clear_cache(doctype=self.name)
 
-		if not frappe.flags.in_install and hasattr(self, 'before_update'):
-			self.sync_global_search()
-
 		# clear from local cache
 		if self.name in frappe.local.meta_cache:
 			del frappe.local.meta_cache[self.name]
 
 		clear_linked_doctype_cache()
 
+		if not defer_schema_update:
+			self.after_table_update()
+
+	def update_table(self):
+		try:
+			frappe.db.updatedb(self.name, self)
+		except Exception as e:
+			print("\n\nThere was an issue while migrating the DocType: {}\n".format(self.name))
+			raise e
+
+	def after_table_update(self):
+		"""Update fetched values, indexes and global search, that depend on the columns of the table"""
+		self.update_fields_to_fetch()
+
+		# update index
+		if not self.custom:
+			self.run_module_method("on_doctype_update")
+			if self.flags.in_insert:
+				self.run_module_method("after_doctype_insert")
+
+		if not frappe.flags.in_install and hasattr(self, 'before_update'):
+			self.sync_global_search()
+
 	def delete_duplicate_custom_fields(self):
 		if not (frappe.db.table_exists(self.name) and frappe.db.table_exists("Custom Field")):
 			return
@@ -10,6 +10,7 @@ from frappe.model.utils import render_include
 from frappe import conf, _, safe_decode
 from frappe.desk.form.meta import get_code_files_via_hooks, get_js
 from frappe.core.doctype.custom_role.custom_role import get_custom_allowed_roles
+from frappe.cache_manager import clear_role_bootinfo
 from six import text_type
 
 class Page(Document):
@@ -46,6 +47,8 @@ class Page(Document):
 			Writes the .json for this page and if write_content is checked,
 			it will write out a .html file
 		"""
+		clear_role_bootinfo()
+
 		if self.flags.do_not_update_json:
 			return
 
@@ -75,6 +78,7 @@ class Page(Document):
 
 	def on_trash(self):
 		delete_custom_role('page', self.name)
+		clear_role_bootinfo()
 
 	def is_permitted(self):
 		"""Returns true if Has Role is not set or the user is allowed."""
@@ -12,6 +12,7 @@ from frappe.modules.export_file import export_to_files
 from frappe.modules import make_boilerplate
 from frappe.core.doctype.page.page import delete_custom_role
 from frappe.core.doctype.custom_role.custom_role import get_custom_allowed_roles
+from frappe.cache_manager import clear_role_bootinfo
 from frappe.desk.reportview import append_totals_row
 from six import iteritems
 
@@ -45,9 +46,13 @@ class Report(Document):
 
 	def on_update(self):
 		self.export_doc()
+		clear_role_bootinfo()
+		frappe.cache().delete_value('report_source_doctypes')
 
 	def on_trash(self):
 		delete_custom_role('report', self.name)
+		clear_role_bootinfo()
+		frappe.cache().delete_value('report_source_doctypes')
 
 	def set_doctype_roles(self):
 		if not self.get('roles') and self.is_standard == 'No':
@@ -52,6 +52,10 @@ class SystemSettings(Document):
 		frappe.cache().delete_value('time_zone')
 		frappe.local.system_settings = {}
 
+		# scheduler settings may have changed
+		from frappe.utils.scheduler import reset_next_run
+		reset_next_run()
+
 		if frappe.flags.update_last_reset_password_date:
 			update_last_reset_password_date()
 
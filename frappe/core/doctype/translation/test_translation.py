@@ -4,6 +4,7 @@
 from __future__ import unicode_literals
 
 import frappe
+import os
 import unittest
 
 from frappe import _
@@ -88,6 +89,50 @@ class TestTranslation(unittest.TestCase):
 
 		self.assertTrue(_(source), target)
 
+	def test_compiled_catalog(self):
+		from frappe.translate import get_catalog_path
+		from frappe.utils.translation_catalog import write_catalog
+
+		path = get_catalog_path('de')
+		frappe.create_folder(os.path.dirname(path))
+		existing = os.path.exists(path)
+		if existing:
+			os.rename(path, path + '.bak')
+
+		try:
+			write_catalog(path, {'Test Data': 'Testdaten', 'Test Catalog': 'Testkatalog'})
+			frappe.local.lang = 'de'
+			frappe.local.lang_full_dict = None
+			self.assertEqual(_('Test Catalog'), 'Testkatalog')
+
+			# user translations are layered over the catalog
+			create_translation('de', ['Test Data', 'Prüfdaten'])
+			self.assertEqual(_('Test Data'), 'Prüfdaten')
+			self.assertEqual(_('Test Catalog'), 'Testkatalog')
+		finally:
+			os.remove(path)
+			if existing:
+				os.rename(path + '.bak', path)
+
+	def test_replaced_catalog_is_closed(self):
+		from frappe.utils.translation_catalog import write_catalog, get_catalog
+
+		path = os.path.join(frappe.get_site_path(), '_test_translation.catalog')
+		try:
+			write_catalog(path, {'Test Data': 'Testdaten'})
+			old = get_catalog(path)
+			self.assertEqual(old.get('Test Data'), 'Testdaten')
+
+			write_catalog(path, {'Test Data': 'Prüfdaten'})
+			stat = os.stat(path)
+			os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+			self.assertEqual(get_catalog(path).get('Test Data'), 'Prüfdaten')
+			self.assertRaises(ValueError, old.get, 'Test Data')
+		finally:
+			os.remove(path)
+			self.assertEqual(get_catalog(path), None)
+
 def get_translation_data():
 	html_source_data = """<font color="#848484" face="arial, tahoma, verdana, sans-serif">
 							<span style="font-size: 11px; line-height: 16.9px;">Test Data</span></font>"""
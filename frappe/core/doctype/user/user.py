@@ -93,11 +93,23 @@ class User(Document):
 		self.share_with_self()
 		clear_notifications(user=self.name)
 		frappe.clear_cache(user=self.name)
+		self.clear_api_key_cache()
 		self.send_password_notification(self.__new_password)
 		create_contact(self, ignore_mandatory=True)
 		if self.name not in ('Administrator', 'Guest') and not self.user_image:
 			frappe.enqueue('frappe.core.doctype.user.user.update_gravatar', name=self.name)
 
+	def clear_api_key_cache(self):
+		"""Authentication by API key and secret is cached, so clear it if the secret
+		changes or the user is disabled"""
+		from frappe.api import clear_api_key_cache
+
+		clear_api_key_cache(self.api_key)
+
+		doc_before_save = self.get_doc_before_save()
+		if doc_before_save and doc_before_save.api_key != self.api_key:
+			clear_api_key_cache(doc_before_save.api_key)
+
 	def has_website_permission(self, ptype, user, verbose=False):
 		"""Returns true if current user is the session user"""
 		return self.name == frappe.session.user
@@ -305,6 +317,7 @@ class User(Document):
 
 	def on_trash(self):
 		frappe.clear_cache(user=self.name)
+		self.clear_api_key_cache()
 		if self.name in STANDARD_USERS:
 			throw(_("User {0} cannot be deleted").format(self.name))
 
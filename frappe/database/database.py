@@ -16,7 +16,7 @@ import frappe.model.meta
 from frappe import _
 from time import time
 from frappe.utils import now, getdate, cast_fieldtype
-from frappe.utils.background_jobs import execute_job, get_queue
+from frappe.utils.background_jobs import enqueue_job
 from frappe.model.utils.link_count import flush_local_link_count
 from frappe.utils import cint
 
@@ -739,16 +739,19 @@ class Database(object):
 		self.flush_realtime_log()
 		enqueue_jobs_after_commit()
 		flush_local_link_count()
+		clear_api_key_cache_after_commit()
+		invalidate_cached_results_after_commit()
 
 	@staticmethod
 	def flush_realtime_log():
-		for args in frappe.local.realtime_log:
-			frappe.realtime.emit_via_redis(*args)
+		frappe.realtime.flush_realtime_log()
 
-		frappe.local.realtime_log = []
+	def rollback(self, save_point=None):
+		"""`ROLLBACK` current transaction, or only the changes after `save_point`."""
+		if save_point:
+			self.sql("rollback to savepoint {0}".format(save_point))
+			return
 
-	def rollback(self):
-		"""`ROLLBACK` current transaction."""
 		self.sql("rollback")
 		self.begin()
 		for obj in frappe.local.rollback_observers:
@@ -756,6 +759,10 @@ class Database(object):
 				obj.on_rollback()
 		frappe.local.rollback_observers = []
 
+	def savepoint(self, save_point):
+		"""Set a `SAVEPOINT` in the current transaction, see `rollback`."""
+		self.sql("savepoint {0}".format(save_point))
+
 	def field_exists(self, dt, fn):
 		"""Return true of field exists."""
 		return self.sql("select name from tabDocField where fieldname=%s and parent=%s", (dt, fn))
@@ -962,11 +969,24 @@ class Database(object):
 def enqueue_jobs_after_commit():
 	if frappe.flags.enqueue_after_commit and len(frappe.flags.enqueue_after_commit) > 0:
 		for job in frappe.flags.enqueue_after_commit:
-			q = get_queue(job.get("queue"), is_async=job.get("is_async"))
-			q.enqueue_call(execute_job, timeout=job.get("timeout"),
-							kwargs=job.get("queue_args"))
+			enqueue_job(job.get("queue"), job.get("queue_args"), timeout=job.get("timeout"),
+				is_async=job.get("is_async"))
 		frappe.flags.enqueue_after_commit = []
 
+def clear_api_key_cache_after_commit():
+	if frappe.flags.api_keys_to_clear:
+		from frappe.api import clear_api_key_cache_after_commit
+		clear_api_key_cache_after_commit()
+
+def invalidate_cached_results_after_commit():
+	if frappe.flags.list_counts_to_invalidate:
+		from frappe.desk.reportview import invalidate_cached_counts_after_commit
+		invalidate_cached_counts_after_commit()
+
+	if frappe.flags.report_sources_to_invalidate:
+		from frappe.desk.query_report import invalidate_report_results_after_commit
+		invalidate_report_results_after_commit()
+
 # Helpers
 def _cast_result(doctype, result):
 	batch = [ ]
@@ -8,7 +8,7 @@ from pymysql.times import TimeDelta
 from pymysql.constants 	import ER, FIELD_TYPE
 from pymysql.converters import conversions
 
-from frappe.utils import get_datetime, cstr
+from frappe.utils import get_datetime, cstr, cint
 from markdown2 import UnicodeWithAttrs
 from frappe.database.database import Database
 from six import PY2, binary_type, text_type, string_types
@@ -107,6 +107,12 @@ class MariaDBDatabase(Database):
 
 		return db_size[0].get('database_size')
 
+	def get_estimated_count(self, doctype):
+		"""Returns the row count of the table of `doctype` from table statistics, without scanning it"""
+		count = self.sql("""select table_rows from information_schema.tables
+			where table_schema = %s and table_name = %s""", (self.db_name, "tab" + doctype))
+		return cint(count[0][0]) if count else 0
+
 	@staticmethod
 	def escape(s, percent=True):
 		"""Excape quotes and percent in given string."""
@@ -201,6 +207,18 @@ class MariaDBDatabase(Database):
 				ENGINE=MyISAM
 				CHARACTER SET=utf8mb4'''.format(self.VARCHAR_LEN))
 
+	def create_link_search_table(self):
+		if not '__link_search' in self.get_tables():
+			self.sql_ddl('''create table __link_search(
+				doctype varchar(100) not null,
+				name varchar({0}) not null,
+				token varchar({0}) not null,
+				index `doctype_token` (doctype, token),
+				index `doctype_name` (doctype, name))
+				COLLATE=utf8mb4_unicode_ci
+				ENGINE=InnoDB
+				CHARACTER SET=utf8mb4'''.format(self.VARCHAR_LEN))
+
 	def create_user_settings_table(self):
 		self.sql_ddl("""create table if not exists __UserSettings (
 			`user` VARCHAR(180) NOT NULL,
@@ -268,12 +286,14 @@ class MariaDBDatabase(Database):
 				self.sql("""alter table `tab%s`
 					add unique `%s`(%s)""" % (doctype, constraint_name, ", ".join(fields)))
 
-	def updatedb(self, doctype, meta=None):
+	def updatedb(self, doctype, meta=None, dry_run=False):
 		"""
 		Syncs a `DocType` to the table
 		* creates if required
 		* updates columns
 		* updates indices
+
+		With `dry_run`, the changes are printed (with their estimated cost) but not applied
 		"""
 		res = self.sql("select issingle from `tabDocType` where name=%s", (doctype,))
 		if not res:
@@ -283,6 +303,9 @@ class MariaDBDatabase(Database):
 			db_table = MariaDBTable(doctype, meta)
 			db_table.validate()
 
+			if dry_run:
+				return db_table.sync(dry_run=True)
+
 			self.commit()
 			db_table.sync()
 			self.begin()
@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 
 import frappe
 from frappe import _
+from frappe.utils import cint, flt
 from frappe.database.schema import DBTable
 
 class MariaDBTable(DBTable):
@@ -36,43 +37,37 @@ class MariaDBTable(DBTable):
 			COLLATE=utf8mb4_unicode_ci""".format(varchar_len=frappe.db.VARCHAR_LEN,
 				engine=self.meta.get("engine") or 'InnoDB') % (self.table_name, add_text))
 
-	def alter(self):
+	def alter(self, dry_run=False):
+		"""Apply all column and index changes in one `ALTER TABLE`, so that the table is rebuilt
+		at most once. Changes that do not need a table copy are tried in place without locking
+		writes. With `dry_run`, the statement and its estimated cost are printed instead."""
 		for col in self.columns.values():
 			col.build_for_alter_table(self.current_columns.get(col.fieldname.lower()))
 
-		add_column_query = []
-		modify_column_query = []
-		add_index_query = []
-		drop_index_query = []
+		alter_specs = self.get_alter_specs()
+		if not alter_specs:
+			return
 
-		columns_to_modify =  set(self.change_type + self.add_unique + self.set_default)
+		query = "ALTER TABLE `{}` {}".format(self.table_name, ", ".join(alter_specs))
 
-		for col in self.add_column:
-			add_column_query.append("ADD COLUMN `{}` {}".format(col.fieldname, col.get_definition()))
-
-		for col in columns_to_modify:
-			modify_column_query.append("MODIFY `{}` {}".format(col.fieldname, col.get_definition()))
+		# type changes rebuild the table, everything else can be done in place
+		in_place = not self.change_type
 
-		for col in self.add_index:
-			# if index key not exists
-			if not frappe.db.sql("SHOW INDEX FROM `%s` WHERE key_name = %s" %
-					(self.table_name, '%s'), col.fieldname):
-				add_index_query.append("ADD INDEX `{}`(`{}`)".format(col.fieldname, col.fieldname))
-
-		for col in self.drop_index:
-			if col.fieldname != 'name': # primary key
-				# if index key exists
-				if frappe.db.sql("""SHOW INDEX FROM `{0}`
-					WHERE key_name=%s
-					AND Non_unique=%s""".format(self.table_name), (col.fieldname, col.unique)):
-					drop_index_query.append("drop index `{}`".format(col.fieldname))
+		if dry_run:
+			self.print_alter_plan(query, in_place)
+			return query
 
 		try:
-			for query_parts in [add_column_query, modify_column_query, add_index_query, drop_index_query]:
-				if query_parts:
-					query_body = ", ".join(query_parts)
-					query = "ALTER TABLE `{}` {}".format(self.table_name, query_body)
+			if in_place:
+				try:
+					frappe.db.sql(query + ", ALGORITHM=INPLACE, LOCK=NONE")
+				except Exception as e:
+					# not supported by this server or storage engine
+					if e.args[0] not in (1845, 1846):
+						raise
 					frappe.db.sql(query)
+			else:
+				frappe.db.sql(query)
 
 		except Exception as e:
 			# sanitize
@@ -84,3 +79,49 @@ class MariaDBTable(DBTable):
 					fieldname, self.table_name)))
 			else:
 				raise e
+
+	def get_alter_specs(self):
+		alter_specs = []
+		columns_to_modify = set(self.change_type + self.add_unique + self.set_default)
+
+		# existing index name: non unique
+		indexes = {}
+		if self.add_index or self.drop_index:
+			for index in frappe.db.sql("SHOW INDEX FROM `{0}`".format(self.table_name), as_dict=1):
+				indexes[index.Key_name] = cint(index.Non_unique)
+
+		for col in self.add_column:
+			alter_specs.append("ADD COLUMN `{}` {}".format(col.fieldname, col.get_definition()))
+
+		for col in columns_to_modify:
+			alter_specs.append("MODIFY `{}` {}".format(col.fieldname, col.get_definition()))
+
+		for col in self.add_index:
+			# if index key not exists
+			if col.fieldname not in indexes:
+				alter_specs.append("ADD INDEX `{}`(`{}`)".format(col.fieldname, col.fieldname))
+
+		for col in self.drop_index:
+			if col.fieldname != 'name': # primary key
+				# if index key exists
+				if col.unique is not None and indexes.get(col.fieldname) == cint(col.unique):
+					alter_specs.append("DROP INDEX `{}`".format(col.fieldname))
+
+		return alter_specs
+
+	def print_alter_plan(self, query, in_place):
+		rows, size = frappe.db.sql("""select table_rows, data_length + index_length
+			from information_schema.tables where table_schema = database() and table_name = %s""",
+			self.table_name)[0]
+
+		if in_place:
+			index_count = len(self.add_index) + len(self.add_unique)
+			cost = _("in place, writes are not blocked")
+			if index_count:
+				cost += _(", {0} index(es) built by reading the table").format(index_count)
+		else:
+			cost = _("table copy, writes are blocked until it is done")
+
+		print("{0};".format(query))
+		print("-- {0}: about {1} rows ({2:.1f} MB), {3}".format(self.table_name, cint(rows),
+			flt(size) / 1024 / 1024, cost))
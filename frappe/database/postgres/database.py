@@ -5,7 +5,7 @@ import frappe
 import psycopg2
 import psycopg2.extensions
 from six import string_types
-from frappe.utils import cstr
+from frappe.utils import cstr, cint
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 
 from frappe.database.database import Database
@@ -90,6 +90,11 @@ class PostgresDatabase(Database):
 			self.db_name, as_dict=True)
 		return db_size[0].get('database_size')
 
+	def get_estimated_count(self, doctype):
+		"""Returns the row count of the table of `doctype` from table statistics, without scanning it"""
+		count = self.sql("select reltuples from pg_class where relname = %s", "tab" + doctype)
+		return max(cint(count[0][0]), 0) if count else 0
+
 	# pylint: disable=W0221
 	def sql(self, *args, **kwargs):
 		if len(args):
@@ -190,6 +195,17 @@ class PostgresDatabase(Database):
 				published int not null default 0,
 				unique (doctype, name))'''.format(self.VARCHAR_LEN))
 
+	def create_link_search_table(self):
+		if not '__link_search' in self.get_tables():
+			self.sql_ddl('''create table "__link_search"(
+				doctype varchar(100) not null,
+				name varchar({0}) not null,
+				token varchar({0}) not null)'''.format(self.VARCHAR_LEN))
+			# varchar_pattern_ops, for prefix search with `like` in any collation
+			self.sql_ddl('''create index "link_search_doctype_token"
+				on "__link_search" (doctype, token varchar_pattern_ops)''')
+			self.sql_ddl('''create index "link_search_doctype_name" on "__link_search" (doctype, name)''')
+
 	def create_user_settings_table(self):
 		self.sql_ddl("""create table if not exists "__UserSettings" (
 			"user" VARCHAR(180) NOT NULL,
@@ -207,12 +223,14 @@ class PostgresDatabase(Database):
 				"full_path" text)''')
 		self.sql('''CREATE INDEX IF NOT EXISTS "help_index" ON "help" ("path")''')
 
-	def updatedb(self, doctype, meta=None):
+	def updatedb(self, doctype, meta=None, dry_run=False):
 		"""
 		Syncs a `DocType` to the table
 		* creates if required
 		* updates columns
 		* updates indices
+
+		With `dry_run`, the changes are printed (with their estimated cost) but not applied
 		"""
 		res = self.sql("select issingle from `tabDocType` where name='{}'".format(doctype))
 		if not res:
@@ -222,6 +240,9 @@ class PostgresDatabase(Database):
 			db_table = PostgresTable(doctype, meta)
 			db_table.validate()
 
+			if dry_run:
+				return db_table.sync(dry_run=True)
+
 			self.commit()
 			db_table.sync()
 			self.begin()
@@ -30,7 +30,7 @@ class PostgresTable(DBTable):
 
 		frappe.db.commit()
 
-	def alter(self):
+	def alter(self, dry_run=False):
 		for col in self.columns.values():
 			col.build_for_alter_table(self.current_columns.get(col.fieldname.lower()))
 
@@ -89,6 +89,13 @@ class PostgresTable(DBTable):
 				if not frappe.db.has_index(self.table_name, col.fieldname):
 					drop_index_query += 'DROP INDEX IF EXISTS "{}" ;'.format(col.fieldname)
 
+		if dry_run:
+			queries = [q for q in (query and "ALTER TABLE `{}` {}".format(self.table_name, ", ".join(query)),
+				create_index_query, drop_index_query) if q]
+			for q in queries:
+				print(q)
+			return queries
+
 		if query:
 			try:
 				final_alter_query = "ALTER TABLE `{}` {}".format(self.table_name, ", ".join(query))
@@ -29,11 +29,15 @@ class DBTable:
 		# load
 		self.get_columns_from_docfields()
 
-	def sync(self):
+	def sync(self, dry_run=False):
+		"""Create or alter the table. With `dry_run`, only return (and print) the changes"""
 		if self.is_new():
-			self.create()
+			if dry_run:
+				print("-- {0}: new table".format(self.table_name))
+			else:
+				self.create()
 		else:
-			self.alter()
+			return self.alter(dry_run=dry_run)
 
 	def create(self):
 		pass
@@ -184,7 +188,7 @@ class DBTable:
 		for c in frappe.db.get_table_columns_description(self.table_name):
 			self.current_columns[c.name.lower()] = c
 
-	def alter(self):
+	def alter(self, dry_run=False):
 		pass
 
 
@@ -235,6 +239,10 @@ class DbColumn:
 		if not current_def:
 			self.fieldname = validate_column_name(self.fieldname)
 			self.table.add_column.append(self)
+
+			# index the new column in the same statement
+			if self.set_index and not self.unique and column_type not in ('text', 'longtext'):
+				self.table.add_index.append(self)
 			return
 
 		# type
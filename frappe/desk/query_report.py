@@ -4,7 +4,7 @@
 from __future__ import unicode_literals
 
 import frappe
-import os, json, datetime
+import os, json, datetime, time, hashlib
 
 from frappe import _
 from frappe.modules import scrub, get_module_path
@@ -197,12 +197,125 @@ def run(report_name, filters=None, user=None):
 			dn = ""
 		result = get_prepared_report_result(report, filters, dn, user)
 	else:
-		result = generate_report_result(report, filters, user)
+		result = get_report_result(report, filters, user)
 
 	result["add_total_row"] = report.add_total_row
 
 	return result
 
+def get_report_result(report, filters=None, user=None):
+	"""Returns the report result, from the cache if the report has `result_cache_ttl` set.
+
+	Cached results are shared by users with the same roles, user permissions and shared
+	documents (and are per user for source doctypes with "if owner" permissions), and are stale after
+	`result_cache_ttl` seconds or when a document of the report's source doctypes is modified.
+	If `serve_stale_results` is set, a stale result is returned and refreshed in the background"""
+	if not cint(report.get("result_cache_ttl")):
+		return generate_report_result(report, filters, user)
+
+	if not user:
+		user = frappe.session.user
+	if filters and isinstance(filters, string_types):
+		filters = json.loads(filters)
+
+	key = get_report_cache_key(report, filters, user)
+	cached = frappe.cache().get_value(key)
+	if cached:
+		if is_cached_result_fresh(report, cached):
+			return dict(cached["result"], from_cache=True)
+
+		if cint(report.serve_stale_results):
+			frappe.enqueue("frappe.desk.query_report.refresh_report_result",
+				report_name=report.get("custom_report") or report.name, filters=filters, user=user,
+				queue="short", job_name=key, deduplicate=True)
+			return dict(cached["result"], from_cache=True, stale=True)
+
+	return cache_report_result(report, filters, user, key)
+
+def refresh_report_result(report_name, filters, user):
+	report = get_report_doc(report_name)
+	cache_report_result(report, filters, user, get_report_cache_key(report, filters, user))
+
+def cache_report_result(report, filters, user, key):
+	# results of documents modified while the report runs are stale
+	cached_at = time.time()
+	result = generate_report_result(report, filters, user)
+
+	# stale results are kept for a day, to be served while they are refreshed
+	expires_in_sec = 86400 if cint(report.serve_stale_results) else cint(report.result_cache_ttl)
+	frappe.cache().set_value(key, {"result": result, "cached_at": cached_at},
+		expires_in_sec=expires_in_sec)
+
+	return result
+
+def get_report_cache_key(report, filters, user):
+	"""Returns the cache key of the result, from the filters and the permissions of the user"""
+	from frappe.permissions import get_user_permissions, get_role_permissions
+
+	doctypes = get_source_doctypes(report)
+	shared = frappe.get_all("DocShare", filters={"user": user, "share_doctype": ("in", doctypes)},
+		fields=["share_doctype", "share_name"], order_by="share_doctype, share_name", as_list=True)
+
+	# documents owned by the user are only readable by the user
+	owner = user if any(get_role_permissions(doctype, user).get("if_owner")
+		for doctype in doctypes) else None
+
+	fingerprint = json.dumps([filters or {}, sorted(frappe.get_roles(user)),
+		get_user_permissions(user), shared, owner], sort_keys=True, default=cstr)
+
+	return "report_result|{0}|{1}".format(report.get("custom_report") or report.name,
+		hashlib.sha1(fingerprint.encode("utf-8")).hexdigest())
+
+def is_cached_result_fresh(report, cached):
+	if time.time() - cached["cached_at"] > cint(report.result_cache_ttl):
+		return False
+
+	modified = frappe.cache().hget_many("report_source_modified", get_source_doctypes(report))
+	return all(flt(timestamp) < cached["cached_at"] for timestamp in modified.values())
+
+def get_source_doctypes(report):
+	"""Returns the Ref DocType and the Source DocTypes (one per line) of the report"""
+	doctypes = [report.ref_doctype]
+	for doctype in (report.source_doctypes or "").splitlines():
+		if doctype.strip() and doctype.strip() not in doctypes:
+			doctypes.append(doctype.strip())
+
+	return doctypes
+
+def get_cached_report_source_doctypes():
+	"""Returns source doctypes of all reports with cached results"""
+	def _get():
+		doctypes = set()
+		for report in frappe.get_all("Report", filters={"result_cache_ttl": (">", 0)},
+			fields=["ref_doctype", "source_doctypes"]):
+			doctypes.update(get_source_doctypes(report))
+
+		return list(doctypes)
+
+	return frappe.cache().get_value("report_source_doctypes", _get)
+
+def invalidate_report_results(doc, method=None):
+	"""Called on change of any document, marks cached results of reports reading from the
+	doctype of the document as stale.
+
+	They are marked again after commit (`invalidate_report_results_after_commit`), as a
+	concurrent request can cache the old result until the change is committed"""
+	if frappe.flags.in_install or frappe.flags.in_migrate:
+		return
+
+	if doc.doctype in get_cached_report_source_doctypes():
+		frappe.cache().hset("report_source_modified", doc.doctype, time.time())
+
+		if frappe.flags.report_sources_to_invalidate is None:
+			frappe.flags.report_sources_to_invalidate = set()
+		frappe.flags.report_sources_to_invalidate.add(doc.doctype)
+
+def invalidate_report_results_after_commit():
+	if frappe.flags.report_sources_to_invalidate:
+		for doctype in frappe.flags.report_sources_to_invalidate:
+			frappe.cache().hset("report_source_modified", doctype, time.time())
+		frappe.flags.report_sources_to_invalidate = None
+
 def add_data_to_custom_columns(columns, result):
 	custom_fields_data = get_data_for_custom_report(columns)
 
@@ -479,12 +592,23 @@ def get_filtered_data(ref_doctype, columns, data, user):
 	if_owner = role_permissions.get("if_owner", {}).get("report")
 
 	if match_filters_per_doctype:
+		shared = set(shared)
+
+		# allowed values as sets, and existing link values from one query per doctype
+		for filter_list in match_filters_per_doctype.values():
+			for match_filters in filter_list:
+				for dt in match_filters:
+					match_filters[dt] = set(match_filters[dt])
+
+		existing_values = get_existing_link_values(data, linked_doctypes, match_filters_per_doctype)
+
 		for row in data:
 			# Why linked_doctypes.get(ref_doctype)? because if column is empty, linked_doctypes[ref_doctype] is removed
 			if linked_doctypes.get(ref_doctype) and shared and row[linked_doctypes[ref_doctype]] in shared:
 				result.append(row)
 
-			elif has_match(row, linked_doctypes, match_filters_per_doctype, ref_doctype, if_owner, columns_dict, user):
+			elif has_match(row, linked_doctypes, match_filters_per_doctype, ref_doctype, if_owner, columns_dict,
+				user, existing_values):
 				result.append(row)
 	else:
 		result = list(data)
@@ -492,7 +616,8 @@ def get_filtered_data(ref_doctype, columns, data, user):
 	return result
 
 
-def has_match(row, linked_doctypes, doctype_match_filters, ref_doctype, if_owner, columns_dict, user):
+def has_match(row, linked_doctypes, doctype_match_filters, ref_doctype, if_owner, columns_dict, user,
+	existing_values=None):
 	"""Returns True if after evaluating permissions for each linked doctype
 		- There is an owner match for the ref_doctype
 		- `and` There is a user permission match for all linked doctypes
@@ -503,6 +628,9 @@ def has_match(row, linked_doctypes, doctype_match_filters, ref_doctype, if_owner
 		Each doctype could have multiple conflicting user permission doctypes.
 		Hence even if one of the sets allows a match, it is true.
 		This behavior is equivalent to the trickling of user permissions of linked doctypes to the ref doctype.
+
+		`existing_values` (from `get_existing_link_values`) is used to check if a link value exists,
+		instead of querying the database for each value.
 	"""
 	resultant_match = True
 
@@ -529,13 +657,10 @@ def has_match(row, linked_doctypes, doctype_match_filters, ref_doctype, if_owner
 					if dt=="User" and columns_dict[idx]==columns_dict.get("owner"):
 						continue
 
-					cell_value = None
-					if isinstance(row, dict):
-						cell_value = row.get(idx)
-					elif isinstance(row, list):
-						cell_value = row[idx]
+					cell_value = get_cell_value(row, idx)
 
-					if dt in match_filters and cell_value not in match_filters.get(dt) and frappe.db.exists(dt, cell_value):
+					if (dt in match_filters and cell_value not in match_filters.get(dt)
+						and link_value_exists(dt, cell_value, existing_values)):
 						match = False
 						break
 
@@ -554,6 +679,49 @@ def has_match(row, linked_doctypes, doctype_match_filters, ref_doctype, if_owner
 
 	return resultant_match
 
+def get_cell_value(row, idx):
+	if isinstance(row, dict):
+		return row.get(idx)
+	elif isinstance(row, list):
+		return row[idx]
+
+def link_value_exists(doctype, value, existing_values=None):
+	if existing_values is not None and doctype in existing_values:
+		return bool(value) and cstr(value).lower() in existing_values[doctype]
+
+	return frappe.db.exists(doctype, value)
+
+def get_existing_link_values(data, linked_doctypes, doctype_match_filters):
+	"""Returns names (lowercase, as names are matched case insensitively) of existing documents
+	of each linked doctype, out of the link values in `data` that are not allowed by every user
+	permission of the doctype. Existence is checked with one query per doctype per 1000 values"""
+	existing_values = {}
+
+	for dt, idx in linked_doctypes.items():
+		allowed_values = [match_filters[dt] for filter_list in doctype_match_filters.values()
+			for match_filters in filter_list if dt in match_filters]
+		if not allowed_values or frappe.get_meta(dt).issingle:
+			continue
+
+		# values allowed by all user permissions are never checked
+		always_allowed = set.intersection(*allowed_values)
+		values = set()
+		for row in data:
+			if row:
+				value = get_cell_value(row, idx)
+				if value and value not in always_allowed:
+					values.add(cstr(value))
+
+		existing_values[dt] = set()
+		values = list(values)
+		for i in range(0, len(values), 1000):
+			chunk = values[i:i + 1000]
+			existing_values[dt].update(cstr(name).lower() for name in frappe.db.sql_list(
+				"""select name from `tab{0}` where name in ({1})""".format(dt, ", ".join(["%s"] * len(chunk))),
+				chunk))
+
+	return existing_values
+
 def get_linked_doctypes(columns, data):
 	linked_doctypes = {}
 
@@ -4,11 +4,12 @@
 from __future__ import unicode_literals
 """build query for doclistview and return results"""
 
-import frappe, json
+import frappe, json, re, time, hashlib
 from six.moves import range
 import frappe.permissions
-from frappe.model.db_query import DatabaseQuery
+from frappe.model.db_query import DatabaseQuery, get_list_with_cursor
 from frappe import _
+from frappe.utils import cint, flt
 from six import text_type, string_types, StringIO
 
 @frappe.whitelist()
@@ -16,13 +17,88 @@ from six import text_type, string_types, StringIO
 def get():
 	args = get_form_params()
 
-	data = compress(execute(**args), args = args)
+	if args.get("cursor") is not None:
+		result, frappe.response["next_cursor"] = get_list_with_cursor(**args)
+	elif is_count_query(args):
+		result = get_count(**args)
+	else:
+		result = execute(**args)
+
+	data = compress(result, args = args)
 
 	return data
 
 def execute(doctype, *args, **kwargs):
 	return DatabaseQuery(doctype).execute(*args, **kwargs)
 
+def is_count_query(args):
+	"""Returns True for the `total_count` request of the list view"""
+	fields = args.get("fields") or []
+	return len(fields) == 1 and not args.get("group_by") and \
+		bool(re.match(r"^count\(.*\)\s+as\s+total_count$", fields[0].strip(), re.I))
+
+def get_count(doctype, *args, **kwargs):
+	"""Returns `total_count` for the list view.
+
+	For tables of more than `estimated_count_threshold` rows (default 100000) with no filters
+	or permission conditions, the row count estimated from table statistics is returned.
+	Filtered counts are cached, see `get_cached_list`"""
+	query = DatabaseQuery(doctype)
+	query.execute(*args, return_query=True, **kwargs)
+
+	if not (query.conditions or query.or_conditions or len(query.tables) > 1):
+		estimated_count = frappe.db.get_estimated_count(doctype)
+		if estimated_count >= cint(frappe.conf.estimated_count_threshold or 100000):
+			frappe.response["estimated_count"] = 1
+			return [{"total_count": estimated_count}]
+
+	return get_cached_list(doctype, *args, **kwargs)
+
+def get_cached_list(doctype, *args, **kwargs):
+	"""Returns the result of `frappe.get_list` for aggregate queries (counts, group by stats),
+	cached for `list_count_cache_ttl` seconds (default 60).
+
+	The cache key is the query, which includes the permission conditions of the user, and the
+	result format. Cached results are stale once a document of `doctype` is modified or deleted"""
+	ttl = cint(frappe.conf.list_count_cache_ttl or 60)
+	if not ttl:
+		return frappe.get_list(doctype, *args, **kwargs)
+
+	query = frappe.get_list(doctype, *args, return_query=True, **kwargs)
+	key = "list_count|{0}|{1}|{2}".format(doctype, cint(kwargs.get("as_list")),
+		hashlib.sha1(frappe.safe_encode(query)).hexdigest())
+
+	cached = frappe.cache().get_value(key)
+	if cached and cached["cached_at"] > flt(frappe.cache().hget("list_count_modified", doctype)):
+		return cached["result"]
+
+	# documents modified while the query runs make the result stale
+	cached_at = time.time()
+	result = frappe.get_list(doctype, *args, **kwargs)
+	frappe.cache().set_value(key, {"result": result, "cached_at": cached_at}, expires_in_sec=ttl)
+
+	return result
+
+def invalidate_cached_counts(doc, method=None):
+	"""Called on change or delete of any document, marks cached counts and stats of the doctype as stale.
+
+	They are marked again after commit (`invalidate_cached_counts_after_commit`), as a concurrent
+	request can cache the old counts until the change is committed"""
+	if frappe.flags.in_install or frappe.flags.in_migrate:
+		return
+
+	frappe.cache().hset("list_count_modified", doc.doctype, time.time())
+
+	if frappe.flags.list_counts_to_invalidate is None:
+		frappe.flags.list_counts_to_invalidate = set()
+	frappe.flags.list_counts_to_invalidate.add(doc.doctype)
+
+def invalidate_cached_counts_after_commit():
+	if frappe.flags.list_counts_to_invalidate:
+		for doctype in frappe.flags.list_counts_to_invalidate:
+			frappe.cache().hset("list_count_modified", doctype, time.time())
+		frappe.flags.list_counts_to_invalidate = None
+
 def get_form_params():
 	"""Stringify GET request parameters."""
 	data = frappe._dict(frappe.local.form_dict)
@@ -270,13 +346,13 @@ def get_stats(stats, doctype, filters=[]):
 	for tag in tags:
 		if not tag in columns: continue
 		try:
-			tagcount = frappe.get_list(doctype, fields=[tag, "count(*)"],
+			tagcount = get_cached_list(doctype, fields=[tag, "count(*)"],
 				#filters=["ifnull(`%s`,'')!=''" % tag], group_by=tag, as_list=True)
 				filters = filters + ["ifnull(`%s`,'')!=''" % tag], group_by = tag, as_list = True)
 
 			if tag=='_user_tags':
 				stats[tag] = scrub_user_tags(tagcount)
-				stats[tag].append([_("No Tags"), frappe.get_list(doctype,
+				stats[tag].append([_("No Tags"), get_cached_list(doctype,
 					fields=[tag, "count(*)"],
 					filters=filters +["({0} = ',' or {0} = '' or {0} is null)".format(tag)], as_list=True)[0][1]])
 			else:
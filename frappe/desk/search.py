@@ -6,6 +6,7 @@ from __future__ import unicode_literals
 import frappe, json
 from frappe.utils import cstr, unique, cint
 from frappe.permissions import has_permission
+from frappe.utils import link_search
 from frappe import _
 from six import string_types
 import re
@@ -101,9 +102,13 @@ def search_widget(doctype, txt, query=None, searchfield=None, start=0,
 				filters = []
 			or_filters = []
 
+			# prefix index of large doctypes
+			index_conditions = txt and link_search.get_search_conditions(doctype, txt)
 
 			# build from doctype
-			if txt:
+			if index_conditions:
+				filters.extend(index_conditions)
+			elif txt:
 				search_fields = ["name"]
 				if meta.title_field:
 					search_fields.append(meta.title_field)
@@ -128,16 +133,21 @@ def search_widget(doctype, txt, query=None, searchfield=None, start=0,
 				fields = list(set(fields + json.loads(filter_fields)))
 			formatted_fields = ['`tab%s`.`%s`' % (meta.name, f.strip()) for f in fields]
 
-			# find relevance as location of search term from the beginning of string `name`. used for sorting results.
-			formatted_fields.append("""locate({_txt}, `tab{doctype}`.`name`) as `_relevance`""".format(
-				_txt=frappe.db.escape((txt or "").replace("%", "")), doctype=doctype))
+			if index_conditions:
+				formatted_fields.append("{0} as `_relevance`".format(link_search.get_relevance(doctype, txt)))
+				relevance_order = "_relevance desc"
+			else:
+				# find relevance as location of search term from the beginning of string `name`. used for sorting results.
+				formatted_fields.append("""locate({_txt}, `tab{doctype}`.`name`) as `_relevance`""".format(
+					_txt=frappe.db.escape((txt or "").replace("%", "")), doctype=doctype))
+				relevance_order = "_relevance"
 
 
 			# In order_by, `idx` gets second priority, because it stores link count
 			from frappe.model.db_query import get_order_by
 			order_by_based_on_meta = get_order_by(doctype, meta)
 			# 2 is the index of _relevance column
-			order_by = "_relevance, {0}, `tab{1}`.idx desc".format(order_by_based_on_meta, doctype)
+			order_by = "{0}, {1}, `tab{2}`.idx desc".format(relevance_order, order_by_based_on_meta, doctype)
 
 			ignore_permissions = True if doctype == "DocType" else (cint(ignore_user_permissions) and has_permission(doctype))
 
@@ -116,6 +116,11 @@ standard_queries = {
 }
 
 doc_events = {
+	("Letter Head", "Success Action", "Energy Point Settings", "GSuite Settings"): {
+		"on_update": "frappe.boot.clear_site_bootinfo",
+		"on_trash": "frappe.boot.clear_site_bootinfo",
+		"after_rename": "frappe.boot.clear_site_bootinfo"
+	},
 	"*": {
 		"on_update": [
 			"frappe.desk.notifications.clear_doctype_notifications",
@@ -124,17 +129,26 @@ doc_events = {
 			"frappe.automation.doctype.assignment_rule.assignment_rule.apply",
 			"frappe.automation.doctype.milestone_tracker.milestone_tracker.evaluate_milestone"
 		],
-		"after_rename": "frappe.desk.notifications.clear_doctype_notifications",
+		"after_rename": [
+			"frappe.desk.notifications.clear_doctype_notifications",
+			"frappe.utils.link_search.rename_for_document"
+		],
 		"on_cancel": [
 			"frappe.desk.notifications.clear_doctype_notifications",
 			"frappe.workflow.doctype.workflow_action.workflow_action.process_workflow_actions"
 		],
 		"on_trash": [
 			"frappe.desk.notifications.clear_doctype_notifications",
-			"frappe.workflow.doctype.workflow_action.workflow_action.process_workflow_actions"
+			"frappe.workflow.doctype.workflow_action.workflow_action.process_workflow_actions",
+			"frappe.desk.query_report.invalidate_report_results",
+			"frappe.desk.reportview.invalidate_cached_counts",
+			"frappe.utils.link_search.delete_for_document"
 		],
 		"on_change": [
-			"frappe.social.doctype.energy_point_rule.energy_point_rule.process_energy_points"
+			"frappe.social.doctype.energy_point_rule.energy_point_rule.process_energy_points",
+			"frappe.desk.query_report.invalidate_report_results",
+			"frappe.desk.reportview.invalidate_cached_counts",
+			"frappe.utils.link_search.update_for_document"
 		],
 	}
 }
@@ -40,6 +40,7 @@ def install_db(root_login="root", root_password=None, db_name=None, source_sql=N
 
 	frappe.db.create_auth_table()
 	frappe.db.create_global_search_table()
+	frappe.db.create_link_search_table()
 	frappe.db.create_user_settings_table()
 
 	frappe.flags.in_install_db = False
@@ -317,4 +318,25 @@ def extract_tar_files(site_name, file_path, folder_name):
 	finally:
 		frappe.destroy()
 
-	return tar_path
\ No newline at end of file
+	return tar_path
+
+def extract_files_backup(site_name, file_path, folder_name):
+	'''Extract a files backup. An incremental backup is restored by extracting its full backup
+	and the increments in order, then removing the files deleted since the full backup'''
+	from frappe.utils.backups import get_backup_chain
+
+	chain, manifest = get_backup_chain(file_path)
+	for path in chain:
+		os.remove(extract_tar_files(site_name, path, folder_name))
+
+	if manifest:
+		frappe.init(site=site_name)
+		try:
+			files_path = os.path.abspath(frappe.get_site_path(folder_name, "files"))
+			for root, dirs, filenames in os.walk(files_path):
+				for filename in filenames:
+					path = os.path.join(root, filename)
+					if os.path.relpath(path, files_path) not in manifest["files"]:
+						os.remove(path)
+		finally:
+			frappe.destroy()
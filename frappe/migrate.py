@@ -49,6 +49,7 @@ def migrate(verbose=True, rebuild_website=False, skip_failing=False):
 		# sync
 		frappe.model.sync.sync_all(verbose=verbose)
 		frappe.translate.clear_cache()
+		frappe.translate.build_catalogs()
 		sync_fixtures()
 		sync_customizations()
 		sync_languages()
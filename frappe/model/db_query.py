@@ -12,8 +12,8 @@ import frappe.share
 from frappe import _
 import frappe.permissions
 from datetime import datetime
-import frappe, json, copy, re
-from frappe.model import optional_fields
+import frappe, json, copy, re, base64
+from frappe.model import optional_fields, default_fields
 from frappe.client import check_parent_permission
 from frappe.model.utils.user_settings import get_user_settings, update_user_settings
 from frappe.utils import flt, cint, get_time, make_filter_tuple, get_filter, add_to_date, cstr, nowdate
@@ -36,7 +36,8 @@ class DatabaseQuery(object):
 		ignore_permissions=False, user=None, with_comment_count=False,
 		join='left join', distinct=False, start=None, page_length=None, limit=None,
 		ignore_ifnull=False, save_user_settings=False, save_user_settings_fields=False,
-		update=None, add_total_row=None, user_settings=None, reference_doctype=None, return_query=False, strict=True):
+		update=None, add_total_row=None, user_settings=None, reference_doctype=None, return_query=False, strict=True,
+		cursor=None):
 		if not ignore_permissions and not frappe.has_permission(self.doctype, "read", user=user):
 			frappe.flags.error_message = _('Insufficient Permission for {0}').format(frappe.bold(self.doctype))
 			raise frappe.PermissionError(self.doctype)
@@ -82,6 +83,10 @@ class DatabaseQuery(object):
 		self.return_query = return_query
 		self.strict = strict
 
+		# keyset pagination, `cursor` is "" for the first page or `next_cursor` of the previous page
+		self.cursor = cursor
+		self.next_cursor = None
+
 		# for contextual user permission check
 		# to determine which user permission is applicable on link field of specific doctype
 		self.reference_doctype = reference_doctype or self.doctype
@@ -107,6 +112,10 @@ class DatabaseQuery(object):
 
 	def build_and_run(self):
 		args = self.prepare_args()
+
+		if self.cursor is not None:
+			self.set_cursor_condition(args)
+
 		args.limit = self.add_limit()
 
 		if args.conditions:
@@ -125,8 +134,103 @@ class DatabaseQuery(object):
 
 		if self.return_query:
 			return query
+
+		result = frappe.db.sql(query, as_dict=not self.as_list, debug=self.debug, update=self.update)
+
+		if self.cursor is not None:
+			result = self.set_next_cursor(result)
+
+		return result
+
+	def set_cursor_condition(self, args):
+		"""Order by a single column and `name`, and only select rows after the `cursor`,
+		so that deep pages are read from the index instead of skipping `limit_start` rows"""
+		if self.group_by or self.distinct:
+			frappe.throw(_("Cursor pagination cannot be used with group by or distinct"))
+
+		self.cursor_field, self.cursor_desc = self.get_cursor_order()
+
+		table = "`tab{0}`".format(self.doctype)
+		column = "{0}.`{1}`".format(table, self.cursor_field)
+		name_column = "{0}.`name`".format(table)
+		sort_order = "desc" if self.cursor_desc else "asc"
+
+		args.order_by = " order by {0} {1}".format(column, sort_order)
+		if self.cursor_field != "name":
+			args.order_by += ", {0} {1}".format(name_column, sort_order)
+
+		# returned to build the next cursor, removed from the result
+		args.fields += ", {0} as `_cursor_value`, {1} as `_cursor_name`".format(column, name_column)
+
+		self.limit_start = 0
+		self.limit_page_length = cint(self.limit_page_length) or 20
+
+		if not self.cursor:
+			return
+
+		try:
+			value, name = json.loads(frappe.safe_decode(base64.urlsafe_b64decode(frappe.safe_encode(self.cursor))))
+		except (TypeError, ValueError):
+			frappe.throw(_("Invalid cursor"))
+
+		operator = "<" if self.cursor_desc else ">"
+		# values decoded from the cursor can be numbers, which are escaped as strings
+		name_condition = "{0} {1} {2}".format(name_column, operator, frappe.db.escape(cstr(name)))
+
+		if self.cursor_field == "name":
+			condition = name_condition
+
 		else:
-			return frappe.db.sql(query, as_dict=not self.as_list, debug=self.debug, update=self.update)
+			# NULLs sort lowest in MariaDB and highest in Postgres
+			nulls_first = self.cursor_desc == (frappe.db.db_type == "postgres")
+
+			if value is None:
+				condition = "({0} is null and {1})".format(column, name_condition)
+				if nulls_first:
+					condition += " or {0} is not null".format(column)
+			else:
+				value = frappe.db.escape(cstr(value))
+				condition = "{0} {1} {2} or ({0} = {2} and {3})".format(column, operator, value,
+					name_condition)
+				if not nulls_first:
+					condition += " or {0} is null".format(column)
+
+		args.conditions = "({0}) and ({1})".format(args.conditions, condition) \
+			if args.conditions else condition
+
+	def get_cursor_order(self):
+		"""Returns (column, descending) of the order by, which must be a single column of the doctype"""
+		meta = frappe.get_meta(self.doctype)
+		order_by = self.order_by
+
+		if not order_by:
+			order_by = meta.sort_field if (meta.sort_field and ',' not in meta.sort_field) else "modified"
+			order_by = "{0} {1}".format(order_by, (meta.sort_field and meta.sort_order) or "desc")
+
+		match = re.match(r"^\s*(?:`tab{0}`\.)?`?(\w+)`?(?:\s+(asc|desc))?\s*$".format(re.escape(self.doctype)),
+			order_by, re.I)
+		fieldname = match and match.group(1)
+
+		if not (fieldname and (fieldname in default_fields or meta.get_field(fieldname))):
+			frappe.throw(_("Cursor pagination needs order by a single column of {0}").format(self.doctype))
+
+		return fieldname, (match.group(2) or "asc").lower() == "desc"
+
+	def set_next_cursor(self, result):
+		"""Set `next_cursor` from the last row if the page is full, and remove the cursor columns"""
+		if result and len(result) == self.limit_page_length:
+			last = result[-1]
+			value, name = (last[-2], last[-1]) if self.as_list else (last._cursor_value, last._cursor_name)
+			self.next_cursor = frappe.safe_decode(base64.urlsafe_b64encode(frappe.safe_encode(
+				json.dumps([value, name], default=cstr))))
+
+		if self.as_list:
+			return [row[:-2] for row in result]
+
+		for row in result:
+			del row["_cursor_value"], row["_cursor_name"]
+
+		return result
 
 	def prepare_args(self):
 		self.parse_args()
@@ -784,6 +888,12 @@ def get_list(doctype, *args, **kwargs):
 
 	return DatabaseQuery(doctype).execute(None, *args, **kwargs)
 
+def get_list_with_cursor(doctype, *args, **kwargs):
+	'''Returns a page of records for `cursor` and the cursor of the next page (None for the last page)'''
+	query = DatabaseQuery(doctype)
+	result = query.execute(None, *args, **kwargs)
+	return result, query.next_cursor
+
 def is_parent_only_filter(doctype, filters):
 	#check if filters contains only parent doctype
 	only_parent_doctype = True
@@ -7,24 +7,46 @@ from __future__ import unicode_literals, print_function
 	perms will get synced only if none exist
 """
 import frappe
-import os
-from frappe.modules.import_file import import_file_by_path
+import os, json, hashlib
+from multiprocessing.pool import ThreadPool
+from frappe.modules.import_file import import_file_by_path, read_doc_from_file
 from frappe.modules.patch_handler import block_user
-from frappe.utils import update_progress_bar
+from frappe.utils import update_progress_bar, cint, now
 
-def sync_all(force=0, verbose=False, reset_permissions=False):
+# hash, doctype and name of the last synced version of each file are kept in
+# `tabDefaultValue` under this parent, so that unchanged files are skipped
+SYNC_MANIFEST = "__sync_manifest"
+
+# DocTypes imported with a deferred schema update are kept under this parent until their
+# tables are updated, so that a failed update is retried by the next sync
+PENDING_TABLES = "__sync_pending_tables"
+
+# documents of these doctypes are created while DocTypes are imported (modules and domains
+# of the DocTypes), so their tables are updated right away
+undeferred_doctypes = ("module_def", "domain")
+
+def sync_all(force=0, verbose=False, reset_permissions=False, jobs=None):
 	block_user(True)
 
 	for app in frappe.get_installed_apps():
-		sync_for(app, force, verbose=verbose, reset_permissions=reset_permissions)
+		sync_for(app, force, verbose=verbose, reset_permissions=reset_permissions, jobs=jobs)
 
 	block_user(False)
 
 	frappe.clear_cache()
 
-def sync_for(app_name, force=0, sync_everything = False, verbose=False, reset_permissions=False):
+def sync_for(app_name, force=0, sync_everything = False, verbose=False, reset_permissions=False, jobs=None):
+	"""Sync DocTypes and other standard documents (pages, reports etc.) of the app from their
+	JSON files. Files that have not changed since the last sync are skipped, unless `force` is set.
+
+	Tables of changed DocTypes are updated after all DocTypes are imported, `jobs` (or
+	`sync_jobs` in site config) at a time. Documents of other types are imported after that.
+	Tables left pending by a failed sync are updated first."""
 	files = []
 
+	if not frappe.flags.in_install:
+		sync_pending_tables(jobs)
+
 	if app_name == "frappe":
 		# these need to go first at time of install
 		for d in (("core", "docfield"),
@@ -45,25 +67,189 @@ def sync_for(app_name, force=0, sync_everything = False, verbose=False, reset_pe
 			files.append(os.path.join(frappe.get_app_path("frappe"), d[0],
 				"doctype", d[1], d[1] + ".json"))
 
+	# documents of these doctypes are imported while syncing, so their tables are never deferred
+	first_files = list(files)
+
 	for module_name in frappe.local.app_modules.get(app_name) or []:
 		folder = os.path.dirname(frappe.get_module(app_name + "." + module_name).__file__)
 		get_doc_files(files, folder, force, sync_everything, verbose=verbose)
 
 	l = len(files)
-	if l:
-		for i, doc_path in enumerate(files):
-			import_file_by_path(doc_path, force=force, ignore_version=True,
-				reset_permissions=reset_permissions, for_sync=True)
+	files = get_changed_files(app_name, files, force)
+
+	# tables can be updated later only if the DocType documents are not needed right away
+	defer = not frappe.flags.in_install
+	doctype_files = [f for f in files if is_doctype_file(f.path)]
+	other_files = [f for f in files if not is_doctype_file(f.path)]
+
+	if files:
+		deferred_doctypes = []
+		for i, f in enumerate(doctype_files + other_files):
+			if i == len(doctype_files) and deferred_doctypes:
+				sync_tables(deferred_doctypes, jobs)
+				deferred_doctypes = []
+
+			if defer and f.path not in first_files and is_doctype_file(f.path) \
+				and os.path.basename(os.path.dirname(f.path)) not in undeferred_doctypes:
+				frappe.flags.deferred_schema_updates = deferred_doctypes
+
+			deferred_count = len(deferred_doctypes)
+			try:
+				import_file_by_path(f.path, force=force, ignore_version=True,
+					reset_permissions=reset_permissions, for_sync=True)
+			finally:
+				frappe.flags.deferred_schema_updates = None
 			#print module_name + ' | ' + doctype + ' | ' + name
 
+			# committed with the DocType, as its file is skipped by the next sync
+			add_pending_tables(deferred_doctypes[deferred_count:])
 			frappe.db.commit()
 
 			# show progress bar
-			update_progress_bar("Updating DocTypes for {0}".format(app_name), i, l)
+			update_progress_bar("Updating DocTypes for {0} ({1} of {2} changed)".format(app_name,
+				len(files), l), i, len(files))
+
+		if deferred_doctypes:
+			sync_tables(deferred_doctypes, jobs)
+
+		update_sync_manifest(files)
 
 		# print each progress bar on new line
 		print()
 
+def is_doctype_file(path):
+	return os.path.basename(os.path.dirname(os.path.dirname(path))) == "doctype"
+
+def sync_tables(doctypes, jobs=None):
+	"""Update tables of DocTypes (`DocType` documents) imported with deferred schema updates.
+	Tables are independent of each other, so they are altered in parallel connections"""
+	jobs = min(cint(jobs or frappe.conf.sync_jobs) or 1, len(doctypes))
+
+	if jobs > 1:
+		site, sites_path = frappe.local.site, frappe.local.sites_path
+		in_migrate, in_install = frappe.flags.in_migrate, frappe.flags.in_install
+
+		def update_table(doc):
+			frappe.init(site=site, sites_path=sites_path)
+			frappe.flags.in_migrate, frappe.flags.in_install = in_migrate, in_install
+			try:
+				frappe.connect()
+				doc.update_table()
+				frappe.db.commit()
+			finally:
+				frappe.destroy()
+
+		pool = ThreadPool(jobs)
+		try:
+			pool.map(update_table, doctypes)
+		finally:
+			pool.close()
+	else:
+		for doc in doctypes:
+			doc.update_table()
+
+	for doc in doctypes:
+		frappe.clear_cache(doctype=doc.name)
+		doc.after_table_update()
+		remove_pending_table(doc.name)
+		frappe.db.commit()
+
+def sync_pending_tables(jobs=None):
+	"""Update tables of DocTypes whose deferred schema update did not complete"""
+	doctypes = []
+	for name in frappe.db.sql_list("""select defkey from `tabDefaultValue` where parent=%s""",
+		PENDING_TABLES):
+		if frappe.db.exists("DocType", name):
+			doctypes.append(frappe.get_doc("DocType", name))
+		else:
+			remove_pending_table(name)
+
+	if doctypes:
+		sync_tables(doctypes, jobs)
+
+	frappe.db.commit()
+
+def add_pending_tables(doctypes):
+	for doc in doctypes:
+		remove_pending_table(doc.name)
+		timestamp = now()
+		frappe.db.sql("""insert into `tabDefaultValue` (name, parent, parenttype, defkey, defvalue,
+			creation, modified, owner, modified_by) values (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+			(frappe.generate_hash(length=10), PENDING_TABLES, "__default", doc.name, doc.modified,
+			timestamp, timestamp, "Administrator", "Administrator"))
+
+def remove_pending_table(doctype):
+	frappe.db.sql("""delete from `tabDefaultValue` where parent=%s and defkey=%s""",
+		(PENDING_TABLES, doctype))
+
+def get_changed_files(app_name, files, force=False):
+	"""Returns files (with their manifest key and hash) that have changed since the last sync,
+	or whose document does not exist anymore"""
+	manifest = {} if (force or frappe.flags.in_install) else get_sync_manifest(app_name)
+	existing = get_existing_docs(manifest.values())
+
+	changed = []
+	for path in files:
+		f = frappe._dict(path=path, key=get_manifest_key(app_name, path), hash=get_file_hash(path))
+		synced = manifest.get(f.key)
+		if not (synced and synced[0] == f.hash and (synced[1], synced[2]) in existing):
+			changed.append(f)
+
+	return changed
+
+def get_sync_manifest(app_name):
+	return dict((key, json.loads(value)) for key, value in frappe.db.sql("""select defkey, defvalue
+		from `tabDefaultValue` where parent=%s and defkey like %s""", (SYNC_MANIFEST, app_name + ":%")))
+
+def get_existing_docs(synced):
+	"""Returns (doctype, name) of the synced documents that exist, one query per doctype"""
+	names_per_doctype = {}
+	for content_hash, doctype, name in synced:
+		names_per_doctype.setdefault(doctype, set()).add(name)
+
+	existing = set()
+	for doctype, names in names_per_doctype.items():
+		if frappe.db.table_exists(doctype):
+			existing.update((doctype, name) for name in
+				frappe.db.sql_list("select name from `tab{0}`".format(doctype)) if name in names)
+
+	return existing
+
+def get_manifest_key(app_name, path):
+	return "{0}:{1}".format(app_name, os.path.relpath(path, frappe.get_app_path(app_name)))
+
+def get_file_hash(path):
+	with open(path, "rb") as f:
+		return hashlib.md5(f.read()).hexdigest()
+
+def update_sync_manifest(files):
+	"""Record hash, doctype and name of the synced files"""
+	entries = {}
+	for f in files:
+		docs = read_doc_from_file(f.path)
+		doc = docs[0] if isinstance(docs, list) else docs
+		if doc:
+			entries[f.key] = json.dumps([f.hash, doc["doctype"], doc["name"]])
+
+	if not entries:
+		return
+
+	keys = list(entries)
+	frappe.db.sql("""delete from `tabDefaultValue` where parent=%s and defkey in ({0})""".format(
+		", ".join(["%s"] * len(keys))), [SYNC_MANIFEST] + keys)
+
+	timestamp = now()
+	values = []
+	for key in keys:
+		values += [frappe.generate_hash(length=10), SYNC_MANIFEST, "__default", key, entries[key],
+			timestamp, timestamp, "Administrator", "Administrator"]
+
+	frappe.db.sql("""insert into `tabDefaultValue` (name, parent, parenttype, defkey, defvalue,
+		creation, modified, owner, modified_by) values {0}""".format(
+		", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(keys))), values)
+
+	frappe.db.commit()
+
 def get_doc_files(files, start_path, force=0, sync_everything = False, verbose=False):
 	"""walk and sync all doctypes and pages"""
 
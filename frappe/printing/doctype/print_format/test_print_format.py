@@ -28,3 +28,14 @@ class TestPrintFormat(unittest.TestCase):
 	def test_print_user_classic(self):
 		print_html = self.test_print_user("Classic")
 		self.assertTrue("/* classic format: for-test */" in print_html)
+
+	def test_template_from_string_is_compiled_once(self):
+		from frappe.utils.jinja import get_template_from_string, compiled_templates
+
+		source = "{{ doc.name }} - {{ frappe.session.user }} (test compiled template)"
+		get_template_from_string(source)
+		count = len(compiled_templates)
+
+		html = get_template_from_string(source).render({"doc": {"name": "Test"}})
+		self.assertEqual(len(compiled_templates), count)
+		self.assertEqual(html, "Test - {0} (test compiled template)".format(frappe.session.user))
@@ -27,6 +27,7 @@ frappe.Application = Class.extend({
 	},
 
 	startup: function() {
+		this.restore_boot_segments();
 		frappe.socketio.init();
 		frappe.model.init();
 
@@ -207,6 +208,58 @@ frappe.Application = Class.extend({
 		});
 		d.show();
 	},
+	restore_boot_segments: function() {
+		// shared boot segments (site, roles) are kept in localStorage, the server does not
+		// send the ones whose hash is in the boot_hashes cookie
+		if(!frappe.boot || !frappe.boot.boot_hashes) return;
+
+		let hashes = frappe.boot.boot_hashes;
+		let omitted = frappe.boot.omitted_keys || {};
+		let stored = {};
+		try {
+			stored = JSON.parse(localStorage.getItem("boot_segments") || "{}");
+		} catch(e) {
+			stored = {};
+		}
+
+		let missing = Object.keys(omitted).some(name => {
+			let segment = stored[name];
+			return !segment || segment.hash !== hashes[name]
+				|| omitted[name].some(key => !(key in segment.data));
+		});
+
+		if(missing) {
+			// cleared or changed in another tab, fetch the full segments
+			frappe.call({
+				method: "frappe.boot.get_changed_boot_segments",
+				async: false,
+				callback: r => {
+					Object.keys(omitted).forEach(name => stored[name] = r.message[name]);
+				}
+			});
+		}
+
+		Object.keys(omitted).forEach(name => {
+			omitted[name].forEach(key => frappe.boot[key] = stored[name].data[key]);
+		});
+
+		Object.keys(frappe.boot.segment_keys || {}).forEach(name => {
+			let data = {};
+			frappe.boot.segment_keys[name].forEach(key => data[key] = frappe.boot[key]);
+			stored[name] = {hash: hashes[name], data: data};
+		});
+
+		try {
+			localStorage.setItem("boot_segments", JSON.stringify(stored));
+			let held = {};
+			Object.keys(stored).forEach(name => held[name] = stored[name].hash);
+			document.cookie = "boot_hashes=" + encodeURIComponent(JSON.stringify(held)) + "; path=/";
+		} catch(e) {
+			// storage full, the segments are sent with every boot
+			document.cookie = "boot_hashes=; path=/; expires=Thu, 01 Jan 1970 00:00:00 GMT";
+		}
+	},
+
 	load_bootinfo: function() {
 		if(frappe.boot) {
 			frappe.modules = {};
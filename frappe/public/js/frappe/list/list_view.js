@@ -678,9 +678,11 @@ frappe.views.ListView = class ListView extends frappe.views.BaseList {
 			}
 		}).then(r => {
 			this.total_count = r.message.values[0][0] || current_count;
-			let str = __('{0} of {1}', [current_count, this.total_count]);
+			// estimated from table statistics for large tables without filters
+			let total_count = r.estimated_count ? '~' + this.total_count : this.total_count;
+			let str = __('{0} of {1}', [current_count, total_count]);
 			if (count_without_children !== current_count) {
-				str = __('{0} of {1} ({2} rows with children)', [count_without_children, this.total_count, current_count]);
+				str = __('{0} of {1} ({2} rows with children)', [count_without_children, total_count, current_count]);
 			}
 			return str;
 		});
@@ -1005,6 +1007,12 @@ frappe.views.ListView = class ListView extends frappe.views.BaseList {
 			const { doctype, name } = data;
 			if (doctype !== this.doctype) return;
 
+			// many documents were updated, refresh the whole list
+			if (!name) {
+				this.refresh();
+				return;
+			}
+
 			// filters to get only the doc with this name
 			const call_args = this.get_call_args();
 			call_args.args.filters.push([this.doctype, 'name', '=', name]);
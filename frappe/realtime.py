@@ -9,6 +9,7 @@ import frappe
 import os
 import time
 import redis
+from collections import OrderedDict
 from io import FileIO
 from frappe.utils import get_site_path
 from frappe import conf
@@ -17,6 +18,21 @@ END_LINE = '<!-- frappe: end-file -->'
 TASK_LOG_MAX_AGE = 86400  # 1 day in seconds
 redis_server = None
 
+# events of which only the latest message per room is sent, optionally
+# per value of message keys. Within a transaction for `after_commit` events, else
+# at most once every `realtime_throttle_interval` seconds
+coalesced_events = {
+	"progress": ("task_id", "title"),
+	"data_import_progress": ("data_import",),
+	"doc_update": (),
+	"list_update": ("doctype", "name"),
+}
+
+# beyond these many updated documents of a doctype in a transaction,
+# send one `list_update` without name, i.e. a refresh of the whole list
+LIST_UPDATE_LIMIT = 20
+
+
 @frappe.whitelist()
 def get_pending_tasks_for_doc(doctype, docname):
 	return frappe.db.sql_list("select name from `tabAsync Task` where status in ('Queued', 'Running') and reference_doctype=%s and reference_name=%s", (doctype, docname))
@@ -97,26 +113,158 @@ def publish_realtime(event=None, message=None, room=None,
 		# end frappe.chat
 
 	if after_commit:
-		params = [event, message, room]
-		if not params in frappe.local.realtime_log:
-			frappe.local.realtime_log.append(params)
+		queue_after_commit(event, message, room)
+	elif event in coalesced_events:
+		emit_throttled(event, message, room)
 	else:
 		emit_via_redis(event, message, room)
 
+def get_throttled_events():
+	"""(event, room, key): [time of last emit, latest throttled (event, message, room) or None],
+	of the current request or job"""
+	if getattr(frappe.local, "realtime_throttled", None) is None:
+		frappe.local.realtime_throttled = {}
+	return frappe.local.realtime_throttled
+
+def get_stats():
+	"""counters of the current request or job, accumulated per site in the `realtime_stats` redis hash"""
+	if getattr(frappe.local, "realtime_stats", None) is None:
+		frappe.local.realtime_stats = {"published": 0, "coalesced": 0, "throttled": 0, "dropped": 0}
+	return frappe.local.realtime_stats
+
+def get_coalesce_key(event, message, room):
+	if event in coalesced_events:
+		return (event, room, tuple(message.get(fieldname) for fieldname in coalesced_events[event]))
+
+	# same event is sent only once per transaction
+	return (event, room, frappe.as_json(message))
+
+def queue_after_commit(event, message, room):
+	"""Queue the event to be emitted on commit, replacing a queued message of the same
+	coalesce key. Beyond `realtime_max_queued_events`, events are dropped"""
+	log = frappe.local.realtime_log
+	key = get_coalesce_key(event, message, room)
+
+	if key in log:
+		# latest message wins, in the order of the latest publish
+		del log[key]
+		get_stats()["coalesced"] += 1
+	elif len(log) >= (conf.get("realtime_max_queued_events") or 10000):
+		get_stats()["dropped"] += 1
+		return
+
+	log[key] = (event, message, room)
+
+def emit_throttled(event, message, room):
+	"""Emit the event if it has not been emitted in the last `realtime_throttle_interval`
+	seconds, else hold it to be emitted later (or replaced by a newer message)"""
+	interval = conf.get("realtime_throttle_interval", 0.5)
+	key = get_coalesce_key(event, message, room)
+	now = time.time()
+	throttled_events = get_throttled_events()
+	stats = get_stats()
+
+	state = throttled_events.get(key)
+	if state and now - state[0] < interval:
+		if state[1]:
+			stats["coalesced"] += 1
+		state[1] = (event, message, room)
+		stats["throttled"] += 1
+		return
+
+	throttled_events[key] = [now, None]
+	emit_via_redis(event, message, room)
+
+def flush_realtime_log():
+	"""Emit events queued for after commit and held back by throttling, in one redis round trip"""
+	events = list(frappe.local.realtime_log.values())
+	frappe.local.realtime_log = OrderedDict()
+
+	events.extend(pop_throttled_events())
+
+	if events:
+		emit_many(collapse_list_updates(events))
+
+def flush_throttled_events():
+	"""Emit the events still held back by throttling, and the counters, at the end of a request
+	or job (events queued for after commit are not sent without a commit)"""
+	events = pop_throttled_events()
+	if events or any(get_stats().values()):
+		emit_many(events)
+
+def pop_throttled_events():
+	events = []
+	throttled_events = get_throttled_events()
+	for key, state in list(throttled_events.items()):
+		if state[1]:
+			events.append(state[1])
+			state[1] = None
+		elif time.time() - state[0] > 60:
+			del throttled_events[key]
+
+	return events
+
+def collapse_list_updates(events):
+	"""Replace many `list_update` events of a doctype by one without name"""
+	counts = {}
+	for event, message, room in events:
+		if event == "list_update":
+			key = (room, message.get("doctype"))
+			counts[key] = counts.get(key, 0) + 1
+
+	out, collapsed = [], set()
+	for event, message, room in events:
+		if event == "list_update":
+			key = (room, message.get("doctype"))
+			if counts[key] > LIST_UPDATE_LIMIT:
+				if key not in collapsed:
+					collapsed.add(key)
+					out.append((event, {"doctype": message.get("doctype"), "user": message.get("user")}, room))
+				get_stats()["coalesced"] += 1
+				continue
+
+		out.append((event, message, room))
+
+	return out
+
 def emit_via_redis(event, message, room):
 	"""Publish real-time updates via redis
 
 	:param event: Event name, like `task_progress` etc.
 	:param message: JSON message object. For async must contain `task_id`
 	:param room: name of the room"""
+	emit_many([(event, message, room)])
+
+def emit_many(events):
+	"""Publish real-time updates via redis, pipelined
+
+	:param events: list of (event, message, room)"""
 	r = get_redis_server()
 
 	try:
-		r.publish('events', frappe.as_json({'event': event, 'message': message, 'room': room}))
+		pipe = r.pipeline(transaction=False)
+		for event, message, room in events:
+			pipe.publish('events', frappe.as_json({'event': event, 'message': message, 'room': room}))
+
+		get_stats()["published"] += len(events)
+		update_stats(pipe)
+		pipe.execute()
 	except redis.exceptions.ConnectionError:
 		# print(frappe.get_traceback())
 		pass
 
+def update_stats(pipe):
+	"""Move the counters of this process to the `realtime_stats` hash of the site"""
+	site = getattr(frappe.local, "site", None)
+	if not site:
+		return
+
+	stats = get_stats()
+	for counter, value in stats.items():
+		if value:
+			pipe.hincrby("realtime_stats", "{0}:{1}".format(site, counter), value)
+			stats[counter] = 0
+
 def put_log(line_no, line, task_id=None):
 	r = get_redis_server()
 	if not task_id:
@@ -111,27 +111,24 @@ def clear_expired_sessions():
 	for sid in get_expired_sessions():
 		delete_session(sid, reason="Session Expired")
 
-def get():
-	"""get session boot info"""
-	from frappe.desk.notifications import \
-		get_notification_info_for_boot, get_notifications
-	from frappe.boot import get_bootinfo, get_unseen_notes
-
-	bootinfo = None
-	if not getattr(frappe.conf,'disable_session_cache', None):
-		# check if cache exists
-		bootinfo = frappe.cache().hget("bootinfo", frappe.session.user)
-		if bootinfo:
-			bootinfo['from_cache'] = 1
-			bootinfo["notification_info"].update(get_notifications())
-			bootinfo["user"]["recent"] = json.dumps(\
-				frappe.cache().hget("user_recent", frappe.session.user))
-
-	if not bootinfo:
-		# if not create it
-		bootinfo = get_bootinfo()
-		bootinfo["notification_info"] = get_notification_info_for_boot()
-		frappe.cache().hset("bootinfo", frappe.session.user, bootinfo)
+def get(boot_hashes=None):
+	"""get session boot info
+
+	:param boot_hashes: hashes of the shared boot segments held by the client, these are not sent"""
+	from frappe.desk.notifications import get_notifications
+	from frappe.boot import (get_boot_segments, merge_boot_segments, get_unseen_notes,
+		omit_unchanged_segments)
+
+	segments = get_boot_segments()
+	bootinfo = merge_boot_segments(segments)
+
+	if segments.user.from_cache:
+		bootinfo['from_cache'] = 1
+		bootinfo["notification_info"].update(get_notifications())
+		bootinfo["user"]["recent"] = json.dumps(\
+			frappe.cache().hget("user_recent", frappe.session.user))
+
+	else:
 		try:
 			frappe.cache().ping()
 		except redis.exceptions.ConnectionError:
@@ -159,6 +156,8 @@ def get():
 
 	bootinfo["setup_complete"] = cint(frappe.db.get_single_value('System Settings', 'setup_complete'))
 
+	omit_unchanged_segments(bootinfo, segments, boot_hashes)
+
 
 	return bootinfo
 
@@ -31,6 +31,54 @@ class TestAPI(unittest.TestCase):
 		self.assertTrue(frappe.db.get_value('ToDo', {'description': 'Test API 2'}))
 		self.assertTrue(frappe.db.get_value('ToDo', {'description': 'Test API 3'}))
 
+	def test_bulk_write(self):
+		from frappe.api import bulk_write
+
+		frappe.db.sql("DELETE FROM `tabToDo` WHERE `description` LIKE 'Test Bulk%'")
+
+		out = bulk_write("ToDo", "POST", [{"description": "Test Bulk 1"},
+			{"description": "Test Bulk 2", "status": "Not A Status"}])
+		self.assertTrue(out[0].get("name"))
+		self.assertTrue(out[1].get("error"))
+		self.assertFalse(frappe.db.get_value("ToDo", {"description": "Test Bulk 2"}))
+
+		# upsert
+		upserted = bulk_write("ToDo", "POST", [{"description": "Test Bulk 1", "priority": "High"},
+			{"description": "Test Bulk 3"}], key="description")
+		self.assertEqual(upserted[0]["name"], out[0]["name"])
+		self.assertEqual(frappe.db.get_value("ToDo", out[0]["name"], "priority"), "High")
+
+		bulk_write("ToDo", "DELETE", [out[0]["name"], {"description": "Test Bulk 3"}], key="description")
+		self.assertFalse(frappe.db.get_value("ToDo", {"description": ["like", "Test Bulk%"]}))
+
+	def test_bulk_write_key(self):
+		from frappe.api import get_name_for_write
+
+		self.assertRaises(frappe.ValidationError, get_name_for_write, "ToDo",
+			{"description": "Test Bulk 1"}, ["description`=`description` or 1=1 or `description"])
+
+		# lists are values, not operators
+		self.assertFalse(get_name_for_write("ToDo", {"description": ["like", "%"]}, ["description"]))
+
+	def test_bulk_write_rolled_back_results(self):
+		from frappe.api import UncommittedResults
+
+		uncommitted = UncommittedResults()
+		uncommitted.watch()
+		committed = {"name": "_Test Committed"}
+		uncommitted.results.append(committed)
+		frappe.db.commit()
+
+		# results committed since are not marked, results rolled back are
+		uncommitted.watch()
+		rolled_back = {"name": "_Test Rolled Back"}
+		uncommitted.results.append(rolled_back)
+		frappe.db.rollback()
+
+		self.assertEqual(committed, {"name": "_Test Committed"})
+		self.assertEqual(rolled_back.get("exc_type"), "TransactionRollback")
+		self.assertFalse(rolled_back.get("name"))
+
 	def test_auth_via_api_key_secret(self):
 
 		# generate api ke and api secret for administrator
@@ -65,4 +113,27 @@ class TestAPI(unittest.TestCase):
 		api_secret = "ksk&93nxoe3os"
 		header = {"Authorization": "token {}:{}".format(api_key, api_secret)}
 		res = requests.post(frappe.get_site_config().host_name + "/api/method/frappe.auth.get_logged_user", headers=header)
-		self.assertEqual(res.status_code, 401)
\ No newline at end of file
+		self.assertEqual(res.status_code, 401)
+
+	def test_api_key_cache(self):
+		from frappe.api import validate_api_key_secret, get_api_key_cache_key, cache_api_key_user
+
+		generate_keys("Administrator")
+		api_key = frappe.db.get_value("User", "Administrator", "api_key")
+		api_secret = frappe.utils.password.get_decrypted_password("User", "Administrator",
+			fieldname="api_secret")
+		cache_key = get_api_key_cache_key(api_key)
+
+		validate_api_key_secret(api_key, api_secret)
+		self.assertEqual(frappe.cache().get_value(cache_key)["user"], "Administrator")
+		self.assertFalse(api_secret in str(frappe.cache().get_value(cache_key)))
+
+		# regenerating the secret clears the cache
+		generate_keys("Administrator")
+		self.assertFalse(frappe.cache().get_value(cache_key))
+
+		# and again after commit, in case a concurrent request cached the old secret
+		cache_api_key_user(api_key, api_secret, "Administrator")
+		frappe.db.commit()
+		self.assertFalse(frappe.cache().get_value(cache_key))
+		frappe.set_user("Administrator")
@@ -0,0 +1,163 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+from __future__ import unicode_literals
+
+import unittest
+import json
+import time
+import frappe
+from rq import Queue
+from six.moves import cPickle as pickle
+from frappe.utils.background_jobs import (register_job, unregister_job, is_job_queued,
+	get_jobs, get_job_key, get_job_registry_key, get_job_ids_key, get_redis_conn, get_queue,
+	get_queue_name, parse_queue_name, FairWorker, schedule_retry, enqueue_delayed_jobs,
+	rebuild_job_registry, get_running_jobs, get_running_jobs_key, DELAYED_JOBS_KEY)
+
+test_method = 'frappe.tests.test_background_jobs.test_job'
+
+def test_job():
+	pass
+
+class TestJobRegistry(unittest.TestCase):
+	def setUp(self):
+		self.site = '_test_job_registry_site'
+		get_redis_conn().delete(get_job_registry_key(self.site), get_job_ids_key(self.site))
+
+	def tearDown(self):
+		get_redis_conn().delete(get_job_registry_key(self.site), get_job_ids_key(self.site))
+
+	def test_register_and_unregister(self):
+		queue_args = {'site': self.site, 'method': test_method, 'job_name': 'Test Job'}
+		register_job('short', queue_args, 'test-job-1')
+		register_job('short', queue_args, 'test-job-2')
+
+		self.assertTrue(is_job_queued(test_method, 'Test Job', site=self.site))
+		self.assertFalse(is_job_queued(test_method, 'Other Job', site=self.site))
+		self.assertFalse(is_job_queued(test_method, 'Test Job', site=self.site, queue='long'))
+
+		self.assertEqual(get_jobs(site=self.site)[self.site], [test_method])
+		self.assertEqual(get_jobs(site=self.site, key='job_name')[self.site], ['Test Job'])
+		self.assertEqual(get_jobs()[self.site], [test_method])
+
+		unregister_job(self.site, 'test-job-1')
+		self.assertTrue(is_job_queued(test_method, 'Test Job', site=self.site))
+
+		# a job is unregistered once
+		unregister_job(self.site, 'test-job-1')
+		self.assertTrue(is_job_queued(test_method, 'Test Job', site=self.site))
+
+		unregister_job(self.site, 'test-job-2')
+		self.assertFalse(is_job_queued(test_method, 'Test Job', site=self.site))
+		self.assertFalse(get_redis_conn().exists(get_job_registry_key(self.site)))
+		self.assertFalse(get_redis_conn().exists(get_job_ids_key(self.site)))
+
+	def test_function_method(self):
+		register_job('default', {'site': self.site, 'method': test_job, 'job_name': 'Test Job'},
+			'test-job-1')
+		self.assertTrue(is_job_queued(test_method, 'Test Job', site=self.site))
+
+	def test_retry(self):
+		conn = get_redis_conn()
+		queue_args = {'site': self.site, 'user': 'Administrator', 'method': test_method,
+			'event': None, 'job_name': 'Test Job', 'kwargs': {}, 'is_async': True, 'retry': 1,
+			'queue': 'short', 'priority': None}
+		register_job('short', queue_args, 'test-job-1')
+		schedule_retry(queue_args, test_method, registered_id='test-job-1')
+
+		payloads = [p for p in conn.zrange(DELAYED_JOBS_KEY, 0, -1)
+			if pickle.loads(p)['queue_args']['site'] == self.site]
+		self.assertEqual(len(payloads), 1)
+
+		# still registered while waiting for the retry
+		self.assertTrue(is_job_queued(test_method, 'Test Job', site=self.site))
+
+		q = get_queue('short', site=self.site)
+		try:
+			conn.zadd(DELAYED_JOBS_KEY, payloads[0], 0)
+			enqueue_delayed_jobs()
+
+			self.assertEqual(conn.zscore(DELAYED_JOBS_KEY, payloads[0]), None)
+			self.assertEqual(q.count, 1)
+			self.assertEqual(q.jobs[0].kwargs['retry'], 1)
+
+			# the registration of the failed run is taken over by the retry
+			self.assertEqual(conn.hkeys(get_job_ids_key(self.site)), [q.jobs[0].id.encode()])
+			unregister_job(self.site, q.jobs[0].id)
+			self.assertFalse(is_job_queued(test_method, 'Test Job', site=self.site))
+		finally:
+			q.empty()
+			conn.srem(Queue.redis_queues_keys, q.key)
+
+	def test_rebuild_job_registry(self):
+		conn = get_redis_conn()
+		queue_args = {'site': self.site, 'method': test_method, 'job_name': 'Test Job'}
+		register_job('short', queue_args, 'test-job-1')
+		register_job('short', queue_args, 'test-job-2')
+
+		# lost long ago, never enqueued in rq
+		job_key = get_job_key('short', test_method, 'Test Job')
+		conn.hset(get_job_ids_key(self.site), 'test-job-1', json.dumps([job_key, 0]))
+
+		# counted without a job id
+		conn.hincrby(get_job_registry_key(self.site), job_key, 5)
+
+		rebuild_job_registry()
+		self.assertEqual(conn.hkeys(get_job_ids_key(self.site)), [b'test-job-2'])
+		self.assertEqual(int(conn.hget(get_job_registry_key(self.site), job_key)), 1)
+
+	def test_lost_job_does_not_block_deduplication(self):
+		conn = get_redis_conn()
+		register_job('short', {'site': self.site, 'method': test_method, 'job_name': 'Test Job'},
+			'test-job-1')
+		self.assertTrue(is_job_queued(test_method, 'Test Job', site=self.site))
+
+		# killed long ago, never unregistered
+		job_key = get_job_key('short', test_method, 'Test Job')
+		conn.hset(get_job_ids_key(self.site), 'test-job-1', json.dumps([job_key, 0]))
+		self.assertFalse(is_job_queued(test_method, 'Test Job', site=self.site))
+		self.assertFalse(conn.exists(get_job_ids_key(self.site)))
+
+class TestFairQueues(unittest.TestCase):
+	def setUp(self):
+		self.conn = get_redis_conn()
+		self.queue_names = [get_queue_name('short', '_test_site_a'),
+			get_queue_name('short', '_test_site_b'),
+			get_queue_name('short', '_test_site_b', priority='high')]
+		for name in self.queue_names:
+			self.conn.sadd(Queue.redis_queues_keys, Queue(name, connection=self.conn).key)
+
+	def tearDown(self):
+		for name in self.queue_names:
+			self.conn.srem(Queue.redis_queues_keys, Queue(name, connection=self.conn).key)
+		self.conn.delete(get_running_jobs_key('_test_site_a'), get_running_jobs_key('_test_site_b'))
+
+	def test_queue_name(self):
+		self.assertEqual(parse_queue_name('short'), ('short', None, None))
+		self.assertEqual(parse_queue_name('short:site1.local'), ('short', None, 'site1.local'))
+		self.assertEqual(parse_queue_name(get_queue_name('long', 'site1.local', 'high')),
+			('long', 'high', 'site1.local'))
+
+	def test_queue_order(self):
+		worker = FairWorker(['short'], connection=self.conn, max_jobs_per_site=2)
+
+		def get_order():
+			return [q.name for q in worker.get_ordered_queues() if q.name in self.queue_names]
+
+		# priority lane first
+		self.assertEqual(get_order()[0], 'short:high:_test_site_b')
+
+		# least served site next
+		worker.served.update({'_test_site_a': 2, '_test_site_b': 1})
+		self.assertEqual(get_order()[1:], ['short:_test_site_b', 'short:_test_site_a'])
+
+		# sites running too many jobs are skipped, except in the priority lane
+		self.conn.zadd(get_running_jobs_key('_test_site_b'), 'test-job-1', time.time() + 300,
+			'test-job-2', time.time() + 300)
+		self.assertEqual(get_order(), ['short:high:_test_site_b', 'short:_test_site_a'])
+
+	def test_running_jobs_expire(self):
+		# jobs of a killed worker are not counted after their timeout
+		self.conn.zadd(get_running_jobs_key('_test_site_a'), 'test-job-1', time.time() + 300,
+			'test-job-2', time.time() - 1)
+		self.assertEqual(get_running_jobs(['_test_site_a', '_test_site_b'], connection=self.conn),
+			{'_test_site_a': 1, '_test_site_b': 0})
@@ -0,0 +1,60 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+from __future__ import unicode_literals
+
+import unittest
+import gzip, json, os, shutil, tarfile, tempfile
+import frappe
+from frappe.utils.backups import new_backup, BackupGenerator, get_manifest_path
+
+class TestBackups(unittest.TestCase):
+	def setUp(self):
+		self.backup_path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.backup_path)
+
+	def test_parallel_dump_includes_views(self):
+		if frappe.conf.db_type == "postgres":
+			return
+
+		frappe.db.sql_ddl("create or replace view `_test_backup_view` as select name from `tabToDo`")
+		try:
+			odb = new_backup(ignore_files=True, force=True, jobs=2,
+				backup_path_db=os.path.join(self.backup_path, "database.sql.gz"))
+
+			with gzip.open(odb.backup_path_db) as f:
+				dump = f.read()
+		finally:
+			frappe.db.sql_ddl("drop view `_test_backup_view`")
+
+		self.assertIn(b"CREATE TABLE `tabToDo`", dump)
+		self.assertIn(b"_test_backup_view", dump)
+
+		# views are restored after the tables they select from
+		self.assertTrue(dump.rindex(b"_test_backup_view") > dump.index(b"CREATE TABLE `tabToDo`"))
+
+	def test_incremental_files_in_backup_path(self):
+		files_path = os.path.join(self.backup_path, "files")
+		os.mkdir(files_path)
+		with open(os.path.join(files_path, "a.txt"), "w") as f:
+			f.write("a")
+
+		odb = BackupGenerator(frappe.conf.db_name, frappe.conf.db_name, frappe.conf.db_password,
+			incremental_files=True)
+
+		def backup_files(name):
+			path = os.path.join(self.backup_path, name)
+			odb.zip_changed_files("public", files_path, path)
+			with tarfile.open(path) as tar:
+				return [os.path.basename(member) for member in tar.getnames()]
+
+		self.assertEqual(backup_files("files-1.tar"), ["a.txt"])
+
+		with open(os.path.join(files_path, "b.txt"), "w") as f:
+			f.write("b")
+
+		# based on the last backup in the same folder, not the backup folder of the site
+		self.assertEqual(backup_files("files-2.tar"), ["b.txt"])
+		with open(get_manifest_path(os.path.join(self.backup_path, "files-2.tar"))) as f:
+			self.assertEqual(json.load(f)["chain"], ["files-1.tar", "files-2.tar"])
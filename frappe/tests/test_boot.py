@@ -0,0 +1,89 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+from __future__ import unicode_literals
+
+import unittest
+import frappe
+from frappe.boot import get_boot_segments, get_changed_boot_segments, boot_segments
+
+class TestBoot(unittest.TestCase):
+	def setUp(self):
+		frappe.set_user('Administrator')
+		frappe.clear_cache()
+
+	def test_segments_are_cached(self):
+		segments = get_boot_segments()
+		for name in boot_segments:
+			self.assertFalse(segments[name].from_cache)
+
+		segments = get_boot_segments()
+		for name in boot_segments:
+			self.assertTrue(segments[name].from_cache)
+
+		# user data must not be duplicated in the shared segments
+		self.assertTrue('single_types' in segments.site.data)
+		self.assertFalse('single_types' in segments.user.data)
+		self.assertTrue('page_info' in segments.roles.data)
+
+	def test_only_changed_segments_are_sent(self):
+		segments = get_boot_segments()
+		hashes = {name: segments[name].hash for name in boot_segments}
+		hashes['user'] = 'stale'
+
+		changed = get_changed_boot_segments(hashes)
+		self.assertFalse('data' in changed['site'])
+		self.assertFalse('data' in changed['roles'])
+		self.assertTrue('data' in changed['user'])
+
+	def test_role_segment_invalidation(self):
+		from frappe.cache_manager import clear_role_bootinfo
+		get_boot_segments()
+		clear_role_bootinfo()
+
+		segments = get_boot_segments()
+		self.assertTrue(segments.site.from_cache)
+		self.assertFalse(segments.roles.from_cache)
+
+	def test_site_segment_invalidation(self):
+		get_boot_segments()
+		frappe.get_doc("Energy Point Settings").save()
+
+		segments = get_boot_segments()
+		self.assertFalse(segments.site.from_cache)
+		self.assertTrue(segments.roles.from_cache)
+
+	def test_unchanged_shared_segments_are_omitted(self):
+		from frappe.boot import omit_unchanged_segments, merge_boot_segments
+
+		segments = get_boot_segments()
+		bootinfo = merge_boot_segments(segments)
+		omit_unchanged_segments(bootinfo, segments, {'site': segments.site.hash})
+
+		self.assertFalse('single_types' in bootinfo)
+		self.assertTrue('single_types' in bootinfo.omitted_keys['site'])
+		self.assertTrue('page_info' in bootinfo.segment_keys['roles'])
+		self.assertTrue('page_info' in bootinfo)
+
+	def test_boot_session_hooks_do_not_change_shared_segments(self):
+		from frappe.boot import build_user_bootinfo
+
+		segments = get_boot_segments()
+		single_types = list(segments.site.data.single_types)
+
+		developer_mode = frappe.conf.developer_mode
+		hooks = frappe.get_hooks()
+		frappe.conf.developer_mode = 0
+		frappe.cache().set_value('app_hooks', dict(hooks,
+			boot_session=['frappe.tests.test_boot.add_single_type']))
+
+		try:
+			user_bootinfo = build_user_bootinfo([segments.site, segments.roles])
+		finally:
+			frappe.conf.developer_mode = developer_mode
+			frappe.cache().delete_value('app_hooks')
+
+		self.assertEqual(segments.site.data.single_types, single_types)
+		self.assertTrue('_Test Boot Session' in user_bootinfo.single_types)
+
+def add_single_type(bootinfo):
+	bootinfo.single_types.append('_Test Boot Session')
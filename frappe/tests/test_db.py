@@ -65,3 +65,21 @@ class TestDB(unittest.TestCase):
 		self.assertIn('tabCustom Field', frappe.flags.touched_tables)
 		frappe.flags.in_migrate = False
 		frappe.flags.touched_tables.clear()
+
+	def test_alter_in_one_statement(self):
+		if frappe.db.db_type != 'mariadb':
+			return
+
+		from frappe.database.schema import DbColumn
+		from frappe.database.mariadb.schema import MariaDBTable
+
+		table = MariaDBTable("ToDo")
+		table.setup_table_columns()
+		for fieldname in ("_test_column_1", "_test_column_2"):
+			table.columns[fieldname] = DbColumn(table, fieldname, "Data", None, None, 1, None, 0, None)
+
+		query = table.alter(dry_run=True)
+		self.assertEqual(query.count("ALTER TABLE"), 1)
+		self.assertEqual(query.count("ADD COLUMN"), 2)
+		self.assertEqual(query.count("ADD INDEX"), 2)
+		self.assertFalse(frappe.db.has_column("ToDo", "_test_column_1"))
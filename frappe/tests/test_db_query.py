@@ -5,8 +5,9 @@ from __future__ import unicode_literals
 import frappe, unittest
 
 from frappe.model.db_query import DatabaseQuery
-from frappe.desk.reportview import get_filters_cond
+from frappe.desk.reportview import get_filters_cond, get_count, get_cached_list
 from frappe.permissions import add_user_permission, clear_user_permissions_for_doctype
+from frappe.utils import flt
 
 test_dependencies = ['User', 'Blog Post']
 
@@ -349,6 +350,77 @@ class TestReportview(unittest.TestCase):
 		self.assertTrue({'name': 'Prepared Report'} in res)
 		self.assertFalse({'name': 'Property Setter'} in res)
 
+	def test_cursor_pagination(self):
+		from frappe.model.db_query import get_list_with_cursor
+
+		for i in range(5):
+			create_event(starts_on="2016-01-0{0} 10:00:00".format(i + 1))
+
+		all_names = [d.name for d in frappe.get_all("Event", order_by="starts_on asc, name asc",
+			limit_page_length=0)]
+
+		names, cursor = [], ""
+		while cursor is not None:
+			result, cursor = get_list_with_cursor("Event", fields=["name", "subject"],
+				order_by="starts_on asc", limit_page_length=2, cursor=cursor)
+			self.assertTrue(all(set(d) == {"name", "subject"} for d in result))
+			names += [d.name for d in result]
+
+		self.assertEqual(names, all_names)
+
+		self.assertRaises(frappe.ValidationError, get_list_with_cursor, "Event",
+			order_by="starts_on asc, name asc", cursor="")
+
+	def test_cursor_pagination_by_number(self):
+		from frappe.model.db_query import get_list_with_cursor
+
+		for i in range(5):
+			event = create_event(starts_on="2016-01-0{0} 10:00:00".format(i + 1))
+			frappe.db.sql("update tabEvent set idx=%s where name=%s", (i + 1, event.name))
+
+		all_names = [d.name for d in frappe.get_all("Event", order_by="idx desc, name desc",
+			limit_page_length=0)]
+
+		# the cursor holds the number of the last row
+		names, cursor = [], ""
+		while cursor is not None:
+			result, cursor = get_list_with_cursor("Event", fields=["name"], order_by="idx desc",
+				limit_page_length=2, cursor=cursor)
+			names += [d.name for d in result]
+
+		self.assertEqual(names, all_names)
+
+	def test_cached_count(self):
+		frappe.cache().delete_keys("list_count|Event")
+		filters = [["Event", "subject", "=", "_Test Cached Count"]]
+		fields = ["count(`tabEvent`.`name`) as total_count"]
+
+		create_event(subject="_Test Cached Count")
+		self.assertEqual(get_count("Event", fields=fields, filters=filters)[0].total_count, 1)
+
+		# rows changed through sql are not seen until the doctype is modified
+		frappe.db.sql("delete from tabEvent where subject='_Test Cached Count'")
+		self.assertEqual(get_count("Event", fields=fields, filters=filters)[0].total_count, 1)
+
+		create_event(subject="_Test Cached Count")
+		self.assertEqual(get_count("Event", fields=fields, filters=filters)[0].total_count, 1)
+
+		# the result format is part of the key
+		result = get_cached_list("Event", fields=fields, filters=filters, as_list=True)
+		self.assertEqual([list(row) for row in result], [[1]])
+
+	def test_cached_count_invalidated_after_commit(self):
+		event = create_event(subject="_Test Cached Count")
+		modified = flt(frappe.cache().hget("list_count_modified", "Event"))
+		self.assertTrue(modified)
+
+		# counts cached by other requests before the commit are stale
+		frappe.db.commit()
+		self.assertGreater(flt(frappe.cache().hget("list_count_modified", "Event")), modified)
+
+		frappe.delete_doc("Event", event.name)
+		frappe.db.commit()
+
 
 def create_event(subject="_Test Event", starts_on=None):
 	""" create a test event """
@@ -5,7 +5,7 @@ from __future__ import unicode_literals
 import unittest
 
 import frappe.utils.pdf as pdfgen
-import frappe, io, six
+import frappe, io, os, six, stat
 from PyPDF2 import PdfFileReader
 
 #class TestPdfBorders(unittest.TestCase):
@@ -46,4 +46,22 @@ class TestPdf(unittest.TestCase):
 		self.assertTrue(reader.isEncrypted)
 		if six.PY2:
 			password = frappe.safe_encode(password)
-		self.assertTrue(reader.decrypt(password))
\ No newline at end of file
+		self.assertTrue(reader.decrypt(password))
+
+	def test_multi_pdf(self):
+		pdf = pdfgen.get_multi_pdf([self.html, self.html, self.html])
+		reader = PdfFileReader(io.BytesIO(pdf))
+		self.assertEqual(reader.getNumPages(), 3)
+
+	def test_header_files_are_private_and_removed(self):
+		html, options = pdfgen.prepare_pdf('<div id="header-html">Header</div>' + self.html, {})
+		header = options["header-html"]
+		self.assertEqual(stat.S_IMODE(os.stat(header).st_mode), 0o600)
+
+		# a new file per render, removed after it
+		other_options = pdfgen.prepare_pdf('<div id="header-html">Header</div>', {})[1]
+		self.assertNotEqual(other_options["header-html"], header)
+
+		pdfgen.remove_header_footer(options)
+		pdfgen.remove_header_footer(other_options)
+		self.assertFalse(os.path.exists(header))
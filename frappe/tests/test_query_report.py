@@ -6,7 +6,9 @@ from __future__ import unicode_literals
 import unittest
 
 import frappe
-from frappe.desk.query_report import build_xlsx_data
+from frappe.desk.query_report import (build_xlsx_data, get_existing_link_values, has_match,
+	get_report_cache_key, run as run_report)
+import frappe.share
 import frappe.utils
 
 
@@ -42,3 +44,58 @@ class TestQueryReport(unittest.TestCase):
 
 		for row in xlsx_data:
 			self.assertEqual(type(row), list)
+
+	def test_permission_filter_with_existing_link_values(self):
+		linked_doctypes = {"Role": 0}
+		match_filters = {"ToDo": [{"Role": {"System Manager"}}]}
+		columns_dict = frappe._dict({0: {"fieldname": "role"}, "role": {"fieldname": "role"}})
+		data = [["System Manager"], ["Guest"], ["_Test Missing Role"], [None]]
+
+		existing_values = get_existing_link_values(data, linked_doctypes, match_filters)
+		self.assertEqual(existing_values, {"Role": {"guest"}})
+
+		matched = [row for row in data if has_match(row, linked_doctypes, match_filters, "ToDo",
+			False, columns_dict, "Administrator", existing_values)]
+		self.assertEqual(matched, [["System Manager"], ["_Test Missing Role"], [None]])
+
+	def test_cached_report_result(self):
+		frappe.set_user("Administrator")
+		if not frappe.db.exists("Report", "_Test Cached Report"):
+			frappe.get_doc({
+				"doctype": "Report",
+				"report_name": "_Test Cached Report",
+				"report_type": "Query Report",
+				"ref_doctype": "ToDo",
+				"is_standard": "No",
+				"query": "select name from tabToDo",
+				"result_cache_ttl": 600
+			}).insert()
+
+		frappe.cache().delete_keys("report_result|_Test Cached Report")
+		self.assertFalse(run_report("_Test Cached Report").get("from_cache"))
+		self.assertTrue(run_report("_Test Cached Report").get("from_cache"))
+
+		# modifying a document of the source doctype invalidates the result
+		frappe.get_doc({"doctype": "ToDo", "description": "_Test Cached Report"}).insert()
+		self.assertFalse(run_report("_Test Cached Report").get("from_cache"))
+
+	def test_report_cache_key_shared_by_permissions(self):
+		for email in ("_test_report_cache_1@example.com", "_test_report_cache_2@example.com"):
+			if not frappe.db.exists("User", email):
+				frappe.get_doc({"doctype": "User", "email": email, "first_name": "Test",
+					"send_welcome_email": 0}).insert(ignore_permissions=True)
+
+		report = frappe._dict(name="_Test Cached Report", ref_doctype="ToDo")
+		def get_keys():
+			return [get_report_cache_key(report, {}, email) for email in
+				("_test_report_cache_1@example.com", "_test_report_cache_2@example.com")]
+
+		# users with the same roles and user permissions share the result
+		key_1, key_2 = get_keys()
+		self.assertEqual(key_1, key_2)
+
+		# but not with a user with shared documents
+		todo = frappe.get_doc({"doctype": "ToDo", "description": "_Test Cached Report"}).insert()
+		frappe.share.add("ToDo", todo.name, "_test_report_cache_1@example.com")
+		key_1, key_2 = get_keys()
+		self.assertNotEqual(key_1, key_2)
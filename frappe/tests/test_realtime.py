@@ -0,0 +1,63 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+from __future__ import unicode_literals
+
+import unittest
+import frappe
+from collections import OrderedDict
+from frappe.realtime import collapse_list_updates, pop_throttled_events, LIST_UPDATE_LIMIT
+
+class TestRealtime(unittest.TestCase):
+	def setUp(self):
+		frappe.local.realtime_log = OrderedDict()
+
+	def tearDown(self):
+		frappe.local.realtime_log = OrderedDict()
+		frappe.local.realtime_throttled = None
+
+	def test_coalesce_after_commit(self):
+		for i in range(10):
+			frappe.publish_realtime("data_import_progress", {"progress": i, "data_import": "Import 1"},
+				user="Administrator", after_commit=True)
+			frappe.publish_realtime("doc_update", {"modified": i}, doctype="ToDo", docname="1",
+				after_commit=True)
+
+		events = list(frappe.local.realtime_log.values())
+		self.assertEqual(len(events), 2)
+		self.assertEqual(events[0][1]["progress"], 9)
+		self.assertEqual(events[1][1]["modified"], 9)
+
+	def test_list_updates_of_doctypes_with_same_name(self):
+		for doctype in ("ToDo", "Note"):
+			frappe.publish_realtime("list_update", {"doctype": doctype, "name": "1"}, after_commit=True)
+
+		self.assertEqual(len(frappe.local.realtime_log), 2)
+
+	def test_duplicate_events_are_sent_once(self):
+		for i in range(3):
+			frappe.publish_realtime("msgprint", "Hello", user="Administrator", after_commit=True)
+
+		self.assertEqual(len(frappe.local.realtime_log), 1)
+
+	def test_collapse_list_updates(self):
+		room = frappe.realtime.get_site_room()
+		events = [("list_update", {"doctype": "ToDo", "name": str(i), "user": "Administrator"}, room)
+			for i in range(LIST_UPDATE_LIMIT + 1)]
+		events.append(("list_update", {"doctype": "Note", "name": "1", "user": "Administrator"}, room))
+
+		events = collapse_list_updates(events)
+		self.assertEqual(len(events), 2)
+		self.assertFalse(events[0][1].get("name"))
+		self.assertEqual(events[1][1]["name"], "1")
+
+	def test_progress_is_throttled_per_task(self):
+		frappe.local.realtime_throttled = None
+		for task_id in ("_test_task_1", "_test_task_2"):
+			for i in range(3):
+				frappe.publish_realtime("progress", {"percent": i}, task_id=task_id)
+
+		# first of each task is sent, the latest of the rest is held
+		events = pop_throttled_events()
+		self.assertEqual(sorted((e[1]["task_id"], e[1]["percent"]) for e in events),
+			[("_test_task_1", 2), ("_test_task_2", 2)])
+		self.assertEqual(pop_throttled_events(), [])
@@ -0,0 +1,71 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+from __future__ import unicode_literals
+
+import unittest
+import frappe
+
+class TestRedisWrapper(unittest.TestCase):
+	def setUp(self):
+		self.cache = frappe.cache()
+		self.cache.delete_keys("_test_redis")
+
+	def tearDown(self):
+		self.cache.delete_keys("_test_redis")
+
+	def test_multi_key_values(self):
+		self.cache.set_values({"_test_redis_1": 1, "_test_redis_2": {"a": 2}})
+		frappe.local.cache = {}
+
+		values = self.cache.get_values(["_test_redis_1", "_test_redis_2", "_test_redis_3"])
+		self.assertEqual(values, {"_test_redis_1": 1, "_test_redis_2": {"a": 2}, "_test_redis_3": None})
+
+		self.assertEqual(len(self.cache.get_keys("_test_redis")), 2)
+		self.cache.delete_keys("_test_redis")
+		frappe.local.cache = {}
+		self.assertFalse(self.cache.get_value("_test_redis_1"))
+
+	def test_hget_many(self):
+		self.cache.hset("_test_redis_hash", "a", 1)
+		self.cache.hset("_test_redis_hash", "b", 2)
+		frappe.local.cache = {}
+
+		self.assertEqual(self.cache.hget_many("_test_redis_hash", ["a", "b", "c"]),
+			{"a": 1, "b": 2, "c": None})
+
+	def test_batch(self):
+		self.cache.set_value("_test_redis_1", 1)
+
+		with self.cache.batch():
+			self.cache.set_value("_test_redis_2", 2)
+			self.cache.delete_value("_test_redis_1")
+
+			# writes are not sent yet
+			self.assertTrue(self.cache.get(self.cache.make_key("_test_redis_1")))
+			self.assertFalse(self.cache.get(self.cache.make_key("_test_redis_2")))
+
+			# but are seen by reads of this request
+			self.assertEqual(self.cache.get_value("_test_redis_2"), 2)
+			self.assertEqual(self.cache.get_value("_test_redis_1"), None)
+
+		frappe.local.cache = {}
+		self.assertEqual(self.cache.get_value("_test_redis_1"), None)
+		self.assertEqual(self.cache.get_value("_test_redis_2"), 2)
+
+	def test_batch_reads_own_writes(self):
+		self.cache.set_value("_test_redis_1", 1)
+
+		with self.cache.batch():
+			# set again after delete, with an expiry
+			self.cache.delete_value("_test_redis_1")
+			self.cache.set_value("_test_redis_1", 3, expires_in_sec=60)
+			self.assertEqual(self.cache.get_value("_test_redis_1", expires=True), 3)
+
+			# keys set in the batch are deleted by pattern too
+			self.cache.set_value("_test_redis_3", 3)
+			self.cache.delete_keys("_test_redis_")
+			self.assertEqual(self.cache.get_value("_test_redis_3"), None)
+
+		frappe.local.cache = {}
+		self.assertEqual(self.cache.get_value("_test_redis_1"), None)
+		self.assertEqual(self.cache.get_value("_test_redis_3"), None)
@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 from unittest import TestCase
 from dateutil.relativedelta import relativedelta
 from frappe.utils.scheduler import (enqueue_applicable_events, restrict_scheduler_events_if_dormant,
-	get_enabled_scheduler_events)
+	get_enabled_scheduler_events, get_due_sites, set_next_run, reset_next_run, get_seconds_to_next_event)
 from frappe import _dict
 from frappe.utils.background_jobs import enqueue
 from frappe.utils import now_datetime, today, add_days, add_to_date
@@ -66,9 +66,38 @@ class TestScheduler(TestCase):
 
 		frappe.flags.enabled_events = None
 
+	def test_next_run(self):
+		site = frappe.local.site
+		reset_next_run()
+		self.assertTrue(site in get_due_sites([site]))
 
+		set_next_run(site, 60)
+		self.assertFalse(site in get_due_sites([site]))
 
+		reset_next_run()
+		self.assertTrue(site in get_due_sites([site]))
 
+	def test_reset_next_run_without_redis(self):
+		import redis
+		from frappe.utils import background_jobs
+
+		connection = background_jobs.get_redis_conn()
+		background_jobs.redis_connection = redis.Redis(port=1)
+		try:
+			# saving settings or logging in must not fail
+			reset_next_run()
+		finally:
+			background_jobs.redis_connection = connection
+
+	def test_seconds_to_next_event(self):
+		frappe.flags.enabled_events = ["hourly"]
+
+		# "all" is always due within the scheduler interval
+		nowtime = now_datetime().replace(minute=1, second=0, microsecond=0)
+		seconds = get_seconds_to_next_event(nowtime)
+		self.assertTrue(0 < seconds <= (frappe.get_conf().scheduler_interval or 240))
+
+		frappe.flags.enabled_events = None
 
 	def test_job_timeout(self):
 		job = enqueue(test_timeout, timeout=10)
@@ -48,5 +48,33 @@ class TestSearch(unittest.TestCase):
 		result = [['found' for x in y if x=="Country"] for y in output]
 		self.assertTrue(['found'] in result)
 
+	def test_link_search_index(self):
+		from frappe.utils.link_search import rebuild_for_doctype, get_built_key
+
+		frappe.conf.link_search_doctypes = ["ToDo"]
+		try:
+			rebuild_for_doctype("ToDo")
+			todo = frappe.get_doc({"doctype": "ToDo", "description": "_Test Link Search Quokka"}).insert()
+
+			search_link("ToDo", "link quok")
+			self.assertTrue(todo.name in [d["value"] for d in frappe.response["results"]])
+
+			# maintained on update
+			todo.description = "_Test Link Search Wombat"
+			todo.save()
+			search_link("ToDo", "quokka")
+			self.assertFalse(todo.name in [d["value"] for d in frappe.response["results"]])
+			search_link("ToDo", "wom")
+			self.assertTrue(todo.name in [d["value"] for d in frappe.response["results"]])
+
+			# titles starting with the text first
+			first = frappe.get_doc({"doctype": "ToDo", "description": "Wombat _Test Link Search"}).insert()
+			search_link("ToDo", "wombat")
+			self.assertEqual(frappe.response["results"][0]["value"], first.name)
+
+		finally:
+			frappe.conf.link_search_doctypes = None
+			frappe.db.set_global(get_built_key("ToDo"), 0)
+
 	def tearDown(self):
 		frappe.local.lang = 'en'
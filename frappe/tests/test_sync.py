@@ -0,0 +1,31 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+from __future__ import unicode_literals
+
+import unittest
+import frappe
+from frappe.model.sync import (get_changed_files, update_sync_manifest, get_manifest_key,
+	add_pending_tables, sync_pending_tables, SYNC_MANIFEST, PENDING_TABLES)
+
+class TestSync(unittest.TestCase):
+	def setUp(self):
+		self.path = frappe.get_app_path("frappe", "desk", "doctype", "note", "note.json")
+		frappe.db.sql("delete from `tabDefaultValue` where parent=%s and defkey=%s",
+			(SYNC_MANIFEST, get_manifest_key("frappe", self.path)))
+
+	def test_unchanged_files_are_skipped(self):
+		self.assertEqual(len(get_changed_files("frappe", [self.path])), 1)
+
+		update_sync_manifest(get_changed_files("frappe", [self.path]))
+		self.assertEqual(get_changed_files("frappe", [self.path]), [])
+
+		# unless forced
+		self.assertEqual(len(get_changed_files("frappe", [self.path], force=True)), 1)
+
+	def test_pending_tables_are_updated_by_next_sync(self):
+		# a DocType committed without its deferred schema update
+		add_pending_tables([frappe.get_doc("DocType", "Note")])
+		self.assertTrue(frappe.db.exists("DefaultValue", {"parent": PENDING_TABLES, "defkey": "Note"}))
+
+		sync_pending_tables()
+		self.assertFalse(frappe.db.exists("DefaultValue", {"parent": PENDING_TABLES, "defkey": "Note"}))
@@ -122,3 +122,19 @@ class TestHTMLUtils(unittest.TestCase):
 		clean = clean_email_html(sample)
 		self.assertTrue('<h1>Hello</h1>' in clean)
 		self.assertTrue('<a href="http://test.com">text</a>' in clean)
+
+class TestJSONResponse(unittest.TestCase):
+	def test_chunked_list(self):
+		import json, datetime, decimal
+		import frappe
+		from frappe.utils.response import get_json_chunks, json_dumps, JSON_CHUNK_SIZE
+
+		rows = [{"name": str(i), "modified": datetime.datetime(2019, 1, 1, 10, 0, 0),
+			"amount": decimal.Decimal("1.5")} for i in range(JSON_CHUNK_SIZE * 2 + 1)]
+		response = {"message": rows, "exc": "test"}
+
+		data = json.loads(frappe.safe_decode(b"".join(get_json_chunks(response, "message"))))
+		self.assertEqual(data, json.loads(frappe.safe_decode(json_dumps(response))))
+		self.assertEqual(len(data["message"]), len(rows))
+		self.assertEqual(data["message"][0]["modified"], "2019-01-01 10:00:00")
+		self.assertEqual(data["exc"], "test")
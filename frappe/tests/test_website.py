@@ -77,3 +77,34 @@ class TestWebsite(unittest.TestCase):
 		delattr(frappe.hooks, 'website_redirects')
 		frappe.cache().delete_key('app_hooks')
 
+	def test_route_table(self):
+		from frappe.website.router import get_route_table
+
+		route_table = get_route_table()
+		self.assertIs(get_route_table(), route_table)
+		for route in frappe.db.sql_list("select route from `tabWeb Form`"):
+			self.assertTrue(render.is_web_form(route))
+
+		# rebuilt after website cache is cleared
+		render.clear_cache()
+		self.assertIsNot(get_route_table(), route_table)
+
+	def test_conditional_response(self):
+		from frappe.website.render import make_page_cache_entry, get_conditional_response
+
+		set_request(method='GET', path='/test-etag')
+		make_page_cache_entry("<p>Test ETag</p>")
+		response = get_conditional_response("test-etag", "<p>Test ETag</p>")
+		self.assertEquals(response.status_code, 200)
+
+		set_request(method='GET', path='/test-etag', headers={"If-None-Match": response.headers["ETag"]})
+		response = get_conditional_response("test-etag", "<p>Test ETag</p>")
+		self.assertEquals(response.status_code, 304)
+		self.assertFalse(response.get_data())
+
+		# the csrf token of a session page may have changed since, only the ETag is checked
+		last_modified = response.headers["Last-Modified"]
+		set_request(method='GET', path='/test-etag', headers={"If-Modified-Since": last_modified})
+		self.assertEquals(get_conditional_response("test-etag", "<p>Test ETag</p>").status_code, 304)
+		self.assertEquals(get_conditional_response("test-etag", "<p>Test ETag</p>",
+			session_page=True).status_code, 200)
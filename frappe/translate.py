@@ -15,6 +15,8 @@ from six import iteritems, text_type, string_types, PY2
 import frappe, os, re, io, codecs, json
 from frappe.model.utils import render_include, InvalidIncludePath
 from frappe.utils import strip, strip_html_tags, is_html
+from frappe.utils import translation_catalog
+from frappe.utils.translation_catalog import LayeredCatalog
 from jinja2 import TemplateError
 import itertools, operator
 
@@ -174,7 +176,8 @@ def get_lang_js(fortype, name):
 	return "\n\n$.extend(frappe._messages, %s)" % json.dumps(get_dict(fortype, name))
 
 def get_full_dict(lang):
-	"""Load and return the entire translations dictionary for a language from :meth:`frape.cache`
+	"""Load and return the entire translations dictionary for a language, from its compiled
+	catalog if one has been built (see :meth:`build_catalogs`), else from :meth:`frape.cache`
 
 	:param lang: Language Code, e.g. `hi`
 	"""
@@ -182,10 +185,16 @@ def get_full_dict(lang):
 		return {}
 
 	# found in local, return!
-	if getattr(frappe.local, 'lang_full_dict', None) and frappe.local.lang_full_dict.get(lang, None):
+	if getattr(frappe.local, 'lang_full_dict', None) is not None \
+		and getattr(frappe.local, 'lang_full_dict_lang', None) == lang:
 		return frappe.local.lang_full_dict
 
-	frappe.local.lang_full_dict = load_lang(lang)
+	catalog = get_catalog(lang)
+	if catalog:
+		frappe.local.lang_full_dict = LayeredCatalog(catalog, lang)
+	else:
+		frappe.local.lang_full_dict = load_lang(lang)
+	frappe.local.lang_full_dict_lang = lang
 
 	try:
 		# get user specific transaltion data
@@ -208,21 +217,82 @@ def load_lang(lang, apps=None):
 
 	out = frappe.cache().hget("lang_full_dict", lang, shared=True)
 	if not out:
-		out = {}
-		for app in (apps or frappe.get_all_apps(True)):
-			path = os.path.join(frappe.get_pymodule_path(app), "translations", lang + ".csv")
-			out.update(get_translation_dict_from_file(path, lang, app) or {})
-
-		if '-' in lang:
-			parent = lang.split('-')[0]
-			parent_out = load_lang(parent)
-			parent_out.update(out)
-			out = parent_out
-
+		out = get_lang_from_files(lang, apps)
 		frappe.cache().hset("lang_full_dict", lang, out, shared=True)
 
 	return out or {}
 
+def get_lang_from_files(lang, apps=None):
+	"""Read translations of a language from the `.csv` files of all `apps`"""
+	out = {}
+	for app in (apps or frappe.get_all_apps(True)):
+		path = os.path.join(frappe.get_pymodule_path(app), "translations", lang + ".csv")
+		out.update(get_translation_dict_from_file(path, lang, app) or {})
+
+	if '-' in lang:
+		parent = lang.split('-')[0]
+		parent_out = get_lang_from_files(parent, apps)
+		parent_out.update(out)
+		out = parent_out
+
+	return out
+
+def get_catalog(lang):
+	"""Returns the compiled translation catalog of a language, if built"""
+	if lang=='en':
+		return None
+
+	return translation_catalog.get_catalog(get_catalog_path(lang))
+
+def get_catalog_path(lang):
+	return os.path.join(frappe.local.sites_path, "assets", "translations", lang + ".catalog")
+
+def build_catalogs(apps=None):
+	"""Compile the `.csv` translations of all `apps` into one binary catalog per language,
+	so that :meth:`frappe._` can look up messages without loading the full dictionary"""
+	apps = apps or frappe.get_all_apps(True)
+
+	languages = set()
+	for app in apps:
+		path = frappe.get_pymodule_path(app, "translations")
+		if os.path.exists(path):
+			languages.update(fname[:-4] for fname in os.listdir(path) if fname.endswith(".csv"))
+
+	for lang in languages:
+		if lang != 'en':
+			build_catalog(lang, apps)
+
+def build_catalog(lang, apps=None):
+	"""Compile the `.csv` translations of a language into its catalog"""
+	frappe.create_folder(os.path.dirname(get_catalog_path(lang)))
+	translation_catalog.write_catalog(get_catalog_path(lang),
+		get_lang_from_files(lang, apps or frappe.get_all_apps(True)))
+
+def rebuild_stale_catalogs():
+	"""Rebuild the catalogs that are older than a `.csv` file of their language,
+	e.g. after translations are imported or the files are edited"""
+	folder = os.path.dirname(get_catalog_path("en"))
+	if not os.path.exists(folder):
+		return
+
+	apps = frappe.get_all_apps(True)
+	for fname in os.listdir(folder):
+		if not fname.endswith(".catalog"):
+			continue
+
+		lang = fname[:-len(".catalog")]
+		built = os.path.getmtime(os.path.join(folder, fname))
+		if any(os.path.getmtime(path) > built for path in get_translation_files(lang, apps)):
+			build_catalog(lang, apps)
+
+def get_translation_files(lang, apps):
+	"""Returns paths of the existing `.csv` files of a language (and its parent language)"""
+	langs = [lang, lang.split('-')[0]] if '-' in lang else [lang]
+	paths = [os.path.join(frappe.get_pymodule_path(app), "translations", l + ".csv")
+		for app in apps for l in langs]
+
+	return [path for path in paths if os.path.exists(path)]
+
 def get_translation_dict_from_file(path, lang, app):
 	"""load translation dict from given path"""
 	cleaned = {}
@@ -266,6 +336,9 @@ def clear_cache():
 	cache.delete_key("lang_full_dict", shared=True)
 	cache.delete_key("translation_assets", shared=True)
 	cache.delete_key("lang_user_translations")
+	frappe.local.lang_full_dict = None
+
+	rebuild_stale_catalogs()
 
 def get_messages_for_app(app):
 	"""Returns all messages (list) for a specified `app`"""
@@ -648,6 +721,8 @@ def update_translations(lang, untranslated_file, translated_file):
 	for app in frappe.get_all_apps(True):
 		write_translations_file(app, lang, full_dict)
 
+	rebuild_stale_catalogs()
+
 def import_translations(lang, path):
 	"""Import translations from file in standard format"""
 	clear_cache()
@@ -657,6 +732,8 @@ def import_translations(lang, path):
 	for app in frappe.get_all_apps(True):
 		write_translations_file(app, lang, full_dict)
 
+	rebuild_stale_catalogs()
+
 
 def rebuild_all_translation_files():
 	"""Rebuild all translation files: `[app]/translations/[lang].csv`."""
@@ -1,13 +1,18 @@
 from __future__ import unicode_literals, print_function
 import redis
 from rq import Connection, Queue, Worker
+from rq.exceptions import DequeueTimeout
+from rq.job import Job, JobStatus, get_current_job
 from rq.logutils import setup_loghandlers
+from rq.worker import WorkerStatus
 from frappe.utils import cstr
 from collections import defaultdict
+from datetime import datetime
 import frappe
-import os, socket, time
+import os, socket, time, random, uuid, json
 from frappe import _
 from six import string_types
+from six.moves import cPickle as pickle
 
 # imports - third-party imports
 
@@ -21,8 +26,82 @@ queue_timeout = {
 
 redis_connection = None
 
+# sorted set of jobs to be enqueued later (retries), scored by due time
+DELAYED_JOBS_KEY = 'delayed_jobs'
+
+# sorted set per site (`site_running_jobs:<site>`) of the ids of running jobs, scored by the
+# time they expire (their timeout), so that jobs of killed workers stop being counted
+RUNNING_JOBS_KEY = 'site_running_jobs'
+
+# seconds a running job is counted beyond its timeout
+RUNNING_JOB_GRACE_PERIOD = 60
+
+# hash of `<site>:<queue>:count` and `<site>:<queue>:total` seconds jobs waited in the queue
+JOB_WAIT_TIME_KEY = 'job_wait_time'
+
+# jobs of a priority lane are picked before the other jobs of the queue
+priorities = ('high',)
+
+# override per method via the `job_retry_policy` hook, e.g.
+# job_retry_policy = {"app.module.method": {"max_retries": 3}}
+default_retry_policy = {
+	'max_retries': 5,
+	'base_delay': 1,  # seconds, doubled on each retry
+	'max_delay': 300,
+}
+
+# seconds after which a registered job that rq does not know is considered lost,
+# jobs are registered just before they are enqueued
+REGISTRY_GRACE_PERIOD = 60
+
+# add a job id to the job ids of the site and count it in the registry. A retry takes over
+# the registration of the failed run (ARGV[4]), if it is still registered
+register_job_script = '''
+if ARGV[4] ~= '' and redis.call('hdel', KEYS[2], ARGV[4]) == 1 then
+	redis.call('hset', KEYS[2], ARGV[1], ARGV[3])
+	return 0
+end
+if redis.call('hsetnx', KEYS[2], ARGV[1], ARGV[3]) == 1 then
+	redis.call('hincrby', KEYS[1], ARGV[2], 1)
+end
+return 1
+'''
+
+# remove a job id and decrement the count of its job in the registry, removing it at zero.
+# Does nothing if the job id is not registered, so a job is never unregistered twice
+unregister_job_script = '''
+local entry = redis.call('hget', KEYS[2], ARGV[1])
+if not entry then
+	return 0
+end
+redis.call('hdel', KEYS[2], ARGV[1])
+local job_key = cjson.decode(entry)[1]
+if redis.call('hincrby', KEYS[1], job_key, -1) <= 0 then
+	redis.call('hdel', KEYS[1], job_key)
+end
+return 1
+'''
+
+# remove lost job ids (ARGV) and recount the registry from the job ids left
+reconcile_registry_script = '''
+for i, job_id in ipairs(ARGV) do
+	redis.call('hdel', KEYS[2], job_id)
+end
+local counts = {}
+for i, entry in ipairs(redis.call('hvals', KEYS[2])) do
+	local job_key = cjson.decode(entry)[1]
+	counts[job_key] = (counts[job_key] or 0) + 1
+end
+redis.call('del', KEYS[1])
+for job_key, count in pairs(counts) do
+	redis.call('hset', KEYS[1], job_key, count)
+end
+return #ARGV
+'''
+
 def enqueue(method, queue='default', timeout=None, event=None,
-	is_async=True, job_name=None, now=False, enqueue_after_commit=False, **kwargs):
+	is_async=True, job_name=None, now=False, enqueue_after_commit=False, deduplicate=False,
+	priority=None, **kwargs):
 	'''
 		Enqueue method to be executed using a background worker
 
@@ -33,6 +112,10 @@ def enqueue(method, queue='default', timeout=None, event=None,
 		:param is_async: if is_async=False, the method is executed immediately, else via a worker
 		:param job_name: can be used to name an enqueue call, which can be used to prevent duplicate calls
 		:param now: if now=True, the method is executed via frappe.call
+		:param deduplicate: if deduplicate=True, the job is not enqueued if a job of the same method
+			and job_name is already queued or running for the site
+		:param priority: set priority='high' for short interactive jobs, to run them before
+			the other queued jobs of the site
 		:param kwargs: keyword arguments to be passed to the method
 	'''
 	# To handle older implementations
@@ -41,7 +124,8 @@ def enqueue(method, queue='default', timeout=None, event=None,
 	if now or frappe.flags.in_migrate:
 		return frappe.call(method, **kwargs)
 
-	q = get_queue(queue, is_async=is_async)
+	validate_queue(queue)
+	validate_priority(priority)
 	if not timeout:
 		timeout = queue_timeout.get(queue) or 300
 	queue_args = {
@@ -51,8 +135,14 @@ def enqueue(method, queue='default', timeout=None, event=None,
 		"event": event,
 		"job_name": job_name or cstr(method),
 		"is_async": is_async,
+		"queue": queue,
+		"priority": priority,
 		"kwargs": kwargs
 	}
+
+	if deduplicate and is_async and is_job_queued(method, queue_args["job_name"]):
+		return None
+
 	if enqueue_after_commit:
 		if not frappe.flags.enqueue_after_commit:
 			frappe.flags.enqueue_after_commit = []
@@ -65,8 +155,20 @@ def enqueue(method, queue='default', timeout=None, event=None,
 		})
 		return frappe.flags.enqueue_after_commit
 	else:
-		return q.enqueue_call(execute_job, timeout=timeout,
-			kwargs=queue_args)
+		return enqueue_job(queue, queue_args, timeout, is_async=is_async)
+
+def enqueue_job(queue, queue_args, timeout=None, is_async=True, registered_id=None):
+	'''Enqueue `execute_job` with `queue_args` in the sub-queue of the site,
+	adding the job to the job registry of the site. A retry passes the job id of the
+	failed run as `registered_id`, to take over its registration'''
+	q = get_queue(queue, is_async=is_async, site=queue_args['site'],
+		priority=queue_args.get('priority'))
+	job_id = None
+	if is_async:
+		job_id = uuid.uuid4().hex
+		register_job(queue, queue_args, job_id, registered_id)
+
+	return q.enqueue_call(execute_job, timeout=timeout, kwargs=queue_args, job_id=job_id)
 
 def enqueue_doc(doctype, name=None, method=None, queue='default', timeout=300,
 	now=False, **kwargs):
@@ -77,7 +179,8 @@ def enqueue_doc(doctype, name=None, method=None, queue='default', timeout=300,
 def run_doc_method(doctype, name, doc_method, **kwargs):
 	getattr(frappe.get_doc(doctype, name), doc_method)(**kwargs)
 
-def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True, retry=0):
+def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True, retry=0, queue=None,
+	priority=None):
 	'''Executes job in a worker, performs commit/rollback and logs if there is any error'''
 	from frappe.utils.scheduler import log
 
@@ -89,6 +192,8 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 		if user:
 			frappe.set_user(user)
 
+	queued_method = method
+	retry_scheduled = False
 	if isinstance(method, string_types):
 		method_name = method
 		method = frappe.get_attr(method)
@@ -101,13 +206,21 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 	except (frappe.db.InternalError, frappe.RetryBackgroundJobError) as e:
 		frappe.db.rollback()
 
-		if (retry < 5 and
+		if (retry < get_retry_policy(method_name)['max_retries'] and
 			(isinstance(e, frappe.RetryBackgroundJobError) or
 				(frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e)))):
 			# retry the job if
 			# 1213 = deadlock
 			# 1205 = lock wait timeout
 			# or RetryBackgroundJobError is explicitly raised
+			if is_async:
+				# free the worker, the job is enqueued again by the scheduler when due.
+				# It stays in the job registry meanwhile, so that it is not enqueued twice
+				retry_scheduled = True
+				return schedule_retry(dict(site=site, user=user, method=queued_method, event=event,
+					job_name=job_name, kwargs=kwargs, is_async=is_async, retry=retry+1, queue=queue,
+					priority=priority), method_name)
+
 			frappe.destroy()
 			time.sleep(retry+1)
 
@@ -128,13 +241,68 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 
 	finally:
 		if is_async:
+			if not retry_scheduled:
+				unregister_job(site, get_current_job().id)
 			frappe.destroy()
 
+def get_retry_policy(method_name):
+	policy = frappe._dict(default_retry_policy)
+	method_policy = (frappe.get_hooks('job_retry_policy') or {}).get(method_name)
+	if method_policy:
+		policy.update(method_policy[-1])
+
+	return policy
+
+def schedule_retry(queue_args, method_name, registered_id=None):
+	'''Add the job to the delayed jobs, due after an exponential backoff with jitter.
+	It stays registered under `registered_id` (the current job by default) until enqueued'''
+	policy = get_retry_policy(method_name)
+	retry = queue_args['retry']
+
+	delay = min(policy.max_delay, policy.base_delay * (2 ** (retry - 1)))
+	delay *= random.uniform(0.5, 1.5)
+
+	current_job = get_current_job()
+	job = {
+		'id': uuid.uuid4().hex,
+		'queue': queue_args['queue'] or (parse_queue_name(current_job.origin)[0]
+			if current_job else 'default'),
+		'timeout': current_job.timeout if current_job else None,
+		'registered_id': registered_id or (current_job.id if current_job else None),
+		'queue_args': queue_args
+	}
+
+	conn = get_redis_conn()
+	pipe = conn.pipeline()
+	pipe.zadd(DELAYED_JOBS_KEY, pickle.dumps(job), time.time() + delay)
+	pipe.hincrby('job_retries', method_name, 1)
+	pipe.execute()
+
+	frappe.logger(__name__).info('retry {0} of {1} for {2} in {3:.1f}s'.format(retry,
+		method_name, queue_args['site'], delay))
+
+def enqueue_delayed_jobs():
+	'''Enqueue delayed jobs that are due. Called by the scheduler process'''
+	conn = get_redis_conn()
+	for payload in conn.zrangebyscore(DELAYED_JOBS_KEY, 0, time.time(), start=0, num=1000):
+		# enqueue only if this process claimed the job
+		if conn.zrem(DELAYED_JOBS_KEY, payload):
+			job = pickle.loads(payload)
+			job['queue_args']['queue'] = job['queue']
+			enqueue_job(job['queue'], job['queue_args'], timeout=job['timeout'],
+				registered_id=job.get('registered_id'))
+
+def get_retry_counts():
+	'''Returns number of retries scheduled per method'''
+	return {cstr(method): int(count) for method, count in get_redis_conn().hgetall('job_retries').items()}
+
 def start_worker(queue=None, quiet = False):
 	'''Wrapper to start rq worker. Connects to redis and monitors these queues.'''
 	with frappe.init_site():
 		# empty init is required to get redis_queue from common_site_config.json
 		redis_connection = get_redis_conn()
+		site_weights = frappe.local.conf.site_queue_weights or {}
+		max_jobs_per_site = frappe.local.conf.max_jobs_per_site or 0
 
 	if os.environ.get('CI'):
 		setup_loghandlers('ERROR')
@@ -144,7 +312,120 @@ def start_worker(queue=None, quiet = False):
 		logging_level = "INFO"
 		if quiet:
 			logging_level = "WARNING"
-		Worker(queues, name=get_worker_name(queue)).work(logging_level = logging_level)
+		FairWorker(queues, name=get_worker_name(queue), site_weights=site_weights,
+			max_jobs_per_site=max_jobs_per_site).work(logging_level = logging_level)
+
+class FairWorker(Worker):
+	'''Worker that picks jobs from the sub-queues of sites fairly, so that a burst of jobs
+	from one site does not hold up the jobs of other sites.
+
+	Queues are checked in this order:
+
+	- high priority lanes of the sites
+	- sub-queues of the sites, the site that has been served the least (relative to its
+	weight in `site_queue_weights`) first. Sites running `max_jobs_per_site` jobs are skipped
+	- the shared queues, for jobs enqueued without a site
+	'''
+	# seconds to wait for a job before checking for new sub-queues
+	poll_interval = 5
+
+	def __init__(self, queues, site_weights=None, max_jobs_per_site=0, **kwargs):
+		super(FairWorker, self).__init__(queues, **kwargs)
+		self.queue_list = [q.name for q in self.queues]
+		self.site_weights = site_weights or {}
+		self.max_jobs_per_site = max_jobs_per_site
+		self.served = {}
+
+	def dequeue_job_and_maintain_ttl(self, timeout):
+		result = None
+		self.set_state(WorkerStatus.IDLE)
+		self.procline('Listening on ' + ','.join(self.queue_list))
+
+		while True:
+			self.heartbeat()
+			self.queues = self.get_ordered_queues()
+
+			try:
+				result = self.queue_class.dequeue_any(self.queues,
+					timeout and min(timeout, self.poll_interval),
+					connection=self.connection, job_class=self.job_class)
+				if result is not None:
+					job, queue = result
+					self.log.info('{0}: {1} ({2})'.format(queue.name, job.description, job.id))
+
+				break
+			except DequeueTimeout:
+				pass
+
+		self.heartbeat()
+		return result
+
+	def get_ordered_queues(self):
+		site_queues = get_site_queues(self.queue_list, connection=self.connection)
+		running = get_running_jobs(set(parse_queue_name(q.name)[2] for q in site_queues),
+			connection=self.connection)
+		min_served = min(self.served.values()) if self.served else 0
+
+		def get_sort_key(queue):
+			queue_name, priority, site = parse_queue_name(queue.name)
+			if not site:
+				return (2, 0, self.queue_list.index(queue_name))
+
+			# new sites start level with the others
+			served = self.served.setdefault(site, min_served)
+			return (0 if priority else 1, served, self.queue_list.index(queue_name))
+
+		queues = [q for q in site_queues if not self.is_over_limit(q.name, running)]
+
+		return sorted(queues, key=get_sort_key) or [Queue(name, connection=self.connection)
+			for name in self.queue_list]
+
+	def is_over_limit(self, queue_name, running):
+		queue_name, priority, site = parse_queue_name(queue_name)
+		return bool(site and not priority and self.max_jobs_per_site
+			and running.get(site, 0) >= self.max_jobs_per_site)
+
+	def execute_job(self, job, queue):
+		queue_name, priority, site = parse_queue_name(queue.name)
+		if not site:
+			return super(FairWorker, self).execute_job(job, queue)
+
+		self.served[site] = self.served.get(site, 0) + 1.0 / (self.site_weights.get(site) or 1)
+
+		# counted until the job ends or times out, in case this worker is killed before it ends
+		timeout = job.timeout if job.timeout and job.timeout > 0 else \
+			queue_timeout.get(queue_name, default_timeout)
+		running_jobs_key = get_running_jobs_key(site)
+
+		pipe = self.connection.pipeline()
+		pipe.zremrangebyscore(running_jobs_key, '-inf', time.time())
+		pipe.zadd(running_jobs_key, job.id, time.time() + timeout + RUNNING_JOB_GRACE_PERIOD)
+		if job.enqueued_at:
+			field = '{0}:{1}'.format(site, queue_name)
+			pipe.hincrby(JOB_WAIT_TIME_KEY, field + ':count', 1)
+			pipe.hincrbyfloat(JOB_WAIT_TIME_KEY, field + ':total',
+				max((datetime.utcnow() - job.enqueued_at).total_seconds(), 0))
+		pipe.execute()
+
+		try:
+			return super(FairWorker, self).execute_job(job, queue)
+		finally:
+			self.connection.zrem(running_jobs_key, job.id)
+
+def get_running_jobs_key(site):
+	return '{0}:{1}'.format(RUNNING_JOBS_KEY, site)
+
+def get_running_jobs(sites, connection=None):
+	'''Returns number of jobs running per site, for `sites`'''
+	sites = [site for site in sites if site]
+	connection = connection or get_redis_conn()
+	now = time.time()
+
+	pipe = connection.pipeline()
+	for site in sites:
+		pipe.zcount(get_running_jobs_key(site), now, '+inf')
+
+	return dict(zip(sites, pipe.execute()))
 
 def get_worker_name(queue):
 	'''When limiting worker to a specific queue, also append queue name to default worker name'''
@@ -159,27 +440,133 @@ def get_worker_name(queue):
 
 	return name
 
+def get_job_registry_key(site):
+	'''Hash of jobs queued or running for the site, field `[queue, method, job_name]`, value count'''
+	return 'job_registry:' + site
+
+def get_job_ids_key(site):
+	'''Hash of the job ids counted in the job registry of the site,
+	value `[job key, registered at]`'''
+	return 'job_ids:' + site
+
+def get_job_key(queue, method, job_name):
+	if not isinstance(method, string_types):
+		method = '{0}.{1}'.format(method.__module__, method.__name__)
+
+	return json.dumps([queue, method, cstr(job_name)])
+
+def register_job(queue, queue_args, job_id, registered_id=None):
+	site = queue_args['site']
+	job_key = get_job_key(queue, queue_args['method'], queue_args['job_name'])
+	get_redis_conn().eval(register_job_script, 2, get_job_registry_key(site), get_job_ids_key(site),
+		job_id, job_key, json.dumps([job_key, time.time()]), registered_id or '')
+
+def unregister_job(site, job_id):
+	try:
+		get_redis_conn().eval(unregister_job_script, 2, get_job_registry_key(site),
+			get_job_ids_key(site), job_id)
+	except redis.exceptions.ConnectionError:
+		pass
+
+def is_job_queued(method, job_name=None, site=None, queue=None):
+	'''Returns True if a job of this method (and job_name) is queued or running for the site'''
+	site = site or frappe.local.site
+	job_name = job_name or cstr(method)
+	fields = [get_job_key(q, method, job_name) for q in get_queue_list(queue)]
+	conn = get_redis_conn()
+
+	if not any(conn.hmget(get_job_registry_key(site), fields)):
+		return False
+
+	# jobs killed without finishing are only dropped by `rebuild_job_registry`, drop those of
+	# this job now, so that they do not hold up its next run
+	entries = {}
+	for job_id, entry in conn.hgetall(get_job_ids_key(site)).items():
+		entry = json.loads(cstr(entry))
+		if entry[0] in fields:
+			entries[cstr(job_id)] = entry
+
+	for job_id in get_lost_job_ids(entries, connection=conn):
+		unregister_job(site, job_id)
+
+	return any(conn.hmget(get_job_registry_key(site), fields))
+
 def get_jobs(site=None, queue=None, key='method'):
-	'''Gets jobs per queue or per site or both'''
-	jobs_per_site = defaultdict(list)
-	for queue in get_queue_list(queue):
-		q = get_queue(queue)
+	'''Gets jobs queued or running per queue or per site or both, from the job registry
 
-		for job in q.jobs:
-			if job.kwargs.get('site'):
-				if site is None:
-					# get jobs for all sites
-					jobs_per_site[job.kwargs['site']].append(job.kwargs[key])
+	:param key: `method` or `job_name`'''
+	jobs_per_site = defaultdict(list)
+	conn = get_redis_conn()
+	queues = get_queue_list(queue)
 
-				elif job.kwargs['site'] == site:
-					# get jobs only for given site
-					jobs_per_site[site].append(job.kwargs[key])
+	if site:
+		registry_keys = [get_job_registry_key(site)]
+	else:
+		registry_keys = conn.scan_iter(match=get_job_registry_key('*'), count=1000)
 
-			else:
-				print('No site found in job', job.__dict__)
+	for registry_key in registry_keys:
+		job_site = cstr(registry_key).split(':', 1)[1]
+		for field in conn.hkeys(registry_key):
+			job_queue, method, job_name = json.loads(cstr(field))
+			if job_queue in queues:
+				jobs_per_site[job_site].append(method if key=='method' else job_name)
 
 	return jobs_per_site
 
+def rebuild_job_registry():
+	'''Drop jobs that were lost without finishing (e.g. killed workers) from the job registry.
+
+	Ids of lost jobs (see `get_lost_job_ids`) are removed and the counts of the site are
+	recomputed from the ids left, in one script, so that jobs registered or unregistered
+	meanwhile are not affected'''
+	conn = get_redis_conn()
+	sites = set(cstr(key).split(':', 1)[1]
+		for pattern in (get_job_ids_key('*'), get_job_registry_key('*'))
+		for key in conn.scan_iter(match=pattern, count=1000))
+
+	for site in sites:
+		entries = dict((cstr(job_id), json.loads(cstr(entry))) for job_id, entry in
+			conn.hgetall(get_job_ids_key(site)).items())
+
+		conn.eval(reconcile_registry_script, 2, get_job_registry_key(site), get_job_ids_key(site),
+			*get_lost_job_ids(entries, connection=conn))
+
+def get_lost_job_ids(entries, connection=None):
+	'''Returns ids of registered jobs (`{job id: [job key, registered at]}`) that were lost
+	without unregistering: finished, failed or gone in rq, or still started after their
+	timeout (killed workers). Jobs waiting for a retry are not lost'''
+	from rq.registry import StartedJobRegistry
+
+	conn = connection or get_redis_conn()
+	job_ids = list(entries)
+
+	pipe = conn.pipeline()
+	for job_id in job_ids:
+		pipe.hmget(Job.key_for(job_id), 'status', 'origin')
+	jobs = [(cstr(status) if status else None, cstr(origin)) for status, origin in pipe.execute()]
+
+	# started jobs are in the started job registry of their queue until their timeout
+	pipe = conn.pipeline()
+	for job_id, (status, origin) in zip(job_ids, jobs):
+		pipe.zscore(StartedJobRegistry(origin, connection=conn).key, job_id)
+	timeouts = pipe.execute()
+
+	# read after the statuses, a retry is scheduled before its failed run finishes
+	delayed = set(pickle.loads(payload).get('registered_id') for payload in
+		conn.zrange(DELAYED_JOBS_KEY, 0, -1))
+
+	now = time.time()
+	lost = []
+	for job_id, (status, origin), timeout in zip(job_ids, jobs, timeouts):
+		if job_id in delayed or status in (JobStatus.QUEUED, JobStatus.DEFERRED):
+			continue
+		if status == JobStatus.STARTED and timeout and timeout > now:
+			continue
+		if now - entries[job_id][1] > REGISTRY_GRACE_PERIOD:
+			lost.append(job_id)
+
+	return lost
+
 def get_queue_list(queue_list=None):
 	'''Defines possible queues. Also wraps a given queue in a list after validating.'''
 	default_queue_list = list(queue_timeout)
@@ -195,8 +582,9 @@ def get_queue_list(queue_list=None):
 	else:
 		return default_queue_list
 
-def get_queue(queue, is_async=True):
-	'''Returns a Queue object tied to a redis connection'''
+def get_queue(queue, is_async=True, site=None, priority=None):
+	'''Returns a Queue object tied to a redis connection. If site is set, returns the
+	sub-queue of the site (in the priority lane, if set)'''
 	validate_queue(queue)
 
 	kwargs = {
@@ -204,7 +592,67 @@ def get_queue(queue, is_async=True):
 		'async': is_async
 	}
 
-	return Queue(queue, **kwargs)
+	return Queue(get_queue_name(queue, site, priority), **kwargs)
+
+def get_queue_name(queue, site=None, priority=None):
+	'''Returns name of the sub-queue, e.g. `short:site1.local` or `short:high:site1.local`'''
+	if not site:
+		return queue
+
+	if priority:
+		return '{0}:{1}:{2}'.format(queue, priority, site)
+
+	return '{0}:{1}'.format(queue, site)
+
+def parse_queue_name(name):
+	'''Returns (queue, priority, site) from the name of a queue or sub-queue'''
+	queue, _sep, site = cstr(name).partition(':')
+	priority = None
+	for p in priorities:
+		if site.startswith(p + ':'):
+			priority, site = p, site[len(p) + 1:]
+
+	return queue, priority, site or None
+
+def get_site_queues(queue_list=None, site=None, connection=None):
+	'''Returns Queue objects of `queue_list` (all queues by default) and their sub-queues.
+	If site is set, the sub-queues of other sites are excluded'''
+	queue_list = get_queue_list(queue_list)
+	connection = connection or get_redis_conn()
+	prefix = Queue.redis_queue_namespace_prefix
+	queues = []
+
+	for key in connection.smembers(Queue.redis_queues_keys):
+		name = cstr(key)[len(prefix):]
+		queue, priority, queue_site = parse_queue_name(name)
+		if queue in queue_list and (not site or not queue_site or queue_site == site):
+			queues.append(Queue(name, connection=connection))
+
+	return queues
+
+def get_site_queue_metrics(site=None):
+	'''Returns queued, running jobs and average wait (seconds) of jobs per site and queue'''
+	conn = get_redis_conn()
+	metrics = defaultdict(lambda: defaultdict(lambda: frappe._dict(queued=0, avg_wait=0)))
+
+	for q in get_site_queues(site=site, connection=conn):
+		queue, priority, queue_site = parse_queue_name(q.name)
+		if queue_site:
+			metrics[queue_site][queue].queued += q.count
+
+	wait_time = dict((cstr(field), float(value)) for field, value in
+		conn.hgetall(JOB_WAIT_TIME_KEY).items())
+	for field, count in wait_time.items():
+		queue_site, queue, stat = field.rsplit(':', 2)
+		if stat == 'count' and count and (not site or queue_site == site):
+			metrics[queue_site][queue].avg_wait = wait_time.get(field[:-len('count')] + 'total', 0) / count
+
+	running = get_running_jobs(metrics, connection=conn)
+	return dict((s, dict(queues, running=running.get(s, 0))) for s, queues in metrics.items())
+
+def validate_priority(priority):
+	if priority and priority not in priorities:
+		frappe.throw(_("Priority should be one of {0}").format(', '.join(priorities)))
 
 def validate_queue(queue, default_queue_list=None):
 	if not default_queue_list:
@@ -7,9 +7,11 @@ from __future__ import unicode_literals, print_function
 
 #Imports
 from frappe import _
-import os, frappe
+import os, frappe, time, shutil, tempfile, json
 from datetime import datetime
-from frappe.utils import cstr, get_url, now_datetime
+from subprocess import Popen, PIPE
+from multiprocessing import cpu_count
+from frappe.utils import cstr, cint, get_url, now_datetime
 
 #Global constants
 verbose = 0
@@ -21,9 +23,14 @@ class BackupGenerator:
 
 		To initialize, specify (db_name, user, password, db_file_name=None, db_host="localhost")
 		If specifying db_file_name, also append ".sql.gz"
+
+		To back up only some tables, set `include_tables` or `exclude_tables` (list of table names).
+		Set `jobs` to dump the tables in that many parallel processes.
+		Set `incremental_files` to back up only the files added or changed since the last backup.
 	"""
 	def __init__(self, db_name, user, password, backup_path_db=None, backup_path_files=None,
-		backup_path_private_files=None, db_host="localhost"):
+		backup_path_private_files=None, db_host="localhost", include_tables=None, exclude_tables=None,
+		jobs=None, incremental_files=False):
 		self.db_host = db_host
 		self.db_name = db_name
 		self.user = user
@@ -31,6 +38,11 @@ class BackupGenerator:
 		self.backup_path_files = backup_path_files
 		self.backup_path_db = backup_path_db
 		self.backup_path_private_files = backup_path_private_files
+		self.include_tables = include_tables or []
+		self.exclude_tables = exclude_tables or []
+		self.jobs = max(cint(jobs or conf.backup_jobs), 1)
+		self.dump_stats = None
+		self.incremental_files = incremental_files or conf.incremental_file_backups
 
 	def get_backup(self, older_than=24, ignore_files=False, force=False):
 		"""
@@ -39,7 +51,8 @@ class BackupGenerator:
 		"""
 		#Check if file exists and is less than a day old
 		#If not Take Dump
-		if not force:
+		#A partial backup is always taken afresh
+		if not (force or self.include_tables or self.exclude_tables):
 			last_db, last_file, last_private_file = self.get_recent_backup(older_than)
 		else:
 			last_db, last_file, last_private_file = False, False, False
@@ -99,25 +112,173 @@ class BackupGenerator:
 			files_path = frappe.get_site_path(folder, "files")
 			backup_path = self.backup_path_files if folder=="public" else self.backup_path_private_files
 
+			if self.incremental_files:
+				self.zip_changed_files(folder, files_path, backup_path)
+				continue
+
 			cmd_string = """tar -cf %s %s""" % (backup_path, files_path)
 			err, out = frappe.utils.execute_in_shell(cmd_string)
 
 			print('Backed up files', os.path.abspath(backup_path))
 
-	def take_dump(self):
-		import frappe.utils
+	def zip_changed_files(self, folder, files_path, backup_path):
+		"""Back up files added or changed since the last backup of the folder, and write a manifest
+		(`<backup>.json`) of all files, keyed by path with the content hash of the file as value.
 
-		# escape reserved characters
-		args = dict([item[0], frappe.utils.esc(item[1], '$ ')]
-			for item in self.__dict__.copy().items())
+		The manifest also lists the chain of backups (the last full backup followed by increments)
+		from which the files can be restored. A full backup is taken if there is no usable chain."""
+		files = get_files_manifest(folder, files_path)
+		last_manifest = get_last_manifest(folder, os.path.dirname(os.path.abspath(backup_path)))
 
-		cmd_string = """mysqldump --single-transaction --quick --lock-tables=false -u %(user)s -p%(password)s %(db_name)s -h %(db_host)s > %(backup_path_db)s """ % args
-		err, out = frappe.utils.execute_in_shell(cmd_string)
+		if last_manifest:
+			changed = [path for path, content_hash in files.items()
+				if last_manifest["files"].get(path) != content_hash]
+			chain = last_manifest["chain"] + [os.path.basename(backup_path)]
+		else:
+			changed = list(files)
+			chain = [os.path.basename(backup_path)]
+
+		with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file_list:
+			for path in changed:
+				file_list.write(os.path.join(files_path, path) + "\n")
 
-		cmd_string = 'gzip %(backup_path_db)s '% args
-		err, out = frappe.utils.execute_in_shell(cmd_string)
+		try:
+			cmd_string = """tar -cf %s -T %s""" % (backup_path, file_list.name)
+			err, out = frappe.utils.execute_in_shell(cmd_string)
+		finally:
+			os.remove(file_list.name)
 
-		self.backup_path_db = "{0}.gz".format(self.backup_path_db)
+		with open(get_manifest_path(backup_path), "w") as f:
+			json.dump({"folder": folder, "files": files, "chain": chain}, f)
+
+		print('Backed up {0} of {1} files ({2})'.format(len(changed), len(files),
+			"full" if len(chain)==1 else "increment {0}".format(len(chain) - 1)),
+			os.path.abspath(backup_path))
+
+	def take_dump(self):
+		"""Dump the database straight into the compressor, without writing the plain dump to disk.
+
+		With `jobs` > 1, tables are split in groups of about equal size, dumped in parallel and
+		appended to the backup as separate gzip members (a valid gzip file), followed by the views.
+		Each group is a consistent snapshot (`--single-transaction`), but groups are not consistent
+		with each other"""
+		start = time.time()
+		if not self.backup_path_db.endswith(".gz"):
+			self.backup_path_db = "{0}.gz".format(self.backup_path_db)
+
+		table_groups, views = [self.include_tables], []
+		if self.jobs > 1:
+			table_groups, views = self.get_table_groups(), self.get_views()
+
+		if len(table_groups) == 1 and not views:
+			self.dump_tables(table_groups[0], self.backup_path_db)
+		else:
+			self.dump_in_parallel(table_groups, views)
+
+		size = os.path.getsize(self.backup_path_db) / (1024.0 * 1024)
+		elapsed = max(time.time() - start, 0.001)
+		self.dump_stats = frappe._dict(size=size, time=elapsed, throughput=size / elapsed)
+
+		print('Backed up database {0} ({1:.1f} MB in {2:.1f}s, {3:.1f} MB/s)'.format(
+			os.path.abspath(self.backup_path_db), size, elapsed, size / elapsed))
+
+	def dump_in_parallel(self, table_groups, views=None):
+		'''Dump the groups of tables in parallel and the views (without data) as the last part,
+		so that the tables they select from are restored first'''
+		parts = ["{0}.part{1}".format(self.backup_path_db, i) for i in range(len(table_groups))]
+		processes = [self.start_dump(tables, path) for tables, path in zip(table_groups, parts)]
+		if views:
+			parts.append("{0}.part{1}".format(self.backup_path_db, len(table_groups)))
+			processes.append(self.start_dump(views, parts[-1], no_data=True))
+
+		try:
+			for process in processes:
+				self.wait_for_dump(process)
+
+			with open(self.backup_path_db, "wb") as backup_file:
+				for path in parts:
+					with open(path, "rb") as part:
+						shutil.copyfileobj(part, backup_file)
+		finally:
+			for path in parts:
+				if os.path.exists(path):
+					os.remove(path)
+
+	def dump_tables(self, tables, path):
+		self.wait_for_dump(self.start_dump(tables, path))
+
+	def start_dump(self, tables, path, no_data=False):
+		'''Starts `mysqldump` of `tables` (all tables if not set) piped into the compressor.
+		Returns the processes and error files'''
+		dump_cmd = ["mysqldump", "--single-transaction", "--quick", "--lock-tables=false",
+			"-u", self.user, "-p{0}".format(self.password), "-h", self.db_host]
+		if no_data:
+			dump_cmd.append("--no-data")
+		dump_cmd += ["--ignore-table={0}.{1}".format(self.db_name, table) for table in self.exclude_tables]
+		dump_cmd += [self.db_name] + list(tables)
+
+		dump_err = tempfile.TemporaryFile()
+		compress_err = tempfile.TemporaryFile()
+		with open(path, "wb") as output:
+			dump = Popen(dump_cmd, stdout=PIPE, stderr=dump_err)
+			compress = Popen(self.get_compress_cmd(), stdin=dump.stdout, stdout=output,
+				stderr=compress_err)
+
+		# let the dump get SIGPIPE if the compressor exits
+		dump.stdout.close()
+
+		return ((dump, dump_err), (compress, compress_err))
+
+	def wait_for_dump(self, processes):
+		errors = []
+		for process, err in processes:
+			if process.wait():
+				err.seek(0)
+				errors.append(cstr(err.read()))
+			err.close()
+
+		if errors:
+			frappe.throw(_("Database backup failed: {0}").format("\n".join(errors)))
+
+	def get_compress_cmd(self):
+		'''Returns the command for a multi-threaded compressor (pigz) if installed, else gzip'''
+		from distutils.spawn import find_executable
+
+		if find_executable("pigz"):
+			threads = max(cpu_count(), self.jobs) // self.jobs
+			return ["pigz", "-c", "-p", str(threads)]
+
+		return ["gzip", "-c"]
+
+	def get_table_groups(self):
+		'''Returns tables in `jobs` groups of about equal size, largest tables first'''
+		tables = frappe.db.sql('''select table_name, ifnull(data_length, 0) + ifnull(index_length, 0)
+			from information_schema.tables
+			where table_schema = %s and table_type = 'BASE TABLE'
+			order by 2 desc''', self.db_name)
+
+		include_tables = set(self.include_tables)
+		exclude_tables = set(self.exclude_tables)
+
+		groups = [[] for i in range(self.jobs)]
+		group_sizes = [0] * self.jobs
+		for table, size in tables:
+			if (include_tables and table not in include_tables) or table in exclude_tables:
+				continue
+
+			i = group_sizes.index(min(group_sizes))
+			groups[i].append(table)
+			group_sizes[i] += size
+
+		return [group for group in groups if group] or [self.include_tables]
+
+	def get_views(self):
+		'''Returns views to be dumped after the tables, for parallel dumps'''
+		views = frappe.db.sql_list('''select table_name from information_schema.tables
+			where table_schema = %s and table_type = 'VIEW' ''', self.db_name)
+
+		return [view for view in views if (not self.include_tables or view in self.include_tables)
+			and view not in self.exclude_tables]
 
 	def send_email(self):
 		"""
@@ -163,35 +324,125 @@ def get_backup():
 	recipient_list = odb.send_email()
 	frappe.msgprint(_("Download link for your backup will be emailed on the following email address: {0}").format(', '.join(recipient_list)))
 
-def scheduled_backup(older_than=6, ignore_files=False, backup_path_db=None, backup_path_files=None, backup_path_private_files=None, force=False):
+def scheduled_backup(older_than=6, ignore_files=False, backup_path_db=None, backup_path_files=None, backup_path_private_files=None, force=False,
+	include_tables=None, exclude_tables=None, jobs=None, incremental_files=False):
 	"""this function is called from scheduler
 		deletes backups older than 7 days
 		takes backup"""
-	odb = new_backup(older_than, ignore_files, backup_path_db=backup_path_db, backup_path_files=backup_path_files, force=force)
+	odb = new_backup(older_than, ignore_files, backup_path_db=backup_path_db, backup_path_files=backup_path_files, force=force,
+		include_tables=include_tables, exclude_tables=exclude_tables, jobs=jobs,
+		incremental_files=incremental_files)
 	return odb
 
-def new_backup(older_than=6, ignore_files=False, backup_path_db=None, backup_path_files=None, backup_path_private_files=None, force=False):
+def new_backup(older_than=6, ignore_files=False, backup_path_db=None, backup_path_files=None, backup_path_private_files=None, force=False,
+	include_tables=None, exclude_tables=None, jobs=None, incremental_files=False):
 	delete_temp_backups(older_than = frappe.conf.keep_backups_for_hours or 24)
 	odb = BackupGenerator(frappe.conf.db_name, frappe.conf.db_name,\
 						  frappe.conf.db_password,
 						  backup_path_db=backup_path_db, backup_path_files=backup_path_files,
 						  backup_path_private_files=backup_path_private_files,
-						  db_host = frappe.db.host)
+						  db_host = frappe.db.host, include_tables=include_tables,
+						  exclude_tables=exclude_tables, jobs=jobs, incremental_files=incremental_files)
 	odb.get_backup(older_than, ignore_files, force=force)
 	return odb
 
 def delete_temp_backups(older_than=24):
 	"""
-		Cleans up the backup_link_path directory by deleting files older than 24 hours
+		Cleans up the backup_link_path directory by deleting files older than 24 hours,
+		except file backups needed to restore recent incremental file backups
 	"""
 	backup_path = get_backup_path()
 	if os.path.exists(backup_path):
 		file_list = os.listdir(get_backup_path())
+		keep = get_backups_in_recent_chains(older_than)
 		for this_file in file_list:
 			this_file_path = os.path.join(get_backup_path(), this_file)
-			if is_file_old(this_file_path, older_than):
+			if this_file not in keep and is_file_old(this_file_path, older_than):
 				os.remove(this_file_path)
 
+def get_files_manifest(folder, files_path):
+	'''Returns a dict of path (relative to `files_path`) and content hash of all files in the
+	folder. The content hash is taken from the File record, files without a File record (e.g.
+	thumbnails) are identified by their modified time'''
+	url_prefix = "/files/" if folder=="public" else "/private/files/"
+	content_hashes = dict(frappe.db.sql('''select file_url, content_hash from tabFile
+		where is_folder=0 and file_url like %s and ifnull(content_hash, '')!=""''', url_prefix + "%"))
+
+	files = {}
+	for root, dirs, filenames in os.walk(files_path):
+		for filename in filenames:
+			full_path = os.path.join(root, filename)
+			path = os.path.relpath(full_path, files_path)
+			stat = os.stat(full_path)
+			content_hash = content_hashes.get(url_prefix + path.replace(os.sep, "/")) or int(stat.st_mtime)
+			files[path] = "{0}:{1}".format(content_hash, stat.st_size)
+
+	return files
+
+def get_manifest_path(backup_path):
+	return backup_path + ".json"
+
+def get_manifests(folder=None, backup_path=None):
+	'''Returns manifests of incremental file backups in `backup_path` (the backup folder of
+	the site by default), latest first'''
+	backup_path = backup_path or get_backup_path()
+	if not os.path.exists(backup_path):
+		return []
+
+	manifests = []
+	for filename in os.listdir(backup_path):
+		path = os.path.join(backup_path, filename)
+		if filename.endswith(".tar.json") and os.path.isfile(path):
+			with open(path) as f:
+				manifest = json.load(f)
+
+			if not folder or manifest["folder"]==folder:
+				manifest["mtime"] = os.path.getmtime(path)
+				manifests.append(manifest)
+
+	return sorted(manifests, key=lambda m: m["mtime"], reverse=True)
+
+def get_last_manifest(folder, backup_path=None):
+	'''Returns the manifest of the last file backup of the folder in `backup_path`, if all the
+	backups of its chain exist and the chain is shorter than `max_incremental_file_backups`
+	(default 7)'''
+	backup_path = backup_path or get_backup_path()
+	manifests = get_manifests(folder, backup_path)
+	if not manifests:
+		return None
+
+	manifest = manifests[0]
+	if len(manifest["chain"]) > (cint(conf.max_incremental_file_backups) or 7):
+		return None
+
+	if not all(os.path.exists(os.path.join(backup_path, name)) for name in manifest["chain"]):
+		return None
+
+	return manifest
+
+def get_backups_in_recent_chains(older_than=24):
+	'''Returns names of file backups that recent incremental backups are based on'''
+	keep = set()
+	for manifest in get_manifests():
+		if time.time() - manifest["mtime"] < older_than * 3600:
+			keep.update(manifest["chain"])
+			keep.update(get_manifest_path(name) for name in manifest["chain"])
+
+	return keep
+
+def get_backup_chain(file_path):
+	'''Returns paths of the file backups to be extracted in order to restore the backup at
+	`file_path`, and the manifest of the backup if it is incremental'''
+	manifest_path = get_manifest_path(file_path)
+	if not os.path.exists(manifest_path):
+		return [file_path], None
+
+	with open(manifest_path) as f:
+		manifest = json.load(f)
+
+	dirname = os.path.dirname(file_path)
+	return [os.path.join(dirname, name) for name in manifest["chain"]], manifest
+
 def is_file_old(db_file_name, older_than=24):
 		"""
 			Checks if file exists and is older than specified hours
@@ -2,7 +2,8 @@ from __future__ import unicode_literals, print_function
 import frappe.utils
 from collections import defaultdict
 from rq import Worker, Connection
-from frappe.utils.background_jobs import get_redis_conn, get_queue, get_queue_list
+from frappe.utils.background_jobs import (get_redis_conn, get_queue_list, get_site_queues,
+	parse_queue_name, get_site_queue_metrics, unregister_job)
 from frappe.utils.scheduler import is_scheduler_disabled, is_scheduler_inactive
 from six import iteritems
 
@@ -20,39 +21,45 @@ def purge_pending_jobs(event=None, site=None, queue=None):
 	mintues and would any leave daily, hourly and weekly tasks
 	"""
 	purged_task_count = 0
-	for queue in get_queue_list(queue):
-		q = get_queue(queue)
+	for q in get_site_queues(queue, site=site):
 		for job in q.jobs:
 			if (site and event):
 				if job.kwargs['site'] == site and job.kwargs['event'] == event:
-					job.delete()
+					delete_job(job)
 					purged_task_count+=1
 			elif site:
 				if job.kwargs['site'] == site:
-					job.delete()
+					delete_job(job)
 					purged_task_count+=1
 			elif event:
 				if job.kwargs['event'] == event:
-					job.delete()
+					delete_job(job)
 					purged_task_count+=1
 			else:
-				purged_task_count += q.count
-				q.empty()
+				delete_job(job)
+				purged_task_count+=1
 
 
 	return purged_task_count
 
+def delete_job(job):
+	'''Delete a queued job and remove it from the job registry of its site'''
+	if job.kwargs.get('site'):
+		unregister_job(job.kwargs['site'], job.id)
+	job.delete()
+
 def get_jobs_by_queue(site=None):
 	jobs_per_queue = defaultdict(list)
 	job_count = consolidated_methods = {}
-	for queue in get_queue_list():
-		q = get_queue(queue)
+	for q in get_site_queues(site=site):
+		queue = parse_queue_name(q.name)[0]
 		for job in q.jobs:
 			if not site:
 				jobs_per_queue[queue].append(job.kwargs.get('method') or job.description)
 			elif job.kwargs['site'] == site:
 				jobs_per_queue[queue].append(job.kwargs.get('method') or job.description)
 
+	for queue in get_queue_list():
 		consolidated_methods = {}
 
 		for method in jobs_per_queue[queue]:
@@ -70,8 +77,8 @@ def get_jobs_by_queue(site=None):
 
 def get_pending_jobs(site=None):
 	jobs_per_queue = defaultdict(list)
-	for queue in get_queue_list():
-		q = get_queue(queue)
+	for q in get_site_queues(site=site):
+		queue = parse_queue_name(q.name)[0]
 		for job in q.jobs:
 			method_kwargs = job.kwargs['kwargs'] if job.kwargs['kwargs'] else ""
 			if job.kwargs['site'] == site:
@@ -97,6 +104,7 @@ def doctor(site=None):
 	with frappe.init_site(site):
 		workers_online = check_number_of_workers()
 		jobs_per_queue, job_count = get_jobs_by_queue(site)
+		queue_metrics = get_site_queue_metrics(site)
 
 	print("-----Checking scheduler status-----")
 	if site:
@@ -134,6 +142,12 @@ def doctor(site=None):
 				print("{0} : {1}".format(method, count))
 			print("------------")
 
+	print("-----Queues per site-----")
+	for s, metrics in iteritems(queue_metrics):
+		print("{0} (running: {1})".format(s, metrics.pop("running")))
+		for queue, m in iteritems(metrics):
+			print("  {0}: {1} queued, {2:.1f}s average wait".format(queue, m.queued, m.avg_wait))
+
 	return True
 
 def pending_jobs(site=None):
@@ -2,6 +2,9 @@
 # MIT License. See license.txt
 from __future__ import unicode_literals
 
+# md5 of template source: compiled code, shared by all sites of the process
+compiled_templates = {}
+
 def get_jenv():
 	import frappe
 
@@ -23,6 +26,22 @@ def get_jenv():
 def get_template(path):
 	return get_jenv().get_template(path)
 
+def get_template_from_string(source):
+	"""Returns template for `source`. The source is compiled once per process and the
+	compiled code is bound to the environment of the current request."""
+	import frappe, hashlib
+
+	jenv = get_jenv()
+	key = hashlib.md5(frappe.safe_encode(source)).hexdigest()
+
+	code = compiled_templates.get(key)
+	if not code:
+		if len(compiled_templates) >= 1000:
+			compiled_templates.clear()
+		code = compiled_templates[key] = jenv.compile(source)
+
+	return jenv.template_class.from_code(jenv, code, jenv.make_globals(None))
+
 def get_email_from_template(name, args):
 	from jinja2 import TemplateNotFound
 
@@ -75,7 +94,7 @@ def render_template(template, context, is_path=None, safe_render=True):
 		if safe_render and ".__" in template:
 			throw("Illegal template")
 		try:
-			return get_jenv().from_string(template).render(context)
+			return get_template_from_string(template).render(context)
 		except TemplateError:
 			throw(title="Jinja Template Error", msg="<pre>{template}</pre><pre>{tb}</pre>".format(template=template, tb=get_traceback()))
 
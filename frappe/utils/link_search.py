@@ -0,0 +1,168 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+
+from __future__ import unicode_literals
+
+"""
+	frappe.utils.link_search
+	~~~~~~~~~~~~~~~~~~~~~~~~
+
+	Prefix index of the search fields of large doctypes, used by Link field search
+	(`frappe.desk.search.search_widget`) instead of `like '%txt%'` over the doctype table.
+
+	A document is indexed in `__link_search` as the words of its name, title field and
+	search fields, and as each full value. A word of the search text matches a document
+	if it is the prefix of one of its tokens, which is a range read on the (doctype, token)
+	index. The matches are a condition of the usual `frappe.get_list` query, so
+	permissions, filters and ordering apply as before.
+
+	Doctypes listed in the `link_search_doctypes` hook or site config are indexed. The index
+	of a doctype is maintained on change, rename and delete of its documents and used once it
+	has been built with `bench rebuild-link-search-index`, which also has to be run after the
+	search fields of the doctype are changed.
+"""
+
+import re
+import frappe
+from frappe.utils import cint, cstr
+
+SEARCH_FIELDTYPES = ("Data", "Text", "Small Text", "Long Text", "Link", "Select", "Read Only",
+	"Text Editor")
+
+def get_link_search_doctypes():
+	"""Returns doctypes to be indexed, from the `link_search_doctypes` hook and site config"""
+	return set(frappe.get_hooks("link_search_doctypes") + (frappe.conf.link_search_doctypes or []))
+
+def is_indexed(doctype):
+	"""Returns True if the index of `doctype` is built and maintained"""
+	return doctype in get_link_search_doctypes() \
+		and cint(frappe.db.get_global(get_built_key(doctype)))
+
+def get_built_key(doctype):
+	return "link_search_index:" + doctype
+
+def get_indexed_fields(meta):
+	"""Returns fieldnames indexed for `meta`: name, the title field and text-like search fields"""
+	fieldnames = ["name"]
+	for fieldname in [meta.title_field] + meta.get_search_fields():
+		df = fieldname and meta.get_field(fieldname)
+		if df and df.fieldtype in SEARCH_FIELDTYPES and fieldname not in fieldnames:
+			fieldnames.append(fieldname)
+
+	return fieldnames
+
+def get_words(text):
+	return re.findall(r"\w+", cstr(text).lower(), re.UNICODE)
+
+def get_tokens(values):
+	"""Returns the words of `values` and the full values, lower cased"""
+	length = cint(frappe.db.VARCHAR_LEN)
+	tokens = set()
+	for value in values:
+		value = cstr(value).strip().lower()
+		if value:
+			tokens.add(value[:length])
+			tokens.update(w[:length] for w in get_words(value))
+
+	return tokens
+
+def get_search_conditions(doctype, txt):
+	"""Returns conditions (for `frappe.get_list`) on the documents of `doctype` that match
+	all words of `txt`, or None if the index cannot be used"""
+	words = get_words(txt)
+	if not (words and is_indexed(doctype)):
+		return None
+
+	# candidates are not limited here, so that permissions, filters and ordering of the query
+	# apply to all the matches. Multi word searches are driven by their most selective word
+	conditions = []
+	for word in words[:5]:
+		conditions.append("""`tab{doctype}`.`name` in (select name from `__link_search`
+			where doctype={escaped_doctype} and token like {prefix})""".format(
+				doctype=doctype, escaped_doctype=frappe.db.escape(doctype),
+				prefix=frappe.db.escape(get_prefix_pattern(word))))
+
+	return conditions
+
+def get_relevance(doctype, txt):
+	"""Returns the sort key (descending) of search results, true if the name or title field
+	starts with `txt`.
+
+	It is selected as a field, so it is a condition instead of a `case` expression and the
+	pattern has only word characters (others match any character), as fields are sanitized"""
+	prefix = frappe.db.escape(re.sub(r"\W", "_", cstr(txt).strip().lower(), flags=re.U) + "%")
+	meta = frappe.get_meta(doctype)
+
+	fieldnames = ["name"]
+	if meta.title_field and meta.title_field != "name":
+		fieldnames.append(meta.title_field)
+
+	# `is true` as a null title would sort first in Postgres
+	return "(({0}) is true)".format(" or ".join("lower(`tab{0}`.`{1}`) like {2}".format(doctype,
+		fieldname, prefix) for fieldname in fieldnames))
+
+def get_prefix_pattern(text):
+	return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def update_for_document(doc, method=None):
+	"""Called on change of any document, updates its entries if its doctype is indexed"""
+	if not is_indexed(doc.doctype):
+		return
+
+	fieldnames = get_indexed_fields(doc.meta)
+	doc_before_save = doc.get_doc_before_save()
+	if doc_before_save and all(doc.get(f) == doc_before_save.get(f) for f in fieldnames):
+		return
+
+	delete_entries(doc.doctype, doc.name)
+	insert_tokens([(doc.doctype, doc.name, get_tokens(doc.get(f) for f in fieldnames))])
+
+def rename_for_document(doc, method=None, old=None, new=None, merge=False):
+	"""Called after rename of any document, indexes it under the new name"""
+	if not is_indexed(doc.doctype):
+		return
+
+	delete_entries(doc.doctype, old)
+	delete_entries(doc.doctype, doc.name)
+	insert_tokens([(doc.doctype, doc.name,
+		get_tokens(doc.get(f) for f in get_indexed_fields(doc.meta)))])
+
+def delete_for_document(doc, method=None):
+	"""Called on delete of any document, removes its entries if its doctype is indexed"""
+	if is_indexed(doc.doctype):
+		delete_entries(doc.doctype, doc.name)
+
+def delete_entries(doctype, name):
+	frappe.db.sql("delete from `__link_search` where doctype=%s and name=%s", (doctype, name))
+
+def insert_tokens(entries):
+	"""Insert tokens of [(doctype, name, tokens)]"""
+	values = []
+	for doctype, name, tokens in entries:
+		values.extend((doctype, name, token) for token in tokens)
+
+	batch_size = 10000
+	for i in range(0, len(values), batch_size):
+		batch = values[i:i + batch_size]
+		frappe.db.sql("insert into `__link_search` (doctype, name, token) values {0}".format(
+			", ".join(["(%s, %s, %s)"] * len(batch))), [v for row in batch for v in row])
+
+def rebuild_for_doctype(doctype, batch_size=10000):
+	"""Build the index of `doctype` from its table and mark it as built"""
+	from frappe.model.db_query import get_list_with_cursor
+
+	frappe.db.create_link_search_table()
+	frappe.db.set_global(get_built_key(doctype), 0)
+	frappe.db.sql("delete from `__link_search` where doctype=%s", doctype)
+
+	fieldnames = get_indexed_fields(frappe.get_meta(doctype))
+	cursor = ""
+	while cursor is not None:
+		docs, cursor = get_list_with_cursor(doctype, fields=fieldnames, order_by="name asc",
+			limit_page_length=batch_size, cursor=cursor, ignore_permissions=True)
+
+		insert_tokens([(doctype, d.name, get_tokens(d.get(f) for f in fieldnames)) for d in docs])
+		frappe.db.commit()
+
+	frappe.db.set_global(get_built_key(doctype), 1)
+	frappe.db.commit()
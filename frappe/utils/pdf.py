@@ -2,47 +2,37 @@
 # MIT License. See license.txt
 from __future__ import unicode_literals
 
-import pdfkit, os, frappe
-from frappe.utils import scrub_urls
+import pdfkit, os, frappe, tempfile, threading
+from multiprocessing.pool import ThreadPool
+from frappe.utils import scrub_urls, cint, cstr
 from frappe import _
 import six, re, io
 from bs4 import BeautifulSoup
 from PyPDF2 import PdfFileReader, PdfFileWriter
 
-def get_pdf(html, options=None, output=None):
-	html = scrub_urls(html)
-	html, options = prepare_options(html, options)
+# limits the wkhtmltopdf processes of this process, requests beyond it wait for a free slot
+renderer_slots = None
 
-	options.update({
-		"disable-javascript": "",
-		"disable-local-file-access": "",
-	})
+# path: (mtime, content) of stylesheets embedded in every header and footer
+asset_cache = {}
 
-	filedata = ''
+def get_pdf(html, options=None, output=None):
+	html, options = prepare_pdf(html, options)
 
 	try:
-		# Set filename property to false, so no file is actually created
-		filedata = pdfkit.from_string(html, False, options=options or {})
+		filedata = render_pdf(html, options)
+	except IOError as e:
+		throw_if_broken_links(e)
+		raise
+	finally:
+		remove_header_footer(options)
 
-		# https://pythonhosted.org/PyPDF2/PdfFileReader.html
-		# create in-memory binary streams from filedata and create a PdfFileReader object
-		reader = PdfFileReader(io.BytesIO(filedata))
+	if not output and "password" not in options:
+		return filedata
 
-	except IOError as e:
-		if ("ContentNotFoundError" in e.message
-			or "ContentOperationNotPermittedError" in e.message
-			or "UnknownContentError" in e.message
-			or "RemoteHostClosedError" in e.message):
-
-			# allow pdfs with missing images if file got created
-			if filedata:
-				if output: # output is a PdfFileWriter object
-					output.appendPagesFromReader(reader)
-
-			else:
-				frappe.throw(_("PDF generation failed because of broken image links"))
-		else:
-			raise
+	# https://pythonhosted.org/PyPDF2/PdfFileReader.html
+	# create in-memory binary streams from filedata and create a PdfFileReader object
+	reader = PdfFileReader(io.BytesIO(filedata))
 
 	if "password" in options:
 		password = options["password"]
@@ -63,6 +53,74 @@ def get_pdf(html, options=None, output=None):
 
 	return filedata
 
+def get_multi_pdf(html_list, options=None):
+	"""Returns one PDF of all the documents in `html_list`. The documents are rendered in
+	parallel (within the `pdf_renderer_workers` limit) and merged once."""
+	prepared = [prepare_pdf(html, dict(options or {})) for html in html_list]
+	if not prepared:
+		return None
+
+	get_renderer_slots()
+	pool = ThreadPool(min(len(prepared), get_renderer_count()))
+	try:
+		results = pool.map(render_pdf_safely, prepared)
+	finally:
+		pool.close()
+		for html, options in prepared:
+			remove_header_footer(options)
+
+	output = PdfFileWriter()
+	for filedata, error in results:
+		if error:
+			throw_if_broken_links(error)
+			raise error
+		output.appendPagesFromReader(PdfFileReader(io.BytesIO(filedata)))
+
+	return get_file_data_from_writer(output)
+
+def prepare_pdf(html, options):
+	html = scrub_urls(html)
+	html, options = prepare_options(html, options)
+
+	options.update({
+		"disable-javascript": "",
+		"disable-local-file-access": "",
+	})
+
+	return html, options
+
+def render_pdf(html, options):
+	"""Render with wkhtmltopdf. Safe to call from threads, as it does not use `frappe.local`"""
+	with get_renderer_slots():
+		# Set filename property to false, so no file is actually created
+		return pdfkit.from_string(html, False, options=options or {})
+
+def render_pdf_safely(args):
+	try:
+		return render_pdf(*args), None
+	except Exception as e:
+		return None, e
+
+def get_renderer_slots():
+	"""Returns the semaphore that bounds concurrent renders, `pdf_renderer_workers`
+	(site config, default 4) per process"""
+	global renderer_slots
+	if not renderer_slots:
+		renderer_slots = threading.BoundedSemaphore(get_renderer_count())
+
+	return renderer_slots
+
+def get_renderer_count():
+	return cint(frappe.conf.get("pdf_renderer_workers")) or 4
+
+def throw_if_broken_links(e):
+	message = cstr(e)
+	if ("ContentNotFoundError" in message
+		or "ContentOperationNotPermittedError" in message
+		or "UnknownContentError" in message
+		or "RemoteHostClosedError" in message):
+		frappe.throw(_("PDF generation failed because of broken image links"))
+
 def get_file_data_from_writer(writer_obj):
 
 	# https://docs.python.org/3/library/io.html
@@ -133,8 +191,8 @@ def prepare_header_footer(soup):
 	head = soup.find("head").contents
 	styles = soup.find_all("style")
 
-	bootstrap = frappe.read_file(os.path.join(frappe.local.sites_path, "assets/frappe/css/bootstrap.css"))
-	fontawesome = frappe.read_file(os.path.join(frappe.local.sites_path, "assets/frappe/css/font-awesome.css"))
+	bootstrap = get_asset_content(os.path.join(frappe.local.sites_path, "assets/frappe/css/bootstrap.css"))
+	fontawesome = get_asset_content(os.path.join(frappe.local.sites_path, "assets/frappe/css/font-awesome.css"))
 
 	# extract header and footer
 	for html_id in ("header-html", "footer-html"):
@@ -154,9 +212,9 @@ def prepare_header_footer(soup):
 				"fontawesome": fontawesome
 			})
 
-			# create temp file
-			fname = os.path.join("/tmp", "frappe-pdf-{0}.html".format(frappe.generate_hash()))
-			with open(fname, "wb") as f:
+			# create temp file, readable only by this user and removed after the render
+			fd, fname = tempfile.mkstemp(prefix="frappe-pdf-", suffix=".html")
+			with os.fdopen(fd, "wb") as f:
 				f.write(html.encode("utf-8"))
 
 			# {"header-html": "/tmp/frappe-pdf-random.html"}
@@ -169,10 +227,26 @@ def prepare_header_footer(soup):
 
 	return options
 
+def get_asset_content(path):
+	"""Returns content of the asset at `path`, read again only if the file has changed"""
+	try:
+		mtime = os.path.getmtime(path)
+	except OSError:
+		return None
+
+	cached = asset_cache.get(path)
+	if not cached or cached[0] != mtime:
+		cached = asset_cache[path] = (mtime, frappe.read_file(path))
+
+	return cached[1]
+
 def cleanup(fname, options):
 	if os.path.exists(fname):
 		os.remove(fname)
 
+	remove_header_footer(options)
+
+def remove_header_footer(options):
 	for key in ("header-html", "footer-html"):
 		if options.get(key) and os.path.exists(options[key]):
 			os.remove(options[key])
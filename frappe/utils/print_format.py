@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 import frappe, os
 from frappe import _
 
-from frappe.utils.pdf import get_pdf,cleanup
+from frappe.utils.pdf import get_pdf, get_multi_pdf, cleanup
 from PyPDF2 import PdfFileWriter
 
 no_cache = 1
@@ -53,37 +53,28 @@ def download_multi_pdf(doctype, name, format=None):
 	"""
 
 	import json
-	output = PdfFileWriter()
+	html_list = []
 
+	# documents are rendered to html here and converted to pdf together
 	if not isinstance(doctype, dict):
 		result = json.loads(name)
 
 		# Concatenating pdf files
 		for i, ss in enumerate(result):
-			output = frappe.get_print(doctype, ss, format, as_pdf = True, output = output)
+			html_list.append(frappe.get_print(doctype, ss, format))
 		frappe.local.response.filename = "{doctype}.pdf".format(doctype=doctype.replace(" ", "-").replace("/", "-"))
 	else:
 		for doctype_name in doctype:
 			for doc_name in doctype[doctype_name]:
 				try:
-					output = frappe.get_print(doctype_name, doc_name, format, as_pdf = True, output = output)
+					html_list.append(frappe.get_print(doctype_name, doc_name, format))
 				except Exception:
 					frappe.log_error("Permission Error on doc {} of doctype {}".format(doc_name, doctype_name))
 		frappe.local.response.filename = "{}.pdf".format(name)
 
-	frappe.local.response.filecontent = read_multi_pdf(output)
+	frappe.local.response.filecontent = get_multi_pdf(html_list)
 	frappe.local.response.type = "download"
 
-def read_multi_pdf(output):
-	# Get the content of the merged pdf files
-	fname = os.path.join("/tmp", "frappe-pdf-{0}.pdf".format(frappe.generate_hash()))
-	output.write(open(fname,"wb"))
-
-	with open(fname, "rb") as fileobj:
-		filedata = fileobj.read()
-
-	return filedata
-
 @frappe.whitelist()
 def download_pdf(doctype, name, format=None, doc=None, no_letterhead=0):
 	html = frappe.get_print(doctype, name, format, doc=doc, no_letterhead=no_letterhead)
@@ -2,11 +2,15 @@
 # MIT License. See license.txt
 from __future__ import unicode_literals
 
-import redis, frappe, re
+import redis, frappe, re, fnmatch
+from contextlib import contextmanager
 from six.moves import cPickle as pickle
 from frappe.utils import cstr
 from six import iteritems
 
+# keys per DEL / MGET command and per SCAN iteration
+BATCH_SIZE = 1000
+
 
 class RedisWrapper(redis.Redis):
 	"""Redis client that will automatically prefix conf.db_name"""
@@ -28,6 +32,51 @@ class RedisWrapper(redis.Redis):
 
 		return "{0}|{1}".format(frappe.conf.db_name, key).encode('utf-8')
 
+	def start_batch(self):
+		"""Queue writes (set, hset, delete, hdel) in a pipeline until `flush_batch`.
+
+		Reads in the same request see the queued writes through `frappe.local.cache`
+		(values set with an expiry too) and do not fetch deleted keys from redis. `delete_keys`
+		also deletes matching keys set in the batch."""
+		if getattr(frappe.local, "cache_batch", None) is None:
+			frappe.local.cache_batch = frappe._dict(pipeline=self.pipeline(transaction=False),
+				deleted=set(), written=set())
+
+	def flush_batch(self):
+		"""Send writes queued since `start_batch` in one round trip"""
+		batch = getattr(frappe.local, "cache_batch", None)
+		if batch is None:
+			return
+
+		frappe.local.cache_batch = None
+		try:
+			batch.pipeline.execute()
+		except redis.exceptions.ConnectionError:
+			pass
+
+	@contextmanager
+	def batch(self):
+		"""Context manager to queue cache writes and send them together at the end of the block.
+		Nested blocks are flushed with the outermost one."""
+		if getattr(frappe.local, "cache_batch", None) is not None:
+			yield
+			return
+
+		self.start_batch()
+		try:
+			yield
+		finally:
+			self.flush_batch()
+
+	def get_writer(self):
+		"""pipeline of the current batch, if any, else this client"""
+		batch = getattr(frappe.local, "cache_batch", None)
+		return batch.pipeline if batch else self
+
+	def is_deleted_in_batch(self, key):
+		batch = getattr(frappe.local, "cache_batch", None)
+		return bool(batch) and key in batch.deleted
+
 	def set_value(self, key, val, user=None, expires_in_sec=None):
 		"""Sets cache value.
 
@@ -38,18 +87,36 @@ class RedisWrapper(redis.Redis):
 		"""
 		key = self.make_key(key, user)
 
-		if not expires_in_sec:
+		# values with an expiry are not kept locally, unless they are only queued in a batch
+		batch = getattr(frappe.local, "cache_batch", None)
+		if not expires_in_sec or batch:
 			frappe.local.cache[key] = val
 
+		if batch:
+			batch.deleted.discard(key)
+			batch.written.add(key)
+
+		writer = self.get_writer()
 		try:
 			if expires_in_sec:
-				self.setex(key, pickle.dumps(val), expires_in_sec)
+				writer.setex(key, pickle.dumps(val), expires_in_sec)
 			else:
-				self.set(key, pickle.dumps(val))
+				writer.set(key, pickle.dumps(val))
 
 		except redis.exceptions.ConnectionError:
 			return None
 
+	def set_values(self, mapping, user=None, expires_in_sec=None):
+		"""Sets many cache values in one round trip.
+
+		:param mapping: dict of cache key and value
+		:param user: Prepends keys with User
+		:param expires_in_sec: Expire values in X seconds
+		"""
+		with self.batch():
+			for key, val in iteritems(mapping):
+				self.set_value(key, val, user=user, expires_in_sec=expires_in_sec)
+
 	def get_value(self, key, generator=None, user=None, expires=False):
 		"""Returns cache value. If not found and generator function is
 			given, it will call the generator.
@@ -67,7 +134,8 @@ class RedisWrapper(redis.Redis):
 		else:
 			val = None
 			try:
-				val = self.get(key)
+				if not self.is_deleted_in_batch(key):
+					val = self.get(key)
 			except redis.exceptions.ConnectionError:
 				pass
 
@@ -84,6 +152,38 @@ class RedisWrapper(redis.Redis):
 
 		return val
 
+	def get_values(self, keys, user=None):
+		"""Returns a dict of cache key and value (None if not found) for `keys`,
+		fetching the values not in `frappe.local` with MGET.
+
+		:param keys: list of cache keys
+		:param user: Prepends keys with User
+		"""
+		out, missing = {}, []
+		for key in keys:
+			_key = self.make_key(key, user)
+			if _key in frappe.local.cache:
+				out[key] = frappe.local.cache[_key]
+			elif self.is_deleted_in_batch(_key):
+				out[key] = None
+			else:
+				missing.append((key, _key))
+
+		for start in range(0, len(missing), BATCH_SIZE):
+			chunk = missing[start:start + BATCH_SIZE]
+			try:
+				values = self.mget([_key for key, _key in chunk])
+			except redis.exceptions.ConnectionError:
+				values = [None] * len(chunk)
+
+			for (key, _key), val in zip(chunk, values):
+				if val is not None:
+					val = pickle.loads(val)
+					frappe.local.cache[_key] = val
+				out[key] = val
+
+		return out
+
 	def get_all(self, key):
 		ret = {}
 		for k in self.get_keys(key):
@@ -92,19 +192,26 @@ class RedisWrapper(redis.Redis):
 		return ret
 
 	def get_keys(self, key):
-		"""Return keys starting with `key`."""
+		"""Return keys starting with `key`. Uses SCAN, so that redis is not blocked."""
 		try:
 			key = self.make_key(key + "*")
-			return self.keys(key)
+			return list(self.scan_iter(match=key, count=BATCH_SIZE))
 
 		except redis.exceptions.ConnectionError:
 			regex = re.compile(cstr(key).replace("|", "\|").replace("*", "[\w]*"))
 			return [k for k in list(frappe.local.cache) if regex.match(k.decode())]
 
 	def delete_keys(self, key):
-		"""Delete keys with wildcard `*`."""
+		"""Delete keys with wildcard `*`, including keys queued in the current batch."""
+		keys = self.get_keys(key)
+
+		batch = getattr(frappe.local, "cache_batch", None)
+		if batch:
+			pattern = self.make_key(key + "*")
+			keys = list(set(keys) | set(k for k in batch.written if fnmatch.fnmatchcase(k, pattern)))
+
 		try:
-			self.delete_value(self.get_keys(key), make_keys=False)
+			self.delete_value(keys, make_keys=False)
 		except redis.exceptions.ConnectionError:
 			pass
 
@@ -112,19 +219,25 @@ class RedisWrapper(redis.Redis):
 		self.delete_value(*args, **kwargs)
 
 	def delete_value(self, keys, user=None, make_keys=True, shared=False):
-		"""Delete value, list of values."""
+		"""Delete value, list of values. Keys are deleted in chunks of `BATCH_SIZE` per command."""
 		if not isinstance(keys, (list, tuple)):
 			keys = (keys, )
 
-		for key in keys:
-			if make_keys:
-				key = self.make_key(key, shared=shared)
+		if make_keys:
+			keys = [self.make_key(key, shared=shared) for key in keys]
 
+		batch = getattr(frappe.local, "cache_batch", None)
+		for key in keys:
 			if key in frappe.local.cache:
 				del frappe.local.cache[key]
+			if batch:
+				batch.deleted.add(key)
+				batch.written.discard(key)
 
+		writer = self.get_writer()
+		for start in range(0, len(keys), BATCH_SIZE):
 			try:
-				self.delete(key)
+				writer.delete(*keys[start:start + BATCH_SIZE])
 			except redis.exceptions.ConnectionError:
 				pass
 
@@ -149,9 +262,12 @@ class RedisWrapper(redis.Redis):
 		frappe.local.cache[_name][key] = value
 
 		# set in redis
+		writer = self.get_writer()
 		try:
-			super(RedisWrapper, self).hset(_name,
-				key, pickle.dumps(value))
+			if writer is self:
+				super(RedisWrapper, self).hset(_name, key, pickle.dumps(value))
+			else:
+				writer.hset(_name, key, pickle.dumps(value))
 		except redis.exceptions.ConnectionError:
 			pass
 
@@ -169,7 +285,8 @@ class RedisWrapper(redis.Redis):
 
 		value = None
 		try:
-			value = super(RedisWrapper, self).hget(_name, key)
+			if not (self.is_deleted_in_batch(_name) or self.is_deleted_in_batch((_name, key))):
+				value = super(RedisWrapper, self).hget(_name, key)
 		except redis.exceptions.ConnectionError:
 			pass
 
@@ -184,14 +301,53 @@ class RedisWrapper(redis.Redis):
 				pass
 		return value
 
+	def hget_many(self, name, keys, shared=False):
+		"""Returns a dict of hash key and value (None if not found) for `keys` of hash `name`,
+		fetching the values not in `frappe.local` with HMGET"""
+		_name = self.make_key(name, shared=shared)
+		local_cache = frappe.local.cache.setdefault(_name, {})
+
+		out = {}
+		missing = []
+		for key in keys:
+			if key in local_cache:
+				out[key] = local_cache[key]
+			elif self.is_deleted_in_batch(_name) or self.is_deleted_in_batch((_name, key)):
+				out[key] = None
+			else:
+				missing.append(key)
+
+		if missing:
+			try:
+				values = super(RedisWrapper, self).hmget(_name, missing)
+			except redis.exceptions.ConnectionError:
+				values = [None] * len(missing)
+
+			for key, value in zip(missing, values):
+				if value:
+					value = pickle.loads(value)
+					local_cache[key] = value
+				out[key] = value
+
+		return out
+
 	def hdel(self, name, key, shared=False):
 		_name = self.make_key(name, shared=shared)
 
 		if _name in frappe.local.cache:
 			if key in frappe.local.cache[_name]:
 				del frappe.local.cache[_name][key]
+
+		batch = getattr(frappe.local, "cache_batch", None)
+		if batch:
+			batch.deleted.add((_name, key))
+
+		writer = self.get_writer()
 		try:
-			super(RedisWrapper, self).hdel(_name, key)
+			if writer is self:
+				super(RedisWrapper, self).hdel(_name, key)
+			else:
+				writer.hdel(_name, key)
 		except redis.exceptions.ConnectionError:
 			pass
 
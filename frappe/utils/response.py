@@ -22,6 +22,15 @@ from frappe.utils import cint
 from six import text_type
 from six.moves.urllib.parse import quote
 
+try:
+	# optional, faster encoder
+	import orjson
+except ImportError:
+	orjson = None
+
+# lists in the response longer than this are encoded in chunks of this many rows
+JSON_CHUNK_SIZE = 1000
+
 def report_error(status_code):
 	'''Build error. Show traceback in developer mode'''
 	if (cint(frappe.db.get_system_setting('allow_error_traceback'))
@@ -82,9 +91,53 @@ def as_json():
 
 	response.mimetype = 'application/json'
 	response.charset = 'utf-8'
-	response.data = json.dumps(frappe.local.response, default=json_handler, separators=(',',':'))
+
+	key = get_large_list_key(frappe.local.response)
+	if key:
+		response.response = get_json_chunks(frappe.local.response, key)
+	else:
+		response.data = json_dumps(frappe.local.response)
+
 	return response
 
+def json_dumps(obj):
+	"""Returns compact JSON of `obj` as bytes. Uses orjson if installed, with dates and other
+	types serialized by `json_handler`, so that the output is the same as of `json.dumps`"""
+	if orjson:
+		try:
+			return orjson.dumps(obj, default=json_handler,
+				option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+		except TypeError:
+			# e.g. integers larger than 64 bits
+			pass
+
+	return frappe.safe_encode(json.dumps(obj, default=json_handler, separators=(',',':')))
+
+def get_large_list_key(response):
+	for key in ("message", "data"):
+		value = response.get(key)
+		if isinstance(value, list) and len(value) > JSON_CHUNK_SIZE:
+			return key
+
+def get_json_chunks(response, key):
+	"""Returns JSON of `response` as a list of chunks, with the list in `key` encoded
+	`JSON_CHUNK_SIZE` rows at a time. A large list is thus never encoded into one string"""
+	rows = response[key]
+	rest = dict((k, v) for k, v in response.items() if k != key)
+
+	chunks = ['{{"{0}":['.format(key).encode("utf-8")]
+	for start in range(0, len(rows), JSON_CHUNK_SIZE):
+		if start:
+			chunks.append(b",")
+		chunks.append(json_dumps(rows[start:start + JSON_CHUNK_SIZE])[1:-1])
+
+	chunks.append(b"]")
+	if rest:
+		chunks.append(b"," + json_dumps(rest)[1:-1])
+	chunks.append(b"}")
+
+	return chunks
+
 def as_pdf():
 	response = Response()
 	response.mimetype = "application/pdf"
@@ -12,12 +12,14 @@ from __future__ import unicode_literals, print_function
 
 import frappe
 import json
+import redis
 import schedule
 import time
 import frappe.utils
 import os
-from frappe.utils import get_sites
+from frappe.utils import get_sites, cstr
 from datetime import datetime
+from frappe.utils import background_jobs
 from frappe.utils.background_jobs import enqueue, get_jobs, queue_timeout
 from frappe.utils.data import get_datetime, now_datetime
 from frappe.core.doctype.user.user import STANDARD_USERS
@@ -42,11 +44,19 @@ cron_map = {
 	"all": "0/" + str((frappe.get_conf().scheduler_interval or 240) // 60) + " * * * *",
 }
 
+# sorted set of sites, scored by the timestamp at which the next event of the site is due
+SCHEDULER_NEXT_RUN_KEY = 'scheduler_next_run'
+
+# the last event of a site is kept in redis and persisted to System Settings at this interval
+LAST_EVENT_PERSIST_INTERVAL = 3600
+
 def start_scheduler():
 	'''Run enqueue_events_for_all_sites every 2 minutes (default).
 	Specify scheduler_interval in seconds in common_site_config.json'''
 
 	schedule.every(60).seconds.do(enqueue_events_for_all_sites)
+	schedule.every(5).seconds.do(enqueue_delayed_jobs)
+	schedule.every(30).minutes.do(rebuild_job_registry)
 
 	while True:
 		schedule.run_pending()
@@ -60,17 +70,73 @@ def enqueue_events_for_all_sites():
 		return
 
 	with frappe.init_site():
-		jobs_per_site = get_jobs()
-		sites = get_sites()
+		sites = get_due_sites(get_sites())
 
 	for site in sites:
 		try:
-			enqueue_events_for_site(site=site, queued_jobs=jobs_per_site[site])
+			enqueue_events_for_site(site=site)
 		except:
 			# it should try to enqueue other sites
 			print(frappe.get_traceback())
 
-def enqueue_events_for_site(site, queued_jobs):
+def get_due_sites(sites):
+	'''Returns sites that have an event due, or that have not been scheduled yet'''
+	conn = background_jobs.get_redis_conn()
+	next_run = dict((cstr(site), score) for site, score in
+		conn.zrange(SCHEDULER_NEXT_RUN_KEY, 0, -1, withscores=True))
+
+	# forget dropped sites
+	dropped = [site for site in next_run if site not in sites]
+	if dropped:
+		conn.zrem(SCHEDULER_NEXT_RUN_KEY, *dropped)
+
+	now = time.time()
+	return [site for site in sites if next_run.get(site, 0) <= now]
+
+def set_next_run(site, seconds):
+	'''Do not check the site for events for the next `seconds` seconds'''
+	background_jobs.get_redis_conn().zadd(SCHEDULER_NEXT_RUN_KEY, site, time.time() + seconds)
+
+def reset_next_run(site=None):
+	'''Check the site for events in the next scheduler tick. If redis is down, the site is
+	checked when its next run (the next event as scheduled before) is due'''
+	try:
+		background_jobs.get_redis_conn().zrem(SCHEDULER_NEXT_RUN_KEY, site or frappe.local.site)
+	except redis.exceptions.ConnectionError:
+		frappe.logger(__name__).error('Could not reset next run of {0}, redis is not reachable'.format(
+			site or frappe.local.site))
+
+def get_seconds_to_next_event(nowtime):
+	'''Returns seconds from `nowtime` to the next run of any enabled event of the site'''
+	enabled_events = get_enabled_scheduler_events()
+	cron_strings = set(cron_map[event] for event in enabled_events if event in cron_map)
+	cron_strings.add(cron_map["all"])
+
+	if "cron" in enabled_events:
+		cron_strings.update(cron_map.get(e, e) for e in get_scheduler_events("cron"))
+
+	next_run = min(croniter(e, nowtime).get_next(datetime) for e in cron_strings
+		if croniter.is_valid(e))
+
+	return max((next_run - nowtime).total_seconds(), 0)
+
+def enqueue_delayed_jobs():
+	'''Enqueue background job retries that are due'''
+	try:
+		with frappe.init_site():
+			background_jobs.enqueue_delayed_jobs()
+	except Exception:
+		print(frappe.get_traceback())
+
+def rebuild_job_registry():
+	'''Drop jobs that were lost without finishing from the job registry'''
+	try:
+		with frappe.init_site():
+			background_jobs.rebuild_job_registry()
+	except Exception:
+		print(frappe.get_traceback())
+
+def enqueue_events_for_site(site, queued_jobs=None):
 	def log_and_raise():
 		frappe.logger(__name__).error('Exception in Enqueue Events for Site {0}'.format(site) +
 			'\n' + frappe.get_traceback())
@@ -78,11 +144,23 @@ def enqueue_events_for_site(site, queued_jobs):
 
 	try:
 		frappe.init(site=site)
+
+		# check the site again after the interval of "all" if the scheduler is not running
+		inactive_interval = frappe.get_conf().scheduler_interval or 240
+		if is_scheduler_paused():
+			set_next_run(site, inactive_interval)
+			return
+
 		frappe.connect()
 		if is_scheduler_inactive():
+			set_next_run(site, inactive_interval)
 			return
 
+		if queued_jobs is None:
+			queued_jobs = get_jobs(site=site)[site]
+
 		enqueue_events(site=site, queued_jobs=queued_jobs)
+		set_next_run(site, get_seconds_to_next_event(frappe.utils.now_datetime()))
 
 		frappe.logger(__name__).debug('Queued events for site {0}'.format(site))
 	except frappe.db.OperationalError as e:
@@ -98,13 +176,8 @@ def enqueue_events_for_site(site, queued_jobs):
 
 def enqueue_events(site, queued_jobs):
 	nowtime = frappe.utils.now_datetime()
-	last = frappe.db.get_value('System Settings', 'System Settings', 'scheduler_last_event')
-
-	# set scheduler last event
-	frappe.db.set_value('System Settings', 'System Settings',
-		'scheduler_last_event', nowtime.strftime(DATETIME_FORMAT),
-		update_modified=False)
-	frappe.db.commit()
+	last = get_last_event()
+	set_last_event(nowtime)
 
 	out = []
 	if last:
@@ -113,6 +186,31 @@ def enqueue_events(site, queued_jobs):
 
 	return '\n'.join(out)
 
+def get_last_event():
+	last = background_jobs.get_redis_conn().hget(get_scheduler_state_key(), 'last_event')
+	if last:
+		return cstr(last)
+
+	return frappe.db.get_value('System Settings', 'System Settings', 'scheduler_last_event')
+
+def set_last_event(nowtime):
+	'''Set the last event of the site in redis, and persist it to System Settings
+	if it was not persisted in the last `LAST_EVENT_PERSIST_INTERVAL` seconds'''
+	conn = background_jobs.get_redis_conn()
+	key = get_scheduler_state_key()
+	nowtime_str = nowtime.strftime(DATETIME_FORMAT)
+	conn.hset(key, 'last_event', nowtime_str)
+
+	persisted_at = float(conn.hget(key, 'persisted_at') or 0)
+	if time.time() - persisted_at >= LAST_EVENT_PERSIST_INTERVAL:
+		frappe.db.set_value('System Settings', 'System Settings',
+			'scheduler_last_event', nowtime_str, update_modified=False)
+		frappe.db.commit()
+		conn.hset(key, 'persisted_at', time.time())
+
+def get_scheduler_state_key():
+	return 'scheduler_state:' + frappe.local.site
+
 def enqueue_applicable_events(site, nowtime, last, queued_jobs=()):
 	nowtime_str = nowtime.strftime(DATETIME_FORMAT)
 	out = []
@@ -140,7 +238,7 @@ def trigger(site, event, last=None, queued_jobs=(), now=False):
 	queue = 'long' if event.endswith('_long') else 'short'
 	timeout = queue_timeout[queue]
 	if not queued_jobs and not now:
-		queued_jobs = get_jobs(site=site, queue=queue)
+		queued_jobs = get_jobs(site=site, queue=queue)[site]
 
 	if frappe.flags.in_test:
 		frappe.flags.ran_schedulers.append(event)
@@ -219,11 +317,13 @@ def get_enabled_scheduler_events():
 	return ["all", "hourly", "hourly_long", "daily", "daily_long",
 		"weekly", "weekly_long", "monthly", "monthly_long", "cron"]
 
-def is_scheduler_inactive():
-	if frappe.local.conf.maintenance_mode:
-		return True
+def is_scheduler_paused():
+	'''Returns True if the scheduler is stopped from the site config'''
+	return bool(frappe.local.conf.maintenance_mode or frappe.local.conf.pause_scheduler
+		or frappe.local.conf.disable_scheduler)
 
-	if frappe.local.conf.pause_scheduler:
+def is_scheduler_inactive():
+	if is_scheduler_paused():
 		return True
 
 	if is_scheduler_disabled():
@@ -239,6 +339,7 @@ def is_scheduler_disabled():
 
 def toggle_scheduler(enable):
 	frappe.db.set_value("System Settings", None, "enable_scheduler", 1 if enable else 0)
+	reset_next_run()
 
 def enable_scheduler():
 	toggle_scheduler(True)
@@ -299,6 +400,7 @@ def reset_enabled_scheduler_events(login_manager):
 			if frappe.db.get_global('enabled_scheduler_events'):
 				# clear restricted events, someone logged in!
 				frappe.db.set_global('enabled_scheduler_events', None)
+				reset_next_run()
 		except frappe.db.InternalError as e:
 			if frappe.db.is_timedout(e):
 				frappe.log_error(frappe.get_traceback(), "Error in reset_enabled_scheduler_events")
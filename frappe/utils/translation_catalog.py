@@ -0,0 +1,167 @@
+# Copyright (c) 2019, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+
+from __future__ import unicode_literals
+
+"""
+	frappe.utils.translation_catalog
+	~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+	Compact binary catalogs of compiled translations, one file per language.
+
+	The file is memory mapped and looked up through an open addressing hash
+	table, so that a process does not have to parse or unpickle the full
+	translation dictionary of a language to translate a message.
+
+	Layout (all integers are little endian unsigned 32 bit):
+
+	- header: magic, number of entries, number of slots in the hash table
+	- hash table: one entry index per slot, `EMPTY` if the slot is free
+	- entries: offset and length of the source and the translated message
+	- data: utf-8 encoded messages
+"""
+
+import io, os, mmap, struct, zlib
+from six import iteritems, text_type
+
+MAGIC = b"FTC1"
+HEADER = struct.Struct("<4sII")
+SLOT = struct.Struct("<I")
+ENTRY = struct.Struct("<IIII")
+EMPTY = 0xFFFFFFFF
+
+# path: (mtime, catalog)
+catalogs = {}
+
+def get_catalog(path):
+	"""Returns the `TranslationCatalog` at `path` (shared by the process) or None
+	if it has not been built. A catalog rebuilt on disk is mapped again, and the
+	replaced mapping is closed."""
+	cached = catalogs.get(path)
+	try:
+		mtime = os.stat(path).st_mtime
+	except OSError:
+		mtime = None
+
+	if cached and cached[0] == mtime:
+		return cached[1]
+
+	if cached:
+		catalogs.pop(path)[1].close()
+
+	if mtime is None:
+		return None
+
+	catalog = TranslationCatalog(path)
+	catalogs[path] = (mtime, catalog)
+	return catalog
+
+def write_catalog(path, messages):
+	"""Compile `messages` (dict of source to translated message) into a catalog at `path`.
+
+	The file is written next to the target and renamed, so that processes that have
+	mapped the previous catalog are never exposed to a partial file."""
+	items = [(k.encode("utf-8"), text_type(v).encode("utf-8"))
+		for k, v in iteritems(messages) if k and v]
+
+	slot_count = 8
+	while slot_count < len(items) * 2:
+		slot_count *= 2
+
+	slots = [EMPTY] * slot_count
+	entries, data = [], io.BytesIO()
+	for index, (key, value) in enumerate(items):
+		slot = get_hash(key) & (slot_count - 1)
+		while slots[slot] != EMPTY:
+			slot = (slot + 1) & (slot_count - 1)
+		slots[slot] = index
+
+		key_offset = data.tell()
+		data.write(key)
+		value_offset = data.tell()
+		data.write(value)
+		entries.append((key_offset, len(key), value_offset, len(value)))
+
+	tmp_path = path + ".tmp"
+	with open(tmp_path, "wb") as f:
+		f.write(HEADER.pack(MAGIC, len(items), slot_count))
+		for index in slots:
+			f.write(SLOT.pack(index))
+		for entry in entries:
+			f.write(ENTRY.pack(*entry))
+		f.write(data.getvalue())
+
+	os.rename(tmp_path, path)
+
+def get_hash(key):
+	return zlib.crc32(key) & 0xFFFFFFFF
+
+class TranslationCatalog(object):
+	"""Read only, memory mapped translation catalog built by `write_catalog`"""
+	def __init__(self, path):
+		with open(path, "rb") as f:
+			self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+		magic, self.count, self.slot_count = HEADER.unpack_from(self.buffer, 0)
+		if magic != MAGIC:
+			raise ValueError("{0} is not a translation catalog".format(path))
+
+		self.slots_offset = HEADER.size
+		self.entries_offset = self.slots_offset + self.slot_count * SLOT.size
+		self.data_offset = self.entries_offset + self.count * ENTRY.size
+
+	def get(self, key, default=None):
+		key = key.encode("utf-8") if isinstance(key, text_type) else key
+		mask = self.slot_count - 1
+		slot = get_hash(key) & mask
+
+		while True:
+			index = SLOT.unpack_from(self.buffer, self.slots_offset + slot * SLOT.size)[0]
+			if index == EMPTY:
+				return default
+
+			key_offset, key_length, value_offset, value_length = ENTRY.unpack_from(self.buffer,
+				self.entries_offset + index * ENTRY.size)
+
+			start = self.data_offset + key_offset
+			if key_length == len(key) and self.buffer[start:start + key_length] == key:
+				start = self.data_offset + value_offset
+				return self.buffer[start:start + value_length].decode("utf-8")
+
+			slot = (slot + 1) & mask
+
+	def close(self):
+		self.buffer.close()
+
+	def __contains__(self, key):
+		return self.get(key) is not None
+
+	def __getitem__(self, key):
+		value = self.get(key)
+		if value is None:
+			raise KeyError(key)
+		return value
+
+	def __len__(self):
+		return self.count
+
+class LayeredCatalog(dict):
+	"""Translations of a language, with overrides (e.g. user `Translation` records)
+	held in the dict and layered on top of a `TranslationCatalog`"""
+	def __init__(self, catalog, lang):
+		super(LayeredCatalog, self).__init__()
+		self.catalog = catalog
+		self.lang = lang
+
+	def get(self, key, default=None):
+		if dict.__contains__(self, key):
+			return dict.__getitem__(self, key)
+		return self.catalog.get(key, default)
+
+	def __contains__(self, key):
+		return dict.__contains__(self, key) or key in self.catalog
+
+	def __getitem__(self, key):
+		if dict.__contains__(self, key):
+			return dict.__getitem__(self, key)
+		return self.catalog[key]
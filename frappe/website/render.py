@@ -6,19 +6,21 @@ import frappe
 from frappe import _
 import frappe.sessions
 from frappe.utils import cstr
-import os, mimetypes, json
+import mimetypes, json, zlib, hashlib, time
+from datetime import datetime
 
 import six
 from six import iteritems
 from werkzeug.wrappers import Response
-from werkzeug.routing import Map, Rule, NotFound
+from werkzeug.routing import NotFound
 from werkzeug.wsgi import wrap_file
+from werkzeug.http import http_date
 
 from frappe.website.context import get_context
 from frappe.website.redirect import resolve_redirect
 from frappe.website.utils import (get_home_page, can_cache, delete_page_cache,
 	get_toc, get_next_link)
-from frappe.website.router import clear_sitemap
+from frappe.website.router import clear_sitemap, get_route_table, get_static_file_path
 from frappe.translate import guess_language
 
 class PageNotFoundError(Exception): pass
@@ -34,6 +36,7 @@ def render(path=None, http_status_code=None):
 		resolve_redirect(path)
 		path = resolve_path(path)
 		data = None
+		frappe.local.response.page_etag = None
 
 		# if in list of already known 404s, send it
 		if can_cache() and frappe.cache().hget('website_404', frappe.request.url):
@@ -78,8 +81,13 @@ def render(path=None, http_status_code=None):
 				data = render_page(path)
 				http_status_code = 500
 
+		# pages with the csrf token of the session differ per session, with the same html cached
+		session_page = bool(frappe.local.session) and "<!-- csrf_token -->" in data
 		data = add_csrf_token(data)
 
+		if not http_status_code and frappe.local.response.page_etag:
+			return get_conditional_response(path, data, session_page)
+
 	except frappe.Redirect:
 		return build_response(path, "", 301, {
 			"Location": frappe.flags.redirect_location or (frappe.local.response or {}).get('location'),
@@ -91,20 +99,16 @@ def render(path=None, http_status_code=None):
 def is_static_file(path):
 	if ('.' not in path):
 		return False
-	extn = path.rsplit('.', 1)[-1]
-	if extn in ('html', 'md', 'js', 'xml', 'css', 'txt', 'py'):
-		return False
 
-	for app in frappe.get_installed_apps():
-		file_path = frappe.get_app_path(app, 'www') + '/' + path
-		if os.path.exists(file_path):
-			frappe.flags.file_path = file_path
-			return True
+	file_path = get_static_file_path(path)
+	if file_path:
+		frappe.flags.file_path = file_path
+		return True
 
 	return False
 
 def is_web_form(path):
-	return bool(frappe.get_all("Web Form", filters={'route': path}))
+	return path in get_route_table().web_forms
 
 def render_web_form(path):
 	data = render_page(path)
@@ -134,6 +138,37 @@ def build_response(path, data, http_status_code, headers=None):
 
 	return response
 
+def get_conditional_response(path, data, session_page=False):
+	"""Returns `304 Not Modified` if the client has the same version of the (cached) page,
+	else the page with its `ETag` and `Last-Modified` headers.
+
+	`If-Modified-Since` is not checked for pages with the csrf token of the session
+	(`session_page`), as the token may have changed since, only the `ETag` is"""
+	request = frappe.local.request
+	modified = frappe.local.response.page_modified
+
+	# the csrf token added to the page is part of the version
+	csrf_token = frappe.local.session.data.csrf_token if frappe.local.session else None
+	etag = hashlib.md5("{0}:{1}".format(frappe.local.response.page_etag,
+		csrf_token).encode("utf-8")).hexdigest()
+
+	headers = {
+		"ETag": '"{0}"'.format(etag),
+		"Last-Modified": http_date(modified)
+	}
+
+	if request:
+		if request.if_none_match:
+			not_modified = etag in request.if_none_match
+		else:
+			not_modified = (not session_page and request.if_modified_since
+				and datetime.utcfromtimestamp(int(modified)) <= request.if_modified_since)
+
+		if not_modified:
+			return build_response(path, "", 304, headers)
+
+	return build_response(path, data, 200, headers)
+
 def render_page_by_language(path):
 	translated_languages = frappe.get_hooks("translated_languages_for_website")
 	user_lang = guess_language(translated_languages)
@@ -158,8 +193,11 @@ def render_page(path):
 	if can_cache():
 		# return rendered page
 		page_cache = frappe.cache().hget("website_page", path)
-		if page_cache and frappe.local.lang in page_cache:
-			out = page_cache[frappe.local.lang]
+		entry = page_cache.get(frappe.local.lang) if page_cache else None
+
+		# entries cached before pages were versioned are plain html, and are built again
+		if isinstance(entry, dict):
+			out = get_html_from_page_cache(entry)
 
 	if out:
 		frappe.local.response.from_cache = True
@@ -206,11 +244,32 @@ def build_page(path):
 
 	if can_cache(context.no_cache):
 		page_cache = frappe.cache().hget("website_page", path) or {}
-		page_cache[frappe.local.lang] = html
+		page_cache[frappe.local.lang] = make_page_cache_entry(html)
 		frappe.cache().hset("website_page", path, page_cache)
 
 	return html
 
+def make_page_cache_entry(html):
+	"""Returns compressed html of the page with its version (`etag`) and time of rendering.
+	Also sets them for the current response."""
+	html = frappe.safe_encode(html)
+	entry = {
+		"html": zlib.compress(html),
+		"etag": hashlib.md5(html).hexdigest(),
+		"modified": time.time()
+	}
+
+	frappe.local.response.page_etag = entry["etag"]
+	frappe.local.response.page_modified = entry["modified"]
+
+	return entry
+
+def get_html_from_page_cache(entry):
+	frappe.local.response.page_etag = entry["etag"]
+	frappe.local.response.page_modified = entry["modified"]
+
+	return frappe.safe_decode(zlib.decompress(entry["html"]))
+
 def resolve_path(path):
 	if not path:
 		path = "index"
@@ -229,8 +288,7 @@ def resolve_path(path):
 	return path
 
 def resolve_from_map(path):
-	m = Map([Rule(r["from_route"], endpoint=r["to_route"], defaults=r.get("defaults"))
-		for r in get_website_rules()])
+	m = get_route_table().rules
 
 	if frappe.local.request:
 		urls = m.bind_to_environ(frappe.local.request.environ)
@@ -283,7 +341,7 @@ def clear_cache(path=None):
 
 	:param path: (optional) for the given path'''
 	for key in ('website_generator_routes', 'website_pages',
-		'website_full_index'):
+		'website_full_index', 'website_route_version'):
 		frappe.cache().delete_value(key)
 
 	frappe.cache().delete_value("website_404")
@@ -8,8 +8,15 @@ from frappe.website.utils import (can_cache, delete_page_cache, extract_title,
 	extract_comment_tag)
 from frappe.model.document import get_controller
 from six import text_type
+from werkzeug.routing import Map, Rule
 import io
 
+# site: route table of the site, built once per process
+route_tables = {}
+
+# extensions of files in `www` that are rendered as pages, not served as static files
+page_extensions = ('html', 'md', 'js', 'xml', 'css', 'txt', 'py')
+
 def resolve_route(path):
 	"""Returns the page route object based on searching in pages and generators.
 	The `www` folder is also a part of generator **Web Page**.
@@ -83,6 +90,58 @@ def get_page_context_from_doctype(path):
 def clear_sitemap():
 	delete_page_cache("*")
 
+def get_route_table():
+	"""Returns routes of static files in `www`, web forms and route rules of the site.
+
+	The table is built once per process and rebuilt when the version stamp
+	`website_route_version` changes, i.e. after the website cache is cleared"""
+	version = frappe.cache().get_value("website_route_version",
+		generator=lambda: frappe.generate_hash(length=10))
+
+	route_table = route_tables.get(frappe.local.site)
+	if not (route_table and route_table.version == version):
+		route_table = route_tables[frappe.local.site] = make_route_table(version)
+
+	return route_table
+
+def make_route_table(version):
+	from frappe.website.render import get_website_rules
+
+	static_files = {}
+	for app in reversed(frappe.get_installed_apps()):
+		www_path = frappe.get_app_path(app, 'www')
+		for basepath, folders, files in os.walk(www_path, followlinks=True):
+			for fname in files:
+				if fname.rsplit('.', 1)[-1] not in page_extensions:
+					file_path = os.path.join(basepath, fname)
+					# apps installed first take precedence
+					static_files[os.path.relpath(file_path, www_path)] = file_path
+
+	return frappe._dict(
+		version = version,
+		static_files = static_files,
+		web_forms = set(frappe.db.sql_list("select route from `tabWeb Form`")),
+		rules = Map([Rule(r["from_route"], endpoint=r["to_route"], defaults=r.get("defaults"))
+			for r in get_website_rules()])
+	)
+
+def get_static_file_path(path):
+	"""Returns path of the static file in `www` of any of the apps"""
+	if path.rsplit('.', 1)[-1] in page_extensions:
+		return None
+
+	file_path = get_route_table().static_files.get(path)
+	if not file_path and frappe.conf.developer_mode:
+		# files added after the table was built
+		for app in frappe.get_installed_apps():
+			file_path = frappe.get_app_path(app, 'www') + '/' + path
+			if os.path.exists(file_path):
+				return file_path
+
+		return None
+
+	return file_path
+
 def get_all_page_context_from_doctypes():
 	'''Get all doctype generated routes (for sitemap.xml)'''
 	routes = frappe.cache().get_value("website_generator_routes")
@@ -6,8 +6,9 @@ from __future__ import unicode_literals, print_function
 no_cache = 1
 base_template_path = "templates/www/desk.html"
 
-import os, re
+import os, re, json
 import frappe
+from six.moves.urllib.parse import unquote
 from frappe import _
 import frappe.sessions
 
@@ -18,7 +19,7 @@ def get_context(context):
 
 	hooks = frappe.get_hooks()
 	try:
-		boot = frappe.sessions.get()
+		boot = frappe.sessions.get(boot_hashes=get_boot_hashes(context))
 	except Exception as e:
 		boot = frappe._dict(status='failed', error = str(e))
 		print(frappe.get_traceback())
@@ -49,6 +50,18 @@ def get_context(context):
 
 	return context
 
+def get_boot_hashes(context):
+	"""hashes of the shared boot segments held by the browser, set by the desk in the `boot_hashes` cookie"""
+	if context.get("for_mobile") or not frappe.request:
+		return None
+
+	try:
+		hashes = json.loads(unquote(frappe.request.cookies.get("boot_hashes") or "{}"))
+	except ValueError:
+		return None
+
+	return hashes if isinstance(hashes, dict) else None
+
 @frappe.whitelist()
 def get_desk_assets(build_version):
 	"""Get desk assets to be loaded for mobile app"""
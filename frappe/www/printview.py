@@ -8,6 +8,7 @@ from frappe import _
 
 from frappe.modules import get_doc_path
 from frappe.utils import cint, strip_html
+from frappe.utils.jinja import get_template_from_string
 from six import string_types
 
 no_cache = 1
@@ -61,7 +62,7 @@ def get_print_format_doc(print_format_name, meta):
 def get_rendered_template(doc, name=None, print_format=None, meta=None,
 	no_letterhead=None, trigger_print=False):
 
-	print_settings = frappe.db.get_singles_dict("Print Settings")
+	print_settings = frappe.get_cached_doc("Print Settings", "Print Settings")
 
 	if isinstance(no_letterhead, string_types):
 		no_letterhead = cint(no_letterhead)
@@ -99,28 +100,23 @@ def get_rendered_template(doc, name=None, print_format=None, meta=None,
 		doc._line_breaks = print_format.line_breaks
 		doc._align_labels_right = print_format.align_labels_right
 
-		def get_template_from_string():
-			return jenv.from_string(get_print_format(doc.doctype,
+		def get_print_format_template():
+			return get_template_from_string(get_cached_print_format(doc.doctype,
 				print_format))
 
 		if print_format.custom_format:
-			template = get_template_from_string()
+			template = get_print_format_template()
 
 		elif print_format.format_data:
 			# set format data
-			format_data = json.loads(print_format.format_data)
-			for df in format_data:
-				format_data_map[df.get("fieldname")] = df
-				if "visible_columns" in df:
-					for _df in df.get("visible_columns"):
-						format_data_map[_df.get("fieldname")] = _df
+			format_data, format_data_map = get_format_data(print_format)
 
 			doc.format_data_map = format_data_map
 
 			template = "standard"
 
 		elif print_format.standard=="Yes":
-			template = get_template_from_string()
+			template = get_print_format_template()
 
 		else:
 			# fallback
@@ -151,7 +147,7 @@ def get_rendered_template(doc, name=None, print_format=None, meta=None,
 		"trigger_print": cint(trigger_print),
 		"letter_head": letter_head.content,
 		"footer": letter_head.footer,
-		"print_settings": frappe.get_doc("Print Settings")
+		"print_settings": print_settings
 	}
 
 	html = template.render(args, filters={"len": len})
@@ -233,6 +229,39 @@ def get_letter_head(doc, no_letterhead):
 	else:
 		return frappe.db.get_value("Letter Head", {"is_default": 1}, ["content", "footer"], as_dict=True) or {}
 
+def get_print_cache():
+	"""Returns cache of print format templates, layouts and styles of this request (or job),
+	reused while printing many documents with the same format"""
+	if getattr(frappe.local, "print_cache", None) is None:
+		frappe.local.print_cache = {}
+
+	return frappe.local.print_cache
+
+def get_cached_print_format(doctype, print_format):
+	"""Returns template source of the print format, read once per request"""
+	key = ("source", doctype, print_format.name, print_format.modified)
+	cache = get_print_cache()
+	if key not in cache:
+		cache[key] = get_print_format(doctype, print_format)
+
+	return cache[key]
+
+def get_format_data(print_format):
+	"""Returns fields (and a map of fields and table columns by fieldname) set in Print Format Builder"""
+	key = ("format_data", print_format.name, print_format.modified)
+	cache = get_print_cache()
+	if key not in cache:
+		format_data, format_data_map = json.loads(print_format.format_data), {}
+		for df in format_data:
+			format_data_map[df.get("fieldname")] = df
+			if "visible_columns" in df:
+				for _df in df.get("visible_columns"):
+					format_data_map[_df.get("fieldname")] = _df
+
+		cache[key] = format_data, format_data_map
+
+	return cache[key]
+
 def get_print_format(doctype, print_format):
 	if print_format.disabled:
 		frappe.throw(_("Print Format {0} is disabled").format(print_format.name),
@@ -264,12 +293,9 @@ def make_layout(doc, meta, format_data=None):
 	layout, page = [], []
 	layout.append(page)
 
-	if format_data:
-		# extract print_heading_template from the first field
-		# and remove the field
-		if format_data[0].get("fieldname") == "print_heading_template":
-			doc.print_heading_template = format_data[0].get("options")
-			format_data = format_data[1:]
+	print_heading, fields = get_layout_fields(meta, format_data)
+	if print_heading:
+		doc.print_heading_template = print_heading.get("options")
 
 	def get_new_section(): return  {'columns': [], 'has_data': False}
 
@@ -278,18 +304,10 @@ def make_layout(doc, meta, format_data=None):
 		if not page[-1]['columns']:
 			page[-1]['columns'].append({'fields': []})
 
-	for df in format_data or meta.fields:
+	for df in fields:
 		if format_data:
-			# embellish df with original properties
+			# copy, as properties of table fields are set below
 			df = frappe._dict(df)
-			if df.fieldname:
-				original = meta.get_field(df.fieldname)
-				if original:
-					newdf = original.as_dict()
-					newdf.update(df)
-					df = newdf
-
-			df.print_hide = 0
 
 		if df.fieldtype=="Section Break" or page==[]:
 			if len(page) > 1:
@@ -346,6 +364,43 @@ def make_layout(doc, meta, format_data=None):
 
 	return layout
 
+def get_layout_fields(meta, format_data=None):
+	"""Returns the print heading field and the fields to be laid out. Fields set in Print Format
+	Builder are embellished with the properties of the original docfields once per request."""
+	if not format_data:
+		return None, meta.fields
+
+	key = ("layout_fields", meta.name, id(format_data))
+	cache = get_print_cache()
+	cached = cache.get(key)
+	if cached and cached[0] is meta and cached[1] is format_data:
+		return cached[2]
+
+	print_heading, fields = None, format_data
+
+	# extract print_heading_template from the first field
+	# and remove the field
+	if fields[0].get("fieldname") == "print_heading_template":
+		print_heading = fields[0]
+		fields = fields[1:]
+
+	layout_fields = []
+	for df in fields:
+		# embellish df with original properties
+		df = frappe._dict(df)
+		if df.fieldname:
+			original = meta.get_field(df.fieldname)
+			if original:
+				newdf = original.as_dict()
+				newdf.update(df)
+				df = newdf
+
+		df.print_hide = 0
+		layout_fields.append(df)
+
+	cache[key] = (meta, format_data, (print_heading, layout_fields))
+	return print_heading, layout_fields
+
 def is_visible(df, doc):
 	"""Returns True if docfield is visible in print layout and does not have print_hide set."""
 	if df.fieldtype in ("Section Break", "Column Break", "Button"):
@@ -377,11 +432,22 @@ def has_value(df, doc):
 	return True
 
 def get_print_style(style=None, print_format=None, for_legacy=False):
-	print_settings = frappe.get_doc("Print Settings")
+	print_settings = frappe.get_cached_doc("Print Settings", "Print Settings")
 
 	if not style:
 		style = print_settings.print_style or ''
 
+	# rendered again if any of the settings, styles or the print format change
+	key = ("style", style, style and frappe.db.get_value("Print Style", style, "modified"),
+		print_format.name if print_format else None, print_format.modified if print_format else None,
+		print_settings.modified, for_legacy)
+	cache = get_print_cache()
+	if key not in cache:
+		cache[key] = make_print_style(print_settings, style, print_format, for_legacy)
+
+	return cache[key]
+
+def make_print_style(print_settings, style, print_format=None, for_legacy=False):
 	context = {
 		"print_settings": print_settings,
 		"print_style": style,